@@ -0,0 +1,5 @@
+# Load the Celery app with Django, so tasks bind to it and can be dispatched from requests
+from celery_app import app as celery_app
+
+
+__all__ = ("celery_app",)
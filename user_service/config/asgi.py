@@ -13,5 +13,7 @@ from django.core.asgi import get_asgi_application
 
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+# Read by the database settings, which must not keep persistent connections under ASGI
+os.environ.setdefault("DJANGO_SERVER_INTERFACE", "asgi")
 
 application = get_asgi_application()
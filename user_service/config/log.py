@@ -0,0 +1,117 @@
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import weakref
+from datetime import datetime, timezone
+from functools import partial
+from logging.handlers import QueueHandler, QueueListener
+
+
+# Attributes every LogRecord has; anything else on a record came in through `extra`
+RECORD_ATTRIBUTES = frozenset(logging.makeLogRecord({}).__dict__) | {"message", "asctime"}
+
+
+class BoundedQueueListener(QueueListener):
+
+    def enqueue_sentinel(self):
+        # The queue may be full; wait for the listener to make room rather than fail to stop
+        self.queue.put(self._sentinel)
+
+
+class BoundedQueueHandler(QueueHandler):
+    """
+    Hands records to a listener thread that owns the actual (file, console) handlers, so a
+    slow disk never stalls the logging thread. The buffer holds at most `maxsize` records; when
+    it is full, records are dropped and counted instead of blocking. The listener starts on the
+    first record, so it runs in the process (and after the fork) that logs. A forked child
+    inherits the listener but not its thread, so it gets a fresh queue and starts its own.
+
+    In dictConfig, `handlers` lists "cfg://handlers.<name>" references to handlers whose names
+    sort before this one, since dictConfig configures handlers in name order.
+    """
+
+    def __init__(self, handlers=(), maxsize=10000):
+        super().__init__(queue.Queue(maxsize))
+        # Index access makes dictConfig resolve the cfg:// references, iteration would not
+        self.targets = [handlers[i] for i in range(len(handlers))]
+        unresolved = [target for target in self.targets if not isinstance(target, logging.Handler)]
+        if unresolved:
+            raise ValueError(f"Queue targets must be configured handlers, got: {unresolved}")
+        self.dropped = 0
+        self.listener = None
+        self._start_lock = threading.Lock()
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=partial(_reset_in_child, weakref.ref(self)))
+
+    def reset_after_fork(self):
+        # The parent's buffered records are the parent's to write
+        self.queue = queue.Queue(self.queue.maxsize)
+        self.listener = None
+        self._start_lock = threading.Lock()
+
+    def start(self):
+        with self._start_lock:
+            if self.listener is None:
+                self.listener = BoundedQueueListener(self.queue, *self.targets, respect_handler_level=True)
+                self.listener.start()
+
+    def emit(self, record):
+        if self.listener is None:
+            self.start()
+        super().emit(record)
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self):
+        # Drain what is buffered before the process exits
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+        super().close()
+
+
+def _reset_in_child(handler_ref):
+    handler = handler_ref()
+    if handler is not None:
+        handler.reset_after_fork()
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, with the `extra` fields of the record as top-level keys."""
+
+    def format(self, record):
+        data = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "module": record.module,
+            "lineno": record.lineno,
+        }
+        if record.exc_info:
+            data["exc_info"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            data["exc_info"] = record.exc_text
+        for name, value in record.__dict__.items():
+            if name not in RECORD_ATTRIBUTES and name not in data:
+                data[name] = value
+        return json.dumps(data, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """Lets through a `rate` fraction of the records below `level`; records at or above `level` always pass."""
+
+    def __init__(self, rate=1.0, level="WARNING"):
+        super().__init__()
+        self.rate = float(rate)
+        self.level = logging.getLevelName(level) if isinstance(level, str) else level
+
+    def filter(self, record):
+        return record.levelno >= self.level or random.random() < self.rate
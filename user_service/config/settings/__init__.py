@@ -1,19 +1,13 @@
 import os
+from pathlib import Path
 
 from django.core.exceptions import ImproperlyConfigured
 from dotenv import load_dotenv
 
+from .profiles import apply_profile
 
-def reduce_path(file_name, times):
-    result = os.path.realpath(file_name)
-    for i in range(times):
-        result = os.path.dirname(result)
-    return result
 
-
-ROOT = reduce_path(__file__, 3)
-dotenv_path = os.path.join(ROOT, ".env")
-load_dotenv(dotenv_path)
+load_dotenv(Path(__file__).resolve().parents[2] / ".env")
 
 ENVS = ["DEVELOPMENT", "PRODUCTION", "STAGING"]
 
@@ -31,3 +25,6 @@ match env:
         from .prod import *
     case "STAGING":
         from .staging import *
+
+# Process profile: "full" (default), or the slimmer "api" and "worker" (see profiles.py)
+apply_profile(globals(), os.environ.get("DJANGO_SETTINGS_PROFILE", "full"))
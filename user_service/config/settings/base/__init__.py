@@ -1,6 +1,10 @@
 from .apps import *
 from .auth import *
 from .basic import *
+from .cache import *
+from .celery import *
 from .database import *
 from .drf import *
+from .instrumentation import *
 from .logging import *
+from .outbox import *
@@ -1,3 +1,6 @@
+import os
+
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -17,3 +20,40 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 AUTH_USER_MODEL = "users.BaseUser"
+
+# Password hashing
+# https://docs.djangoproject.com/en/4.2/topics/auth/passwords/
+# New passwords use the first hasher. Hashes made by the others, or with other cost parameters,
+# still verify and are rewritten on the user's next successful login.
+
+PASSWORD_HASHERS = [
+    "users.hashers.TunedArgon2PasswordHasher",
+    "users.hashers.TunedScryptPasswordHasher",
+    "django.contrib.auth.hashers.PBKDF2PasswordHasher",
+    "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+]
+
+# Measure these on the production hosts with `manage.py calibrate_hashers --target-ms=<latency>`
+PASSWORD_HASHER_COSTS = {
+    "ARGON2_TIME_COST": int(os.environ.get("ARGON2_TIME_COST", 2)),  # Passes over memory
+    "ARGON2_MEMORY_COST": int(os.environ.get("ARGON2_MEMORY_COST", 19456)),  # KiB per hash
+    "ARGON2_PARALLELISM": int(os.environ.get("ARGON2_PARALLELISM", 1)),  # Lanes per hash
+    "SCRYPT_WORK_FACTOR": int(os.environ.get("SCRYPT_WORK_FACTOR", 2**15)),  # N, a power of 2
+    "SCRYPT_BLOCK_SIZE": int(os.environ.get("SCRYPT_BLOCK_SIZE", 8)),  # r
+    "SCRYPT_PARALLELISM": int(os.environ.get("SCRYPT_PARALLELISM", 1)),  # p
+}
+
+# Process pool that computes password hashes off the request thread (see users/hashing.py).
+# Every server process has its own pool, so by default they share the CPUs: gunicorn.conf.py runs
+# WEB_CONCURRENCY ASGI workers (the CPU count unless set), other servers one process.
+CPU_COUNT = os.cpu_count() or 1
+SERVER_PROCESSES = int(
+    os.environ.get("WEB_CONCURRENCY", CPU_COUNT if os.environ.get("DJANGO_SERVER_INTERFACE") == "asgi" else 1)
+)
+PASSWORD_HASHING = {
+    # Hashing processes per server process, 0 hashes inline
+    "WORKERS": int(os.environ.get("PASSWORD_HASHING_WORKERS", max(1, CPU_COUNT // SERVER_PROCESSES))),
+    "MAX_PENDING": None,  # Hash jobs queued or running at once, None allows 4 per worker
+    "ACQUIRE_TIMEOUT": 2,  # Seconds a caller waits for a free slot before HashingPoolFull
+    "MAX_BATCH_PENDING": None,  # Of those slots, the most bulk hash_many() may hold; None allows half
+}
@@ -1,19 +1,9 @@
 import os
+from pathlib import Path
 
-from dotenv import load_dotenv
 
-
-def reduce_path(file_name, times):
-    """Reduces a file path by navigating up a number of directories."""
-    result = os.path.realpath(file_name)
-    for _ in range(times):
-        result = os.path.dirname(result)
-    return result
-
-
-BASE_DIR = reduce_path(__file__, 4)
-dotenv_path = os.path.join(BASE_DIR, ".env")
-load_dotenv(dotenv_path)
+# The .env file is loaded once, by config/settings/__init__.py, before any settings module runs
+BASE_DIR = Path(__file__).resolve().parents[3]
 
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/4.2/howto/deployment/checklist/
@@ -27,7 +17,9 @@ DEBUG = True
 ALLOWED_HOSTS = (os.environ.get("DJANGO_ALLOWED_HOSTS", "localhost"),)
 
 MIDDLEWARE = [
+    "users.instrumentation.InstrumentationMiddleware",  # First, so its total covers the other middleware
     "django.middleware.security.SecurityMiddleware",
+    "users.middleware.ReplicaPinningMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
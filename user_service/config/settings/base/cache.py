@@ -0,0 +1,35 @@
+import os
+
+
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+
+CACHES = {
+    "default": {
+        "BACKEND": "django_redis.cache.RedisCache",
+        "LOCATION": os.environ.get("REDIS_URL", "redis://localhost:6379/0"),
+        "KEY_PREFIX": "user_service",
+        "OPTIONS": {
+            "CLIENT_CLASS": "django_redis.client.DefaultClient",
+        },
+    }
+}
+
+# Read-through cache for BaseUser/BaseClient lookups (see users/cache.py)
+USER_CACHE = {
+    "CACHE_ALIAS": "default",
+    "VERSION": 1,  # Bump to invalidate every cached user after a model change
+    "TIMEOUT": 60 * 5,  # Seconds an entry lives in the shared cache
+    "LOCAL_MAXSIZE": 1024,  # Entries kept in the in-process LRU tier
+    "LOCAL_TIMEOUT": 5,  # Seconds an entry lives in the in-process LRU tier
+    "LOCK_TIMEOUT": 5,  # Seconds a loader holds the stampede lock for a key
+}
+
+# Cached account subtrees (see users/accounts.py)
+ACCOUNT_MEMBERS = {
+    "CACHE_ALIAS": "default",
+    "VERSION": 1,  # Bump to invalidate every cached subtree after a model change
+    "TIMEOUT": 60 * 5,  # Seconds an entry lives in the shared cache
+    "LOCAL_MAXSIZE": 256,  # Entries kept in the in-process LRU tier
+    "LOCAL_TIMEOUT": 5,  # Seconds an entry lives in the in-process LRU tier
+}
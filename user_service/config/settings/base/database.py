@@ -4,12 +4,58 @@ import os
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
+# Connection reuse (see docker-compose.yml for the PgBouncer service)
+#   persistent: each worker thread keeps its connection for DB_POOL_IDLE_TIMEOUT seconds
+#   pgbouncer:  connects through PgBouncer in transaction pooling mode, which owns a pool of
+#               DB_POOL_SIZE server connections; server-side cursors cannot survive it
+#   off:        a new connection per request
+# Under ASGI (config/asgi.py sets DJANGO_SERVER_INTERFACE) the sync ORM calls of a request run on
+# executor threads that never get the request's end-of-request cleanup, so persistent connections
+# leak (Django ticket #33497): the ASGI server defaults to "off" and refuses "persistent".
+SERVER_INTERFACE = os.environ.get("DJANGO_SERVER_INTERFACE", "wsgi")
+DB_POOL_MODE = os.environ.get("DB_POOL_MODE", "off" if SERVER_INTERFACE == "asgi" else "persistent")
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", 20))
+DB_POOL_IDLE_TIMEOUT = int(os.environ.get("DB_POOL_IDLE_TIMEOUT", 300))
+
+if DB_POOL_MODE not in ("persistent", "pgbouncer", "off"):
+    raise ValueError(f"Invalid DB_POOL_MODE: {DB_POOL_MODE}")
+if SERVER_INTERFACE == "asgi" and DB_POOL_MODE == "persistent":
+    raise ValueError("DB_POOL_MODE=persistent leaks connections under ASGI, use pgbouncer or off")
+
 DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.postgresql",
         "HOST": os.environ.get("DB_HOST", "localhost"),
+        "PORT": os.environ.get("DB_PORT", ""),
         "NAME": os.environ.get("DB_NAME", "default_db"),
         "USER": os.environ.get("DB_USER", "user"),
         "PASSWORD": os.environ.get("DB_PASS", "password"),
+        "CONN_MAX_AGE": DB_POOL_IDLE_TIMEOUT if DB_POOL_MODE == "persistent" else 0,
+        "CONN_HEALTH_CHECKS": DB_POOL_MODE == "persistent",  # Ping a reused connection before a request uses it
+        "DISABLE_SERVER_SIDE_CURSORS": DB_POOL_MODE == "pgbouncer",
+        "OPTIONS": {
+            "connect_timeout": int(os.environ.get("DB_CONNECT_TIMEOUT", 5)),
+        },
     }
 }
+
+if DB_POOL_MODE == "pgbouncer":
+    DATABASES["default"]["HOST"] = os.environ.get("PGBOUNCER_HOST", "pgbouncer")
+    DATABASES["default"]["PORT"] = os.environ.get("PGBOUNCER_PORT", "6432")
+
+# Read replicas (see users/routers.py), DB_REPLICA_HOSTS is a comma-separated list of hosts
+DATABASE_REPLICAS = []
+for number, host in enumerate(filter(None, os.environ.get("DB_REPLICA_HOSTS", "").split(",")), start=1):
+    alias = f"replica_{number}"
+    DATABASES[alias] = {**DATABASES["default"], "HOST": host.strip(), "TEST": {"MIRROR": "default"}}
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ["users.routers.ReplicaRouter"]
+
+# After a write, the client's reads stay on the primary this long (covers replication lag)
+REPLICA_STICKY_SECONDS = int(os.environ.get("DB_REPLICA_STICKY_SECONDS", 5))
+REPLICA_STICKY_COOKIE = "primary_pin"
+
+# Hash partitions of the client table by account_id (PostgreSQL, see users/partitioning.py).
+# Read once by migration 0008: changing it later needs the table to be partitioned again.
+CLIENT_PARTITIONS = int(os.environ.get("DB_CLIENT_PARTITIONS", 16))
@@ -15,23 +15,30 @@ REST_FRAMEWORK = {
     # Authentication
     "DEFAULT_AUTHENTICATION_CLASSES": [
         "rest_framework.authentication.SessionAuthentication",  # For sessions (e.g., in admin panel)
-        "rest_framework_simplejwt.authentication.JWTAuthentication",  # For JWT
+        "users.authentication.ClaimsJWTAuthentication",  # For JWT, users built from signed token claims
     ],
     # Permissions
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.IsAuthenticated",  # Authentication required for all requests
     ],
     # Pagination
-    "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
-    "PAGE_SIZE": 10,  # Qty of objects per page
+    "DEFAULT_PAGINATION_CLASS": "users.pagination.KeysetPagination",  # Cursor over (date_joined, id), no COUNT/OFFSET
+    "PAGE_SIZE": 10,  # Default qty of objects per page, ?page_size= is capped by KeysetPagination.max_page_size
     # Actions tracker
+    # GCRA token buckets, one atomic Redis round trip per throttle (see users/throttling.py)
     "DEFAULT_THROTTLE_CLASSES": [
-        "rest_framework.throttling.AnonRateThrottle",  # Restrictions for anonymous users
-        "rest_framework.throttling.UserRateThrottle",  # Restrictions for authenticated users
+        "users.throttling.AnonGCRAThrottle",  # Restrictions for anonymous users, per IP
+        "users.throttling.RoleGCRAThrottle",  # Restrictions for authenticated users, per user and role
+        "users.throttling.AccountGCRAThrottle",  # Restrictions shared by the users of an account_id
     ],
     "DEFAULT_THROTTLE_RATES": {
         "anon": "100/day",  # 100 requests per day for anonymous users
-        "user": "1000/day",  # 1000 requests per day for authenticated users
+        "user": "1000/day",  # 1000 requests per day for authenticated users without a role rate
+        "role:Admin": "10000/day",
+        "role:Staff": "5000/day",
+        "role:AccountOwner": "2000/day",
+        "role:AccountUser": "1000/day",
+        "account": "20000/day",  # All users of one account together
     },
     # Exceptions handler
     "EXCEPTION_HANDLER": "rest_framework.views.exception_handler",
@@ -59,13 +66,13 @@ SIMPLE_JWT = {
     "USER_AUTHENTICATION_RULE": "rest_framework_simplejwt.authentication.default_user_authentication_rule",
     "AUTH_TOKEN_CLASSES": ("rest_framework_simplejwt.tokens.AccessToken",),
     "TOKEN_TYPE_CLAIM": "token_type",
-    "TOKEN_USER_CLASS": "rest_framework_simplejwt.models.TokenUser",
+    "TOKEN_USER_CLASS": "users.authentication.ClaimsUser",
     "JTI_CLAIM": "jti",
     "SLIDING_TOKEN_REFRESH_EXP_CLAIM": "refresh_exp",
     "SLIDING_TOKEN_LIFETIME": timedelta(minutes=5),
     "SLIDING_TOKEN_REFRESH_LIFETIME": timedelta(days=1),
-    "TOKEN_OBTAIN_SERIALIZER": "rest_framework_simplejwt.serializers.TokenObtainPairSerializer",
-    "TOKEN_REFRESH_SERIALIZER": "rest_framework_simplejwt.serializers.TokenRefreshSerializer",
+    "TOKEN_OBTAIN_SERIALIZER": "users.serializers.UserClaimsTokenObtainPairSerializer",
+    "TOKEN_REFRESH_SERIALIZER": "users.serializers.UserClaimsTokenRefreshSerializer",
     "TOKEN_VERIFY_SERIALIZER": "rest_framework_simplejwt.serializers.TokenVerifySerializer",
     "TOKEN_BLACKLIST_SERIALIZER": "rest_framework_simplejwt.serializers.TokenBlacklistSerializer",
     "SLIDING_TOKEN_OBTAIN_SERIALIZER": "rest_framework_simplejwt.serializers.TokenObtainSlidingSerializer",
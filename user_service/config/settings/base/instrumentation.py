@@ -0,0 +1,17 @@
+import os
+
+
+# Per-request instrumentation (see users/instrumentation.py)
+INSTRUMENTATION = {
+    "ENABLED": os.environ.get("INSTRUMENTATION_ENABLED", "1") == "1",  # Installs the SQL execute wrapper
+    "SERVER_TIMING": os.environ.get("SERVER_TIMING", "1") == "1",  # Server-Timing header on every response
+    "DUPLICATE_QUERY_THRESHOLD": int(os.environ.get("DUPLICATE_QUERY_THRESHOLD", 5)),  # Repeats flagged as N+1
+    "METRICS_ENDPOINT": os.environ.get("METRICS_ENDPOINT", "1") == "1",  # Prometheus scrape endpoint at /metrics
+    # Client networks /metrics answers; behind a proxy REMOTE_ADDR must be the forwarded client address
+    "METRICS_ALLOWED_NETWORKS": [
+        network.strip()
+        for network in os.environ.get("METRICS_ALLOWED_NETWORKS", "127.0.0.0/8,::1/128").split(",")
+        if network.strip()
+    ],
+    "METRICS_TOKEN": os.environ.get("METRICS_TOKEN", ""),  # Bearer token that also grants /metrics, empty for none
+}
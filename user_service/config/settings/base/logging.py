@@ -1,7 +1,18 @@
+import os
+
 from .basic import BASE_DIR
 
 
 # Logging settings
+# LOG_ASYNC=1 hands records to a listener thread (config/log.py), so disk I/O never runs on the
+# request thread; LOG_FORMAT=json writes structured lines; loggers in LOG_SAMPLED_LOGGERS keep a
+# LOG_SAMPLE_RATE fraction of their records below WARNING.
+LOG_ASYNC = os.environ.get("LOG_ASYNC", "1") == "1"
+LOG_QUEUE_SIZE = int(os.environ.get("LOG_QUEUE_SIZE", 10000))
+LOG_FORMAT = os.environ.get("LOG_FORMAT", "text")
+LOG_SAMPLE_RATE = float(os.environ.get("LOG_SAMPLE_RATE", 0.1))
+LOG_SAMPLED_LOGGERS = tuple(filter(None, os.environ.get("LOG_SAMPLED_LOGGERS", "django.db.backends").split(",")))
+
 FORMATTERS = (
     {
         "verbose": {
@@ -12,45 +23,91 @@ FORMATTERS = (
             "format": "[{levelname}] {asctime:s} {module} {filename} {lineno:d} {funcName} {message}",
             "style": "{",
         },
+        "json": {
+            "()": "config.log.JsonFormatter",
+        },
     },
 )
 
+FILTERS = {
+    "sampled": {
+        "()": "config.log.SamplingFilter",
+        "rate": LOG_SAMPLE_RATE,
+    },
+}
+
 HANDLERS = {
     "console_handler": {
         "class": "logging.StreamHandler",
-        "formatter": "simple",
+        "formatter": "json" if LOG_FORMAT == "json" else "simple",
     },
     "common_handler": {
         "class": "logging.handlers.RotatingFileHandler",
         "filename": f"{BASE_DIR}/logs/userservice.log",
         "mode": "a",
         "encoding": "utf-8",
-        "formatter": "simple",
+        "formatter": "json" if LOG_FORMAT == "json" else "simple",
         "backupCount": 5,
         "maxBytes": 1024 * 1024 * 5,  # 5 MB
+        "delay": True,  # Open the file on the first record, not at import
     },
     "detailed_handler": {
         "class": "logging.handlers.RotatingFileHandler",
         "filename": f"{BASE_DIR}/logs/userservice_detailed.log",
         "mode": "a",
-        "formatter": "verbose",
+        "formatter": "json" if LOG_FORMAT == "json" else "verbose",
+        "backupCount": 5,
+        "maxBytes": 1024 * 1024 * 5,  # 5 MB
+        "delay": True,
+    },
+    # One line per audited change (users/tasks.py:record_audit_events), kept apart from the service logs
+    "audit_handler": {
+        "class": "logging.handlers.RotatingFileHandler",
+        "filename": f"{BASE_DIR}/logs/userservice_audit.log",
+        "mode": "a",
+        "encoding": "utf-8",
+        "formatter": "json" if LOG_FORMAT == "json" else "simple",
         "backupCount": 5,
         "maxBytes": 1024 * 1024 * 5,  # 5 MB
+        "delay": True,
+    },
+    # Bounded queues drained by one listener thread each; full queues drop and count records.
+    # Their names must sort after the handlers they feed (see config/log.py)
+    "django_queue_handler": {
+        "()": "config.log.BoundedQueueHandler",
+        "handlers": ["cfg://handlers.console_handler", "cfg://handlers.detailed_handler"],
+        "maxsize": LOG_QUEUE_SIZE,
+    },
+    "request_queue_handler": {
+        "()": "config.log.BoundedQueueHandler",
+        "handlers": ["cfg://handlers.common_handler"],
+        "maxsize": LOG_QUEUE_SIZE,
+    },
+    "audit_queue_handler": {
+        "()": "config.log.BoundedQueueHandler",
+        "handlers": ["cfg://handlers.audit_handler"],
+        "maxsize": LOG_QUEUE_SIZE,
     },
 }
 
 LOGGERS = (
     {
         "django": {
-            "handlers": ["console_handler", "detailed_handler"],
+            "handlers": ["django_queue_handler"] if LOG_ASYNC else ["console_handler", "detailed_handler"],
             "level": "INFO",
             "propagate": False,
         },
         "django.request": {
-            "handlers": ["common_handler"],
+            "handlers": ["request_queue_handler"] if LOG_ASYNC else ["common_handler"],
             "level": "WARNING",
             "propagate": False,
         },
+        "users.audit": {
+            "handlers": ["audit_queue_handler"] if LOG_ASYNC else ["audit_handler"],
+            "level": "INFO",
+            "propagate": False,
+        },
+        **{name: {"filters": ["sampled"]} for name in LOG_SAMPLED_LOGGERS},
     },
 )
 
@@ -58,6 +115,7 @@ LOGGING = {
     "version": 1,
     "disable_existing_loggers": False,
     "formatters": FORMATTERS[0],
+    "filters": FILTERS,
     "handlers": HANDLERS,
     "loggers": LOGGERS[0],
 }
@@ -0,0 +1,14 @@
+import os
+
+
+# Transactional outbox of user lifecycle events (see users/outbox.py).
+# The relay publishes to one Redis stream per partition, "<STREAM_PREFIX>.<partition>";
+# every event of one user lands in the same stream, in order.
+OUTBOX = {
+    "BROKER_URL": os.environ.get("OUTBOX_BROKER_URL", os.environ.get("REDIS_URL", "redis://localhost:6379/0")),
+    "STREAM_PREFIX": os.environ.get("OUTBOX_STREAM_PREFIX", "users.events"),
+    "PARTITIONS": 16,  # Changing it reorders events of users in flight; drain the outbox first
+    "BATCH_SIZE": int(os.environ.get("OUTBOX_BATCH_SIZE", 500)),  # Events published per round trip
+    "FLUSH_INTERVAL": float(os.environ.get("OUTBOX_FLUSH_INTERVAL", 1.0)),  # Seconds to wait when idle
+    "STREAM_MAXLEN": int(os.environ.get("OUTBOX_STREAM_MAXLEN", 1_000_000)),  # Approximate cap per stream
+}
@@ -0,0 +1,71 @@
+from django.core.exceptions import ImproperlyConfigured
+
+
+PROFILES = ("full", "api", "worker")
+
+# Only the admin and browser sessions need these
+BROWSER_APPS = (
+    "django.contrib.admin",
+    "django.contrib.sessions",
+    "django.contrib.messages",
+    "django.contrib.staticfiles",
+)
+BROWSER_MIDDLEWARE = (
+    "django.contrib.sessions.middleware.SessionMiddleware",
+    "django.middleware.csrf.CsrfViewMiddleware",
+    "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "django.contrib.messages.middleware.MessageMiddleware",
+    "django.middleware.clickjacking.XFrameOptionsMiddleware",
+)
+BROWSER_CONTEXT_PROCESSORS = (
+    "django.contrib.auth.context_processors.auth",
+    "django.contrib.messages.context_processors.messages",
+)
+BROWSER_REST_FRAMEWORK = {
+    "DEFAULT_RENDERER_CLASSES": "rest_framework.renderers.BrowsableAPIRenderer",
+    "DEFAULT_AUTHENTICATION_CLASSES": "rest_framework.authentication.SessionAuthentication",
+}
+# Celery workers and the outbox relay serve no HTTP
+API_APPS = ("rest_framework", "rest_framework_simplejwt")
+
+
+def without(values, dropped):
+    return [value for value in values if value not in dropped]
+
+
+def apply_profile(namespace, profile):
+    """
+    Slims the settings in `namespace` for one kind of process, so it imports and initializes
+    less at startup. "api" serves the JWT API only: no admin, sessions, messages, static files
+    or browsable API. "worker" also drops the DRF apps and all middleware. "full" keeps everything.
+    """
+    if profile not in PROFILES:
+        raise ImproperlyConfigured(f"DJANGO_SETTINGS_PROFILE is {profile!r} but must be one of {PROFILES}")
+    if profile == "full":
+        return
+
+    namespace["INSTALLED_APPS"] = without(namespace["INSTALLED_APPS"], BROWSER_APPS)
+    namespace["MIDDLEWARE"] = without(namespace["MIDDLEWARE"], BROWSER_MIDDLEWARE)
+    namespace["TEMPLATES"] = [
+        {
+            **template,
+            "OPTIONS": {
+                **template.get("OPTIONS", {}),
+                "context_processors": without(
+                    template.get("OPTIONS", {}).get("context_processors", []), BROWSER_CONTEXT_PROCESSORS
+                ),
+            },
+        }
+        for template in namespace["TEMPLATES"]
+    ]
+    namespace["REST_FRAMEWORK"] = {
+        **namespace["REST_FRAMEWORK"],
+        **{
+            name: without(namespace["REST_FRAMEWORK"][name], (dropped,))
+            for name, dropped in BROWSER_REST_FRAMEWORK.items()
+        },
+    }
+
+    if profile == "worker":
+        namespace["INSTALLED_APPS"] = without(namespace["INSTALLED_APPS"], API_APPS)
+        namespace["MIDDLEWARE"] = []
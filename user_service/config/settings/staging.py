@@ -13,6 +13,26 @@ DATABASES = {
         "HOST": "",
         "PORT": "",
     },
+    # SQLite stand-in for a read replica, tests opt in with override_settings(DATABASE_REPLICAS=["replica"])
+    "replica": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": ":memory:",
+        "TEST": {"MIRROR": "default"},
+    },
+}
+
+# Local-memory stand-in for Redis, so the cache layers can be tested offline
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "user-service-staging",
+    },
 }
 
 PASSWORD_HASHERS = ("django.contrib.auth.hashers.MD5PasswordHasher",)
+# Hash inline instead of spawning a process pool
+PASSWORD_HASHING = {"WORKERS": 0, "MAX_PENDING": None, "ACQUIRE_TIMEOUT": 2}
+
+# Tasks run inline on an in-memory broker, so tests need no worker or Redis
+CELERY_BROKER_URL = "memory://"
+CELERY_TASK_ALWAYS_EAGER = True
@@ -15,10 +15,24 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 
-from django.contrib import admin
-from django.urls import path
+from django.apps import apps
+from django.conf import settings
+from django.urls import include, path
+from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
+from users.instrumentation import metrics_view
 
 
 urlpatterns = [
-    path("admin/", admin.site.urls),
+    path("api/token/", TokenObtainPairView.as_view(), name="token_obtain_pair"),
+    path("api/token/refresh/", TokenRefreshView.as_view(), name="token_refresh"),
+    path("api/", include("users.urls")),
 ]
+
+if settings.INSTRUMENTATION["METRICS_ENDPOINT"]:
+    urlpatterns.append(path("metrics", metrics_view, name="metrics"))
+
+# The "api" and "worker" settings profiles leave the admin out
+if apps.is_installed("django.contrib.admin"):
+    from django.contrib import admin
+
+    urlpatterns.append(path("admin/", admin.site.urls))
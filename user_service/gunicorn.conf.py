@@ -0,0 +1,18 @@
+# ASGI server profile: gunicorn supervising uvicorn workers, each serving many concurrent
+# (slow) clients on one event loop instead of one thread per request.
+#   gunicorn config.asgi:application -c gunicorn.conf.py
+import multiprocessing
+import os
+
+
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:8000")
+worker_class = "uvicorn.workers.UvicornWorker"
+workers = int(os.environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+keepalive = int(os.environ.get("GUNICORN_KEEPALIVE", 5))
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 30))
+graceful_timeout = int(os.environ.get("GUNICORN_GRACEFUL_TIMEOUT", 30))
+# Recycle workers periodically, with jitter so they do not all restart at once
+max_requests = int(os.environ.get("GUNICORN_MAX_REQUESTS", 10000))
+max_requests_jitter = int(os.environ.get("GUNICORN_MAX_REQUESTS_JITTER", 1000))
+accesslog = "-"
+errorlog = "-"
@@ -0,0 +1,181 @@
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import Q, Value
+from django.db.models.functions import Concat, Substr
+from django.utils.functional import SimpleLazyObject
+
+from .cache import MISSING, LocalLRUCache, bump_generations, get_generation
+from .models import Account, BaseClient
+
+
+class AccountTreeError(ValueError):
+    """A missing parent, a move into the account's own subtree, or a tree deeper than Account.MAX_DEPTH."""
+
+
+def get_parent(parent_id, using=None):
+    """The parent account, locked until the transaction ends so a concurrent move cannot change its path."""
+    if parent_id is None:
+        return None
+    try:
+        return Account.objects.using(using).select_for_update().get(pk=parent_id)
+    except Account.DoesNotExist:
+        raise AccountTreeError(f"Parent account {parent_id} does not exist")
+
+
+def create_account(parent_id=None, account_id=None, using=None):
+    """Adds an account under parent_id, or a root account. An existing account id raises IntegrityError."""
+    with transaction.atomic(using=using):
+        parent = get_parent(parent_id, using)
+        if parent is not None and parent.depth >= Account.MAX_DEPTH:
+            raise AccountTreeError(f"Accounts nest at most {Account.MAX_DEPTH} levels deep")
+        account = Account(id=account_id or uuid.uuid4(), parent=parent)
+        account.path = (parent.path if parent else "") + account.id.hex
+        account.save(force_insert=True, using=using)
+        # Subtrees of the ancestors grew; the account's own members are unchanged
+        transaction.on_commit(lambda: account_membership.invalidate_subtrees(account.ancestor_ids), using=using)
+    return account
+
+
+def lock_subtree(account_id, parent_id, using=None):
+    """
+    Locks the account's subtree and the parent_id account in id order, so overlapping moves queue
+    up instead of deadlocking. Returns the locked accounts by id; raises Account.DoesNotExist.
+    """
+    manager = Account.objects.using(using)
+    path = manager.values_list("path", flat=True).get(pk=account_id)
+    while True:
+        accounts = Q(path__gte=path, path__lt=path + "g")
+        if parent_id is not None:
+            accounts |= Q(pk=parent_id)
+        locked = {account.pk: account for account in manager.select_for_update().filter(accounts).order_by("id")}
+        account = locked.get(account_id)
+        if account is not None and account.path == path:
+            return locked
+        # A concurrent move committed between the read and the lock: lock the account's new subtree
+        path = manager.values_list("path", flat=True).get(pk=account_id)
+
+
+def move_account(account_id, parent_id=None, using=None):
+    """Moves an account and its subtree under parent_id (None for a root) with one UPDATE of the paths."""
+    account_id = uuid.UUID(str(account_id))
+    parent_id = uuid.UUID(str(parent_id)) if parent_id is not None else None
+    with transaction.atomic(using=using):
+        locked = lock_subtree(account_id, parent_id, using)
+        account = locked[account_id]
+        if parent_id is not None and parent_id not in locked:
+            raise AccountTreeError(f"Parent account {parent_id} does not exist")
+        parent = locked.get(parent_id)
+        if parent is not None and parent.path.startswith(account.path):
+            raise AccountTreeError("An account cannot move into its own subtree")
+        old_path, old_ancestors = account.path, account.ancestor_ids
+        new_path = (parent.path if parent else "") + account.id.hex
+        deepest = max(len(other.path) for other in locked.values() if other.path.startswith(old_path))
+        if deepest - len(old_path) + len(new_path) > Account.ID_LENGTH * Account.MAX_DEPTH:
+            raise AccountTreeError(f"Accounts nest at most {Account.MAX_DEPTH} levels deep")
+
+        account.subtree().update(path=Concat(Value(new_path), Substr("path", len(old_path) + 1)))
+        Account.objects.using(using).filter(pk=account.pk).update(parent=parent)
+        account.parent, account.path = parent, new_path
+        # Subtrees inside the moved one keep their members, those of the old and new ancestors change
+        affected = old_ancestors + account.ancestor_ids
+        transaction.on_commit(lambda: account_membership.invalidate_subtrees(affected), using=using)
+    return account
+
+
+def in_subtree(root_id, account_ids, using=None):
+    """Whether every account is root_id or one of its descendants, read from the primary (not the caches)."""
+    root_id = uuid.UUID(str(root_id))
+    account_ids = {uuid.UUID(str(account_id)) for account_id in account_ids} - {root_id}
+    if not account_ids:
+        return True
+    try:
+        root = Account.objects.using(using or DEFAULT_DB_ALIAS).get(pk=root_id)
+    except Account.DoesNotExist:
+        return False
+    return root.subtree().filter(pk__in=account_ids).count() == len(account_ids)
+
+
+class AccountMembership:
+    """
+    Answers "which clients belong to this account and its subaccounts": the clients whose
+    account_id or subaccount_id is in the account's subtree.
+
+    Only the subtree ids are cached, in a short-lived in-process LRU in front of the shared cache;
+    hierarchy changes drop them. Member sets are unbounded, so they are never cached or loaded
+    whole: members() is a queryset to page through and is_member() a primary key lookup.
+    """
+
+    def __init__(self, cache_alias="default", version=1, timeout=300, local_maxsize=256, local_timeout=5):
+        self.cache_alias = cache_alias
+        self.version = version
+        self.timeout = timeout
+        self.local = LocalLRUCache(local_maxsize, local_timeout)
+
+    @property
+    def shared(self):
+        return caches[self.cache_alias]
+
+    def make_key(self, kind, account_id):
+        return f"accounts:v{self.version}:{kind}:{uuid.UUID(str(account_id))}"
+
+    def subtree_ids(self, account_id):
+        """The account and its descendants; an id without an Account row is a leaf."""
+        key = self.make_key("subtree", account_id)
+        ids = self._get(key)
+        if ids is MISSING:
+            generation = get_generation(self.shared, key)
+            try:
+                account = Account.objects.using(DEFAULT_DB_ALIAS).get(pk=account_id)
+                ids = list(account.subtree().values_list("id", flat=True))
+            except Account.DoesNotExist:
+                ids = [uuid.UUID(str(account_id))]
+            self._set(key, ids)
+            if get_generation(self.shared, key) != generation:
+                # A hierarchy change committed while loading; its invalidation may have run before _set()
+                self._delete([key])
+        return ids
+
+    def members(self, account_id, queryset=None):
+        """The clients of the account and all its subaccounts, served by the account_id and subaccount_id indexes."""
+        if queryset is None:
+            queryset = BaseClient._base_manager.all()
+        account_ids = self.subtree_ids(account_id)
+        return queryset.filter(Q(account_id__in=account_ids) | Q(subaccount_id__in=account_ids))
+
+    def is_member(self, account_id, client_id):
+        """One primary key lookup, whatever the size of the account."""
+        return self.members(account_id).filter(pk=client_id).exists()
+
+    def invalidate_subtrees(self, account_ids):
+        keys = [self.make_key("subtree", account_id) for account_id in account_ids]
+        if not keys:
+            return
+        bump_generations(self.shared, keys, self.timeout)
+        self._delete(keys)
+
+    def _get(self, key):
+        value = self.local.get(key)
+        if value is MISSING:
+            value = self.shared.get(key, MISSING)
+            if value is not MISSING:
+                self.local.set(key, value)
+        return value
+
+    def _set(self, key, value):
+        self.shared.set(key, value, self.timeout)
+        self.local.set(key, value)
+
+    def _delete(self, keys):
+        self.shared.delete_many(keys)
+        for key in keys:
+            self.local.delete(key)
+
+
+def _build_account_membership():
+    return AccountMembership(**{name.lower(): value for name, value in settings.ACCOUNT_MEMBERS.items()})
+
+
+account_membership = SimpleLazyObject(_build_account_membership)
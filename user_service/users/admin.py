@@ -1,6 +1,61 @@
 from django.contrib import admin
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
 
 from .models import AccountOwner, AccountUser, Admin, BaseUser, Staff
+from .pagination import estimated_count
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Uses the planner's row estimate instead of COUNT(*) once a changelist is past
+    `exact_count_threshold` rows. Page numbers near the end are then approximate.
+    """
+
+    exact_count_threshold = 10_000
+
+    @cached_property
+    def count(self):
+        estimate = estimated_count(self.object_list)
+        if estimate is None or estimate < self.exact_count_threshold:
+            return super().count
+        return estimate
+
+
+def prefix_q(field, term):
+    """A range over the field's B-tree index for values starting with term, as typed or lowercased."""
+    q = Q()
+    for prefix in {term, term.lower()}:
+        q |= Q(**{f"{field}__gte": prefix, f"{field}__lt": prefix + "\U0010ffff"})
+    return q
+
+
+class FastAdminMixin:
+    """
+    Changelists that stay fast on millions of rows: no unfiltered COUNT(*), estimated counts,
+    static date filters and ordering served by the (role, date_joined) indexes, and search
+    backed by an index. On PostgreSQL the substring search uses the pg_trgm indexes of
+    migration 0006; terms shorter than a trigram, and other databases, search email prefixes.
+    """
+
+    list_display = ("id", "email", "first_name", "last_name", "date_joined", "role")
+    search_fields = ("email", "first_name", "last_name")
+    # The role is fixed by each proxy's manager, so only the date filter narrows the list
+    list_filter = ("date_joined",)
+    ordering = ("-date_joined",)
+    show_full_result_count = False
+    paginator = EstimatedCountPaginator
+    trigram_min_length = 3
+
+    def get_search_results(self, request, queryset, search_term):
+        search_term = search_term.strip()
+        if not search_term:
+            return queryset, False
+        if connections[queryset.db].vendor == "postgresql" and len(search_term) >= self.trigram_min_length:
+            return super().get_search_results(request, queryset, search_term)
+        return queryset.filter(prefix_q("email", search_term)), False
 
 
 # @admin.register(BaseUser)
@@ -12,28 +67,20 @@ from .models import AccountOwner, AccountUser, Admin, BaseUser, Staff
 
 
 @admin.register(Admin)
-class AdminAdmin(admin.ModelAdmin):
-    list_display = ("id", "email", "first_name", "last_name", "date_joined", "role")
-    search_fields = ("email", "first_name", "last_name")
-    list_filter = ("date_joined", "role")
+class AdminAdmin(FastAdminMixin, admin.ModelAdmin):
+    pass
 
 
 @admin.register(Staff)
-class StaffAdmin(admin.ModelAdmin):
-    list_display = ("id", "email", "first_name", "last_name", "date_joined", "role")
-    search_fields = ("email", "first_name", "last_name")
-    list_filter = ("date_joined", "role")
+class StaffAdmin(FastAdminMixin, admin.ModelAdmin):
+    pass
 
 
 @admin.register(AccountOwner)
-class AccountOwnerAdmin(admin.ModelAdmin):
-    list_display = ("id", "email", "first_name", "last_name", "date_joined", "role")
-    search_fields = ("email", "first_name", "last_name")
-    list_filter = ("date_joined", "role")
+class AccountOwnerAdmin(FastAdminMixin, admin.ModelAdmin):
+    pass
 
 
 @admin.register(AccountUser)
-class AccountUserAdmin(admin.ModelAdmin):
-    list_display = ("id", "email", "first_name", "last_name", "date_joined", "role")
-    search_fields = ("email", "first_name", "last_name")
-    list_filter = ("date_joined", "role")
+class AccountUserAdmin(FastAdminMixin, admin.ModelAdmin):
+    pass
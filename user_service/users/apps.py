@@ -6,4 +6,6 @@ class UsersConfig(AppConfig):
     name = "users"
 
     def ready(self):
+        import users.instrumentation
+        import users.lookups
         import users.signals
@@ -0,0 +1,168 @@
+import math
+
+from django.core.exceptions import ValidationError
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from .cache import user_cache
+from .models import BaseClient, BaseUser
+
+
+ROLE_CLAIM = "role"
+ACCOUNT_ID_CLAIM = "account_id"
+
+
+def revocation_key(user_id):
+    return f"users:revoked:{user_id}"
+
+
+def revoke_user_tokens(user_id, using=None, model=BaseUser):
+    """
+    Marks every token of the user (or client, with model=BaseClient) issued until now as stale.
+    The time is stored on the row, in the caller's transaction; the cache only mirrors it once
+    that commits, so an evicted or per-process cache entry cannot make a revoked token valid again.
+    """
+    revoked_at = timezone.now()
+    model._base_manager.using(using).filter(pk=user_id).update(tokens_revoked_at=revoked_at)
+    transaction.on_commit(
+        lambda: user_cache.shared.set(revocation_key(user_id), revoked_at.timestamp(), user_cache.timeout),
+        using=using,
+    )
+    return revoked_at
+
+
+def prime_revocation(user):
+    """Caches the revocation time of a user already loaded, e.g. while issuing its tokens."""
+    revoked_at = getattr(user, "tokens_revoked_at", None)
+    revoked_at = revoked_at.timestamp() if revoked_at else 0
+    # add() never replaces the marker of a revocation that committed meanwhile
+    user_cache.shared.add(revocation_key(user.pk), revoked_at, user_cache.timeout)
+
+
+def load_revoked_at(user_id):
+    try:
+        for model in (BaseUser, BaseClient):
+            rows = list(
+                model._base_manager.using(DEFAULT_DB_ALIAS)
+                .filter(pk=user_id)
+                .values_list("tokens_revoked_at", flat=True)
+            )
+            if rows:
+                return rows[0].timestamp() if rows[0] else 0
+    except ValidationError:
+        pass
+    # Every token of a deleted (or never existing) principal is stale
+    return math.inf
+
+
+def get_revoked_at(user_id):
+    """
+    Epoch seconds of the user's or client's last revocation, 0 if none, infinity for unknown ids.
+    Read through the shared cache from the user or client row.
+    """
+    key = revocation_key(user_id)
+    revoked_at = user_cache.shared.get(key)
+    if revoked_at is None:
+        revoked_at = load_revoked_at(user_id)
+        user_cache.shared.add(key, revoked_at, user_cache.timeout)
+    return revoked_at
+
+
+def is_token_revoked(validated_token):
+    return validated_token.get("iat", 0) <= get_revoked_at(validated_token[api_settings.USER_ID_CLAIM])
+
+
+class ClaimsUser:
+    """Lightweight request user built from the claims signed into an access token."""
+
+    __slots__ = ("id", "role", "account_id", "token")
+
+    is_active = True
+    is_authenticated = True
+    is_anonymous = False
+    is_staff = False
+    is_superuser = False
+
+    def __init__(self, token):
+        self.id = token[api_settings.USER_ID_CLAIM]
+        self.role = token.get(ROLE_CLAIM)
+        self.account_id = token.get(ACCOUNT_ID_CLAIM)
+        self.token = token
+
+    def __str__(self):
+        return f"{self.id}"
+
+    def __eq__(self, other):
+        return isinstance(other, ClaimsUser) and self.id == other.id
+
+    def __hash__(self):
+        return hash(self.id)
+
+    @property
+    def pk(self):
+        return self.id
+
+    @property
+    def is_admin(self):
+        return self.role == BaseUser.Role.ADMIN
+
+    @property
+    def is_staff_user(self):
+        return self.role == BaseUser.Role.STAFF
+
+    def get_username(self):
+        return self.id
+
+    def has_perm(self, perm, obj=None):
+        return False
+
+    def has_perms(self, perm_list, obj=None):
+        return False
+
+    def has_module_perms(self, module):
+        return False
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication that resolves the token's user through the read-through user cache."""
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        try:
+            user = user_cache.get_by_id(self.user_model, user_id)
+        except (self.user_model.DoesNotExist, ValidationError):
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+        if not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+
+        return user
+
+
+class ClaimsJWTAuthentication(CachedJWTAuthentication):
+    """
+    Trusts the user claims signed into the token and returns a TOKEN_USER_CLASS instance; the
+    database is only read when the user's revocation time is not cached. Only tokens issued before
+    the user's last deactivation, role or password change (or tokens without claims) fall back to
+    loading the user.
+    """
+
+    def get_user(self, validated_token):
+        if api_settings.USER_ID_CLAIM not in validated_token:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+        if ROLE_CLAIM not in validated_token or is_token_revoked(validated_token):
+            return super().get_user(validated_token)
+        return api_settings.TOKEN_USER_CLASS(validated_token)
@@ -0,0 +1,78 @@
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+
+from django.core.signals import request_finished, request_started
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.backends.signals import connection_created
+from users.models import BaseUser
+
+
+@dataclass
+class ConnectionBenchmarkResult:
+    mode: str
+    requests: int
+    seconds: float
+    connections_opened: int
+
+    @property
+    def requests_per_second(self):
+        return self.requests / self.seconds if self.seconds else 0.0
+
+
+def primary_key_lookup(using=DEFAULT_DB_ALIAS):
+    """The cheapest request we serve: one indexed lookup by primary key."""
+    BaseUser.objects.using(using).filter(pk=uuid.uuid4()).exists()
+
+
+def simulate_requests(count, lookup, using):
+    """Runs lookups wrapped in the request signals that open and recycle connections."""
+    for _ in range(count):
+        request_started.send(sender=None)
+        try:
+            lookup(using)
+        finally:
+            request_finished.send(sender=None)
+    connections[using].close()
+
+
+def run(mode, requests=1000, threads=1, lookup=primary_key_lookup, using=DEFAULT_DB_ALIAS):
+    """
+    Measures requests/sec with connection reuse "on" (persistent, health-checked connections)
+    or "off" (a new connection per request), counting the connections opened along the way.
+    """
+    settings_dict = connections.settings[using]
+    saved = {name: settings_dict.get(name) for name in ("CONN_MAX_AGE", "CONN_HEALTH_CHECKS")}
+    settings_dict["CONN_MAX_AGE"] = None if mode == "on" else 0
+    settings_dict["CONN_HEALTH_CHECKS"] = mode == "on"
+
+    opened, lock = [0], threading.Lock()
+
+    def count_connection(sender, connection, **kwargs):
+        if connection.alias == using:
+            with lock:
+                opened[0] += 1
+
+    connection_created.connect(count_connection, weak=False)
+    connections[using].close()
+    started = time.perf_counter()
+    try:
+        per_thread = [requests // threads + (i < requests % threads) for i in range(threads)]
+        if threads == 1:
+            simulate_requests(requests, lookup, using)
+        else:
+            workers = [threading.Thread(target=simulate_requests, args=(n, lookup, using)) for n in per_thread]
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+        seconds = time.perf_counter() - started
+    finally:
+        connection_created.disconnect(count_connection)
+        settings_dict.update(saved)
+    return ConnectionBenchmarkResult(mode, requests, seconds, opened[0])
+
+
+def compare(requests=1000, threads=1, lookup=primary_key_lookup, using=DEFAULT_DB_ALIAS):
+    return [run(mode, requests, threads, lookup, using) for mode in ("off", "on")]
@@ -0,0 +1,82 @@
+import os
+import re
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+
+
+# "import time:       549 |       1453 |   django.conf", nesting shown by two spaces per level
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+
+@dataclass
+class ImportRecord:
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+    @property
+    def package(self):
+        return self.module.split(".")[0]
+
+
+@dataclass
+class StartupProfile:
+    wall_seconds: float
+    records: list
+
+    @property
+    def import_seconds(self):
+        return sum(record.self_us for record in self.records) / 1_000_000
+
+    def slowest(self, top=20):
+        """The slowest modules imported directly by the profiled code, by cumulative time."""
+        roots = [record for record in self.records if record.depth == 0]
+        return sorted(roots, key=lambda record: record.cumulative_us, reverse=True)[:top]
+
+    def by_package(self, top=20):
+        """Own import time summed per top-level package, slowest first."""
+        totals = defaultdict(int)
+        for record in self.records:
+            totals[record.package] += record.self_us
+        return sorted(totals.items(), key=lambda item: item[1], reverse=True)[:top]
+
+
+def parse_importtime(output):
+    records = []
+    for line in output.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            records.append(ImportRecord(module, int(self_us), int(cumulative_us), (len(indent) - 1) // 2))
+    return records
+
+
+def startup_code(targets):
+    return "; ".join(["import django", "django.setup()", *(f"import {target}" for target in targets)])
+
+
+def profile_startup(targets=(), profile=None, settings_module=None):
+    """
+    Starts a fresh interpreter with `-X importtime` that sets Django up and imports `targets`,
+    and returns its wall time and per-module import times.
+    """
+    env = dict(os.environ)
+    if profile:
+        env["DJANGO_SETTINGS_PROFILE"] = profile
+    if settings_module:
+        env["DJANGO_SETTINGS_MODULE"] = settings_module
+    started = time.perf_counter()
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", startup_code(targets)],
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    wall_seconds = time.perf_counter() - started
+    if process.returncode:
+        raise RuntimeError(f"Startup failed: {process.stderr.strip().splitlines()[-1:]}")
+    return StartupProfile(wall_seconds, parse_importtime(process.stderr))
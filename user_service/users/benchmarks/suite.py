@@ -0,0 +1,274 @@
+import itertools
+import json
+import platform
+import random
+import statistics
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+
+import django
+from celery_app import app as celery_app
+from django.contrib.auth.hashers import make_password
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models.signals import post_save
+from django.test import RequestFactory
+from django.utils import timezone
+from users.authentication import ClaimsJWTAuthentication
+from users.models import AccountOwner, AccountUser, BaseClient, BaseUser
+from users.search import search_clients
+from users.serializers import UserClaimsTokenObtainPairSerializer
+
+
+ACCOUNTS = 100  # Seeded clients are spread over this many accounts
+PAGE_SIZE = 50
+WARMUP = 5  # Untimed calls before each benchmark
+PASSWORD = "benchmark-password"
+
+
+@dataclass
+class BenchmarkResult:
+    name: str
+    ops: int
+    seconds: float
+    latencies_ms: list = field(default_factory=list, repr=False)
+    params: dict = field(default_factory=dict)
+
+    @property
+    def key(self):
+        """Identifies the same measurement across runs, e.g. "list_account_users[rows=10000]"."""
+        params = ",".join(f"{name}={value}" for name, value in sorted(self.params.items()))
+        return f"{self.name}[{params}]" if params else self.name
+
+    @property
+    def ops_per_second(self):
+        return self.ops / self.seconds if self.seconds else 0.0
+
+    def percentile(self, percent):
+        if len(self.latencies_ms) < 2:
+            return self.latencies_ms[0] if self.latencies_ms else 0.0
+        return statistics.quantiles(self.latencies_ms, n=100, method="inclusive")[percent - 1]
+
+    def to_dict(self):
+        return {
+            "key": self.key,
+            "name": self.name,
+            "params": self.params,
+            "ops": self.ops,
+            "seconds": round(self.seconds, 6),
+            "ops_per_second": round(self.ops_per_second, 2),
+            "p50_ms": round(self.percentile(50), 4),
+            "p95_ms": round(self.percentile(95), 4),
+        }
+
+
+def measure(name, operation, ops, warmup=WARMUP, **params):
+    """Calls operation(i) for i in range(ops), timing each call after `warmup` untimed calls."""
+    for i in range(ops, ops + warmup):
+        operation(i)
+    latencies = []
+    started = time.perf_counter()
+    for i in range(ops):
+        call_started = time.perf_counter()
+        operation(i)
+        latencies.append((time.perf_counter() - call_started) * 1000)
+    return BenchmarkResult(name, ops, time.perf_counter() - started, latencies, params)
+
+
+def account_id(index):
+    return uuid.UUID(int=index % ACCOUNTS + 1)
+
+
+def client_fields(index, prefix="bench"):
+    return {
+        "first_name": "Bench",
+        "last_name": f"Client {index}",
+        "email": f"{prefix}{index}@example.com",
+        "phone_number": f"{index:012d}" if prefix == "bench" else f"9{index:011d}",
+        "company_name": "Benchmark Corp",
+        "country": "Wonderland",
+        "city": "Load City",
+        "domain": f"{prefix}{index}.example.com",
+        "account_id": account_id(index),
+        "subaccount_id": account_id(index),
+    }
+
+
+def seed_clients(rows, using=DEFAULT_DB_ALIAS, batch_size=5000):
+    """Grows the client table to `rows` rows (one owner per ten users) with bulk inserts."""
+    password = make_password(PASSWORD)
+    manager = BaseClient._base_manager.db_manager(using)
+    existing = manager.filter(email__startswith="bench", company_name="Benchmark Corp").count()
+    now = timezone.now()
+    for start in range(existing, rows, batch_size):
+        manager.bulk_create(
+            [
+                BaseClient(
+                    role=BaseClient.Role.ACCOUNT_OWNER if i % 10 == 0 else BaseClient.Role.ACCOUNT_USER,
+                    password=password,
+                    is_active=True,
+                    date_joined=now - timezone.timedelta(seconds=i),
+                    **client_fields(i),
+                )
+                for i in range(start, min(start + batch_size, rows))
+            ],
+            batch_size=batch_size,
+        )
+
+
+@contextmanager
+def offline_broker():
+    """Publishes the post-create tasks to an in-memory broker, so creates run without Redis or workers."""
+    saved = celery_app.conf.broker_url, celery_app.conf.task_always_eager
+    celery_app.conf.broker_url, celery_app.conf.task_always_eager = "memory://", False
+    try:
+        yield
+    finally:
+        celery_app.conf.broker_url, celery_app.conf.task_always_eager = saved
+
+
+def bench_create(ops, using=DEFAULT_DB_ALIAS):
+    indexes = itertools.count(random.randrange(10**9))
+    with offline_broker():
+        yield measure(
+            "create_client",
+            lambda i: BaseClient.objects.db_manager(using).create_client(
+                password=PASSWORD, **client_fields(next(indexes), prefix="create")
+            ),
+            ops,
+        )
+        yield measure(
+            "create_account_user",
+            lambda i: AccountUser.objects.db_manager(using).create_account_user(
+                password=PASSWORD, **client_fields(next(indexes), prefix="create")
+            ),
+            ops,
+        )
+
+
+def bench_listing(ops, rows, using=DEFAULT_DB_ALIAS):
+    ordering = ("-date_joined", "-id")
+    yield measure(
+        "list_account_owners",
+        lambda i: list(AccountOwner.objects.using(using).order_by(*ordering)[:PAGE_SIZE]),
+        ops,
+        rows=rows,
+    )
+    yield measure(
+        "list_account_users",
+        lambda i: list(AccountUser.objects.using(using).for_account(account_id(i)).order_by(*ordering)[:PAGE_SIZE]),
+        ops,
+        rows=rows,
+    )
+
+
+def bench_lookups(ops, rows, using=DEFAULT_DB_ALIAS):
+    manager = BaseClient.objects.using(using)
+    indexes = [random.randrange(rows) for _ in range(ops + WARMUP)]
+    yield measure("lookup_email", lambda i: manager.get(email=f"bench{indexes[i]}@example.com"), ops, rows=rows)
+    yield measure("lookup_phone", lambda i: manager.get(phone_number=f"{indexes[i]:012d}"), ops, rows=rows)
+    yield measure("lookup_domain", lambda i: manager.get(domain=f"bench{indexes[i]}.example.com"), ops, rows=rows)
+
+
+def bench_search(ops, rows, using=DEFAULT_DB_ALIAS):
+    """First page of a client search; run with --sizes 1000000 to see the indexed path at scale."""
+    queryset = BaseClient.objects.using(using).all()
+    indexes = [random.randrange(rows) for _ in range(ops + WARMUP)]
+
+    def first_page(term):
+        return list(search_clients(term, queryset).order_by("-rank", "-id").values("id", "rank")[:PAGE_SIZE])
+
+    yield measure("search_clients", lambda i: first_page(f"Client {indexes[i]}"), ops, rows=rows)
+    # A transposition typo, matched by trigram similarity on PostgreSQL
+    yield measure("search_clients_typo", lambda i: first_page(f"bnech{indexes[i]}"), ops, rows=rows)
+
+
+def bench_authentication(ops, using=DEFAULT_DB_ALIAS):
+    email = f"bench-auth-{uuid.uuid4().hex}@example.com"
+    user = BaseUser.objects.db_manager(using).create_user(email, PASSWORD, role=BaseUser.Role.STAFF)
+    token = UserClaimsTokenObtainPairSerializer.get_token(user).access_token
+    request = RequestFactory().get("/api/users/", HTTP_AUTHORIZATION=f"Bearer {token}")
+    authentication = ClaimsJWTAuthentication()
+    yield measure("token_authentication", lambda i: authentication.authenticate(request), ops)
+
+    def login(i):
+        serializer = UserClaimsTokenObtainPairSerializer(data={"email": email, "password": PASSWORD})
+        serializer.is_valid(raise_exception=True)
+
+    # Dominated by the configured password hasher, so fewer rounds
+    yield measure("password_login", login, max(ops // 10, 1), warmup=1)
+
+
+def bench_signal_fanout(ops, using=DEFAULT_DB_ALIAS):
+    """The post_save receivers of a created client, inside a transaction that is rolled back."""
+    instance = BaseClient.objects.using(using).first()
+    receivers = len(post_save.receivers)
+
+    def send(i):
+        with transaction.atomic(using=using):
+            post_save.send(sender=BaseClient, instance=instance, created=True, using=using)
+            transaction.set_rollback(True, using=using)
+
+    yield measure("signal_fanout", send, ops, receivers=receivers)
+
+
+def run_suite(sizes=(10_000,), ops=200, using=DEFAULT_DB_ALIAS):
+    """Runs every benchmark, the size-dependent ones once per table size."""
+    results = []
+    results += bench_create(ops, using)
+    results += bench_authentication(ops, using)
+    for rows in sorted(sizes):
+        seed_clients(rows, using)
+        results += bench_listing(ops, rows, using)
+        results += bench_lookups(ops, rows, using)
+        results += bench_search(ops, rows, using)
+    results += bench_signal_fanout(ops, using)
+    return results
+
+
+def report(results, using=DEFAULT_DB_ALIAS):
+    return {
+        "meta": {
+            "created_at": timezone.now().isoformat(),
+            "vendor": connections[using].vendor,
+            "python": platform.python_version(),
+            "django": django.get_version(),
+        },
+        "results": [result.to_dict() for result in results],
+    }
+
+
+def write_report(results, path, using=DEFAULT_DB_ALIAS):
+    with open(path, "w", encoding="utf-8") as stream:
+        json.dump(report(results, using), stream, indent=2)
+
+
+@dataclass
+class Comparison:
+    key: str
+    baseline: float
+    current: float
+    threshold: float
+
+    @property
+    def change(self):
+        """Relative throughput change, negative when slower."""
+        return self.current / self.baseline - 1 if self.baseline else 0.0
+
+    @property
+    def regressed(self):
+        return self.change < -self.threshold
+
+    def to_dict(self):
+        return {**asdict(self), "change": round(self.change, 4), "regressed": self.regressed}
+
+
+def compare_to_baseline(results, baseline, threshold=0.2):
+    """Compares ops/s of the results with a stored report; a drop beyond `threshold` is a regression."""
+    previous = {entry["key"]: entry["ops_per_second"] for entry in baseline["results"]}
+    return [
+        Comparison(result.key, previous[result.key], result.ops_per_second, threshold)
+        for result in results
+        if result.key in previous
+    ]
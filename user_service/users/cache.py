@@ -0,0 +1,207 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.functional import SimpleLazyObject
+
+
+MISSING = object()
+
+
+def generation_key(key):
+    return f"{key}:gen"
+
+
+def get_generation(cache, key):
+    """The number of invalidations of `key` seen by the shared cache; read before loading it."""
+    return cache.get(generation_key(key), 0)
+
+
+def bump_generations(cache, keys, timeout):
+    """
+    Counts an invalidation of each key. A loader that read an older generation before it fetched
+    must not keep what it stored, the row it fetched may predate the invalidating write.
+    """
+    for key in keys:
+        gen_key = generation_key(key)
+        cache.add(gen_key, 0, timeout)
+        try:
+            cache.incr(gen_key)
+        except ValueError:
+            # Expired between add() and incr(); any value other than the one read before the fetch will do
+            cache.set(gen_key, 1, timeout)
+
+
+class LocalLRUCache:
+    """Thread-safe in-process LRU with a per-entry expiry, used in front of the shared cache."""
+
+    def __init__(self, maxsize=1024, timeout=5):
+        self.maxsize = maxsize
+        self.timeout = timeout
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=MISSING):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.timeout, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class UserCache:
+    """
+    Read-through cache for BaseUser/BaseClient lookups by id and by email.
+
+    Lookups go through a short-lived in-process LRU, then the shared (Redis) cache, then the
+    database. The id key holds the instance and the email key holds a pointer to the id, so a
+    save or delete only has to drop two keys. Only one process loads a missing key at a time;
+    the others wait for its result instead of stampeding the database. Invalidations bump a
+    per-key generation, and a load that raced one drops what it stored.
+    Misses load from the primary, so a lagging replica is never cached for `timeout` seconds.
+    Queryset.update() bypasses signals and therefore is not seen by the invalidation.
+    """
+
+    lock_poll_interval = 0.05
+
+    def __init__(
+        self, cache_alias="default", version=1, timeout=300, local_maxsize=1024, local_timeout=5, lock_timeout=5
+    ):
+        self.cache_alias = cache_alias
+        self.version = version
+        self.timeout = timeout
+        self.lock_timeout = lock_timeout
+        self.local = LocalLRUCache(local_maxsize, local_timeout)
+
+    @property
+    def shared(self):
+        return caches[self.cache_alias]
+
+    def make_key(self, model, field, value):
+        model = model._meta.concrete_model
+        if field == "id":
+            value = model._meta.pk.to_python(value)
+        return f"users:v{self.version}:{model._meta.model_name}:{field}:{value}"
+
+    def get_by_id(self, model, pk):
+        """Returns the user with the given primary key, raises model.DoesNotExist otherwise."""
+        model = model._meta.concrete_model
+        key = self.make_key(model, "id", pk)
+        user = self._get(key)
+        if user is MISSING:
+            user = self._load(
+                key, lambda: model._base_manager.using(DEFAULT_DB_ALIAS).get(pk=pk), resolve=lambda value: value
+            )
+        return user
+
+    def get_by_email(self, model, email):
+        """Returns the user with the given email, raises model.DoesNotExist otherwise."""
+        model = model._meta.concrete_model
+        key = self.make_key(model, "email", email)
+        pk = self._get(key)
+        if pk is not MISSING:
+            try:
+                user = self.get_by_id(model, pk)
+            except model.DoesNotExist:
+                user = None
+            if user is not None and user.email == email:
+                return user
+            # The pointer outlived an email change or a delete
+            self._delete([key])
+        return self._load(
+            key,
+            lambda: model._base_manager.using(DEFAULT_DB_ALIAS).get(email=email),
+            resolve=lambda value: self.get_by_id(model, value),
+        )
+
+    def invalidate(self, instance):
+        """Drops every cached entry of the given user."""
+        keys = [
+            self.make_key(type(instance), "id", instance.pk),
+            self.make_key(type(instance), "email", instance.email),
+        ]
+        bump_generations(self.shared, keys, self.timeout)
+        self._delete(keys)
+
+    def store(self, user):
+        id_key = self.make_key(type(user), "id", user.pk)
+        email_key = self.make_key(type(user), "email", user.email)
+        self.shared.set_many({id_key: user, email_key: user.pk}, self.timeout)
+        self.local.set(id_key, user)
+        self.local.set(email_key, user.pk)
+
+    def _get(self, key):
+        value = self.local.get(key)
+        if value is MISSING:
+            value = self.shared.get(key, MISSING)
+            if value is not MISSING:
+                self.local.set(key, value)
+        return value
+
+    def _delete(self, keys):
+        self.shared.delete_many(keys)
+        for key in keys:
+            self.local.delete(key)
+
+    def _load(self, key, fetch, resolve):
+        shared = self.shared
+        lock_key = f"{key}:lock"
+        if shared.add(lock_key, 1, self.lock_timeout):
+            try:
+                generation = get_generation(shared, key)
+                user = fetch()
+                self.store(user)
+                if get_generation(shared, key) != generation:
+                    # An invalidation committed after the fetch began and may have run before store()
+                    self._delete(
+                        [self.make_key(type(user), "id", user.pk), self.make_key(type(user), "email", user.email)]
+                    )
+                return user
+            finally:
+                shared.delete(lock_key)
+
+        # Another process is loading this key, wait for its result rather than querying as well
+        deadline = time.monotonic() + self.lock_timeout
+        while time.monotonic() < deadline:
+            time.sleep(self.lock_poll_interval)
+            value = self._get(key)
+            if value is not MISSING:
+                return resolve(value)
+            if shared.get(lock_key) is None:
+                break
+        return fetch()
+
+
+def _build_user_cache():
+    return UserCache(**{name.lower(): value for name, value in settings.USER_CACHE.items()})
+
+
+user_cache = SimpleLazyObject(_build_user_cache)
@@ -0,0 +1,147 @@
+import asyncio
+import contextvars
+import csv
+import json
+import threading
+from itertools import islice
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections
+
+from .models import BaseClient
+
+
+EXPORT_FIELDS = (
+    "id",
+    "email",
+    "first_name",
+    "last_name",
+    "phone_number",
+    "company_name",
+    "country",
+    "city",
+    "domain",
+    "account_id",
+    "subaccount_id",
+    "role",
+    "is_active",
+    "date_joined",
+)
+EXPORT_FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+class LineBuffer:
+    """File-like object for csv.writer that hands back each written line instead of storing it."""
+
+    def write(self, value):
+        return value
+
+
+class RowEncoder:
+    """Encodes exported value tuples as NDJSON or CSV lines."""
+
+    def __init__(self, fmt, fields=EXPORT_FIELDS):
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError(f"Unsupported export format: {fmt}")
+        self.fmt = fmt
+        self.fields = fields
+        self.content_type = EXPORT_FORMATS[fmt]
+        self.writer = csv.writer(LineBuffer())
+        self.encoder = DjangoJSONEncoder(separators=(",", ":"))
+
+    def header(self):
+        return self.writer.writerow(self.fields) if self.fmt == "csv" else ""
+
+    def encode(self, row):
+        if self.fmt == "csv":
+            return self.writer.writerow(row)
+        return self.encoder.encode(dict(zip(self.fields, row))) + "\n"
+
+
+def client_export_queryset(account_id, after=None, using=None, fields=EXPORT_FIELDS):
+    """
+    Returns the account's clients as value tuples ordered by id. The id order makes exports
+    resumable: pass the last exported id as `after` to continue where a stream was cut.
+    """
+    queryset = BaseClient.objects.using(using).for_account(account_id)
+    if after is not None:
+        queryset = queryset.filter(id__gt=after)
+    return queryset.order_by("id").values_list(*fields)
+
+
+def iter_rows(queryset, chunk_size=2000):
+    """
+    Yields the rows of an id-ordered values_list queryset (id first) chunk_size at a time.
+    Rows come from a server-side cursor, or from keyset queries on the id where server-side
+    cursors are disabled (PgBouncer transaction pooling) and iterator() would buffer everything.
+    """
+    if not connections[queryset.db].settings_dict.get("DISABLE_SERVER_SIDE_CURSORS"):
+        yield from queryset.iterator(chunk_size=chunk_size)
+        return
+    last_id = None
+    while True:
+        chunk = list((queryset if last_id is None else queryset.filter(id__gt=last_id))[:chunk_size])
+        yield from chunk
+        if len(chunk) < chunk_size:
+            return
+        last_id = chunk[-1][0]
+
+
+def export_lines(queryset, encoder, header=True, chunk_size=2000):
+    """Yields encoded lines while fetching rows chunk_size at a time."""
+    if header and encoder.header():
+        yield encoder.header()
+    for row in iter_rows(queryset, chunk_size):
+        yield encoder.encode(row)
+
+
+async def aexport_lines(queryset, encoder, header=True, chunk_size=2000, prefetch=2):
+    """
+    Async counterpart of export_lines yielding one joined body chunk per fetched chunk of rows.
+    The sync generator runs on a thread of its own, with its own database connection: on the
+    shared thread of thread-sensitive sync_to_async a long export would hold up every other ORM
+    call, and another request's close_old_connections() could close its server-side cursor.
+    The thread stays at most `prefetch` chunks ahead of the client.
+    """
+    loop = asyncio.get_running_loop()
+    chunks = asyncio.Queue(maxsize=prefetch)
+    stopped = threading.Event()
+
+    def put(item):
+        future = asyncio.run_coroutine_threadsafe(chunks.put(item), loop)
+        while not stopped.is_set():
+            try:
+                return future.result(timeout=1)
+            except TimeoutError:
+                pass
+        future.cancel()
+
+    def produce():
+        lines = export_lines(queryset, encoder, header=header, chunk_size=chunk_size)
+        try:
+            while not stopped.is_set():
+                chunk = "".join(islice(lines, chunk_size))
+                put(chunk)
+                if not chunk:
+                    break
+        except Exception as e:
+            if not stopped.is_set():
+                put(e)
+        finally:
+            lines.close()
+            # Connections are per thread, this only closes the export's own
+            connections.close_all()
+
+    # The context carries the replica routing scope of the request
+    context = contextvars.copy_context()
+    threading.Thread(target=context.run, args=(produce,), name="client-export", daemon=True).start()
+    try:
+        while chunk := await chunks.get():
+            if isinstance(chunk, Exception):
+                raise chunk
+            yield chunk
+    finally:
+        stopped.set()
+        # Unblocks a put() waiting for room, the thread then sees `stopped` and exits
+        while not chunks.empty():
+            chunks.get_nowait()
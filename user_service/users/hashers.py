@@ -0,0 +1,47 @@
+from django.conf import settings
+from django.contrib.auth.hashers import Argon2PasswordHasher, ScryptPasswordHasher
+
+
+class TunedArgon2PasswordHasher(Argon2PasswordHasher):
+    """
+    Argon2id with the cost parameters of settings.PASSWORD_HASHER_COSTS.
+    Stored hashes with other parameters are reported by must_update() and rehashed on login.
+    """
+
+    @property
+    def time_cost(self):
+        return settings.PASSWORD_HASHER_COSTS["ARGON2_TIME_COST"]
+
+    @property
+    def memory_cost(self):
+        return settings.PASSWORD_HASHER_COSTS["ARGON2_MEMORY_COST"]
+
+    @property
+    def parallelism(self):
+        return settings.PASSWORD_HASHER_COSTS["ARGON2_PARALLELISM"]
+
+
+class TunedScryptPasswordHasher(ScryptPasswordHasher):
+    """Scrypt with the cost parameters of settings.PASSWORD_HASHER_COSTS."""
+
+    @property
+    def work_factor(self):
+        return settings.PASSWORD_HASHER_COSTS["SCRYPT_WORK_FACTOR"]
+
+    @property
+    def block_size(self):
+        return settings.PASSWORD_HASHER_COSTS["SCRYPT_BLOCK_SIZE"]
+
+    @property
+    def parallelism(self):
+        return settings.PASSWORD_HASHER_COSTS["SCRYPT_PARALLELISM"]
+
+    @property
+    def maxmem(self):
+        # hashlib.scrypt refuses anything above 32 MiB unless told otherwise
+        return 2 * scrypt_memory(self.work_factor, self.block_size, self.parallelism)
+
+
+def scrypt_memory(work_factor, block_size, parallelism):
+    """Bytes of memory scrypt needs for the given parameters."""
+    return 128 * block_size * (work_factor + parallelism + 2)
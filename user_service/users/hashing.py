@@ -0,0 +1,223 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from itertools import islice
+
+import django
+from asgiref.sync import sync_to_async
+from django.apps import apps
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.utils.functional import SimpleLazyObject
+
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_TIMEOUT = object()
+
+
+class HashingPoolFull(RuntimeError):
+    """Raised when no hashing slot frees up within the acquire timeout."""
+
+
+def _init_worker():
+    if not apps.ready:
+        django.setup()
+
+
+def _hash_chunk(passwords):
+    return [make_password(password) for password in passwords]
+
+
+class HashMetrics:
+    """Counters for the hashing pool; latency covers queueing plus hashing."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.submitted = 0
+        self.completed = 0
+        self.rejected = 0
+        self.failed = 0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+
+    def started(self, count=1):
+        with self._lock:
+            self.pending += count
+            self.submitted += count
+
+    def finished(self, count, latency):
+        with self._lock:
+            self.pending -= count
+            self.completed += count
+            self.latency_total += latency
+            self.latency_max = max(self.latency_max, latency)
+
+    def reject(self):
+        with self._lock:
+            self.rejected += 1
+
+    def fail(self, count):
+        with self._lock:
+            self.pending -= count
+            self.failed += count
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "pending": self.pending,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "failed": self.failed,
+                "latency_avg": self.latency_total / self.completed if self.completed else 0.0,
+                "latency_max": self.latency_max,
+            }
+
+
+class PasswordHasherPool:
+    """
+    Runs make_password in a process pool so PBKDF2 never burns CPU on a request thread.
+
+    At most `max_pending` hash jobs are queued or running at once. Callers beyond that wait up to
+    `acquire_timeout` seconds for a slot and then get HashingPoolFull, so an overloaded service
+    sheds signups instead of growing an unbounded queue. Batches (hash_many) keep at most
+    `max_batch_pending` of those slots, leaving the rest to interactive callers. `workers=0` hashes inline.
+    The pool is started on first use, after any server fork, with the spawn start method, and
+    started again if a worker dies (BrokenProcessPool, e.g. after an OOM kill).
+    """
+
+    def __init__(self, workers=None, max_pending=None, acquire_timeout=2, max_batch_pending=None):
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+        self.max_pending = max_pending or max(self.workers, 1) * 4
+        self.max_batch_pending = max(1, min(max_batch_pending or self.max_pending // 2, self.max_pending))
+        self.acquire_timeout = acquire_timeout
+        self.metrics = HashMetrics()
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._batch_slots = threading.BoundedSemaphore(self.max_batch_pending)
+        self._executor = None
+        self._executor_lock = threading.Lock()
+
+    @property
+    def executor(self):
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=multiprocessing.get_context("spawn"),
+                        initializer=_init_worker,
+                    )
+        return self._executor
+
+    def _discard_executor(self, executor):
+        with self._executor_lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def _submit(self, passwords):
+        executor = self.executor
+        try:
+            future = executor.submit(_hash_chunk, passwords)
+        except BrokenProcessPool:
+            # A worker died since the last job; the next pool is a fresh one
+            self._discard_executor(executor)
+            executor = self.executor
+            future = executor.submit(_hash_chunk, passwords)
+
+        def discard_if_broken(future):
+            if not future.cancelled() and isinstance(future.exception(), BrokenProcessPool):
+                self._discard_executor(executor)
+
+        future.add_done_callback(discard_if_broken)
+        return future
+
+    def submit_many(self, passwords, timeout=DEFAULT_TIMEOUT):
+        """Hashes a list of passwords as one job, returns a Future of the list of hashes."""
+        timeout = self.acquire_timeout if timeout is DEFAULT_TIMEOUT else timeout
+        if not self._slots.acquire(timeout=timeout):
+            self.metrics.reject()
+            logger.warning(f"Password hashing pool is full ({self.max_pending} pending jobs)")
+            raise HashingPoolFull("Too many passwords are being hashed, try again later")
+
+        count, started = len(passwords), time.monotonic()
+        self.metrics.started(count)
+
+        def done(_):
+            self._slots.release()
+            self.metrics.finished(count, time.monotonic() - started)
+
+        if self.workers == 0:
+            future = Future()
+            try:
+                future.set_result(_hash_chunk(passwords))
+            except Exception as e:
+                future.set_exception(e)
+            done(future)
+            return future
+        try:
+            future = self._submit(passwords)
+        except BaseException:
+            self._slots.release()
+            self.metrics.fail(count)
+            raise
+        future.add_done_callback(done)
+        return future
+
+    def hash(self, password):
+        """Returns make_password(password), computed in the pool. Empty passwords become unusable."""
+        if not password:
+            return make_password(None)
+        return self.submit_many([password]).result()[0]
+
+    async def ahash(self, password):
+        """Async hash(): waits for a slot in a worker thread and for the result on the event loop."""
+        if not password:
+            return make_password(None)
+        future = await sync_to_async(self.submit_many, thread_sensitive=False)([password])
+        return (await asyncio.wrap_future(future))[0]
+
+    def hash_many(self, passwords, chunk_size=None):
+        """
+        Hashes a batch of passwords in chunks spread over the workers, preserving order.
+        Batch callers wait for slots as long as it takes rather than failing, with at most
+        max_batch_pending chunks submitted at once across all batches.
+        """
+        hashed = [None if password else make_password(None) for password in passwords]
+        indexes = [i for i, password in enumerate(passwords) if password]
+        chunk_size = chunk_size or max(1, len(indexes) // (max(self.workers, 1) * 4))
+        it = iter(indexes)
+        futures = []
+        while chunk := list(islice(it, chunk_size)):
+            self._batch_slots.acquire()
+            try:
+                future = self.submit_many([passwords[i] for i in chunk], timeout=None)
+            except BaseException:
+                self._batch_slots.release()
+                raise
+            future.add_done_callback(lambda _: self._batch_slots.release())
+            futures.append((chunk, future))
+        for chunk, future in futures:
+            for i, value in zip(chunk, future.result()):
+                hashed[i] = value
+        return hashed
+
+    def shutdown(self, wait=True):
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+
+
+def _build_password_hasher():
+    return PasswordHasherPool(**{name.lower(): value for name, value in settings.PASSWORD_HASHING.items()})
+
+
+password_hasher = SimpleLazyObject(_build_password_hasher)
@@ -0,0 +1,244 @@
+import hmac
+import ipaddress
+import logging
+import os
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from config.log import BoundedQueueHandler
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.http import HttpResponse, HttpResponseForbidden
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry
+from prometheus_client import Counter as PrometheusCounter
+from prometheus_client import Histogram, generate_latest, multiprocess
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+from .hashing import password_hasher
+
+
+logger = logging.getLogger(__name__)
+
+
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "Time from the first middleware to the response",
+    ["method", "endpoint", "status"],
+)
+REQUEST_DB_DURATION = Histogram(
+    "http_request_db_duration_seconds",
+    "Time a request spent executing SQL",
+    ["endpoint"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+REQUEST_QUERIES = Histogram(
+    "http_request_queries",
+    "SQL queries executed per request",
+    ["endpoint"],
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100, 250),
+)
+DUPLICATE_QUERY_REQUESTS = PrometheusCounter(
+    "http_request_duplicate_queries",
+    "Requests that repeated one SQL statement at least DUPLICATE_QUERY_THRESHOLD times (likely N+1)",
+    ["endpoint"],
+)
+SPAN_DURATION = Histogram(
+    "http_request_span_duration_seconds",
+    "Time a request spent in an instrumented section (hashing, serialization)",
+    ["endpoint", "span"],
+)
+
+
+class RequestMetrics:
+    """What one request spent where. Spans may be recorded from the threads the request hops to."""
+
+    __slots__ = ("started", "queries", "db_time", "statements", "spans")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.statements = Counter()
+        self.spans = {}
+
+    def add_span(self, name, duration):
+        self.spans[name] = self.spans.get(name, 0.0) + duration
+
+    def duplicates(self):
+        """The most repeated SQL statement (parameters aside) and its count."""
+        if not self.statements:
+            return None, 0
+        return self.statements.most_common(1)[0]
+
+
+_current = ContextVar("request_metrics", default=None)
+
+
+def record_query(execute, sql, params, many, context):
+    """Execute wrapper; outside an instrumented request it costs one ContextVar lookup."""
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.db_time += time.perf_counter() - started
+        metrics.queries += 1
+        metrics.statements[sql] += 1
+
+
+@receiver(connection_created)
+def install_query_recorder(sender, connection, **kwargs):
+    if settings.INSTRUMENTATION["ENABLED"] and record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+@contextmanager
+def span(name):
+    """Adds the time spent in the block to the current request's `name` span."""
+    metrics = _current.get()
+    if metrics is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.add_span(name, time.perf_counter() - started)
+
+
+class InstrumentationMiddleware:
+    """
+    Records per-endpoint latency, SQL query counts, SQL time and the instrumented spans of every
+    request as Prometheus metrics, and reports them to the client in a Server-Timing header.
+    Requests that repeat one statement DUPLICATE_QUERY_THRESHOLD times or more are counted and
+    logged as likely N+1 queries. Streaming bodies are measured up to the start of the stream.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.config = settings.INSTRUMENTATION
+        if not self.config["ENABLED"]:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        self.process_response(request, response, metrics)
+        return response
+
+    async def __acall__(self, request):
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        self.process_response(request, response, metrics)
+        return response
+
+    @staticmethod
+    def endpoint(request):
+        # The route pattern, not the path, keeps the label cardinality bounded
+        match = getattr(request, "resolver_match", None)
+        return match.route if match is not None else "<unmatched>"
+
+    def process_response(self, request, response, metrics):
+        total = time.perf_counter() - metrics.started
+        endpoint = self.endpoint(request)
+        REQUEST_DURATION.labels(request.method, endpoint, response.status_code).observe(total)
+        REQUEST_DB_DURATION.labels(endpoint).observe(metrics.db_time)
+        REQUEST_QUERIES.labels(endpoint).observe(metrics.queries)
+        for name, duration in metrics.spans.items():
+            SPAN_DURATION.labels(endpoint, name).observe(duration)
+
+        sql, repeats = metrics.duplicates()
+        if repeats >= self.config["DUPLICATE_QUERY_THRESHOLD"]:
+            DUPLICATE_QUERY_REQUESTS.labels(endpoint).inc()
+            logger.warning(f"{request.method} {endpoint} repeated a query {repeats} times: {sql[:200]}")
+
+        if self.config["SERVER_TIMING"]:
+            timings = [f'db;dur={metrics.db_time * 1000:.1f};desc="{metrics.queries} queries"']
+            timings += [f"{name};dur={duration * 1000:.1f}" for name, duration in metrics.spans.items()]
+            timings.append(f"total;dur={total * 1000:.1f}")
+            response["Server-Timing"] = ", ".join(timings)
+
+
+class ProcessCollector:
+    """Reads the hashing pool and log queue counters at scrape time, so they cost nothing per request."""
+
+    def collect(self):
+        hashing = password_hasher.metrics.snapshot()
+        pending = GaugeMetricFamily("password_hashing_pending", "Passwords queued or being hashed")
+        pending.add_metric([], hashing["pending"])
+        yield pending
+        for name in ("submitted", "completed", "rejected", "failed"):
+            counter = CounterMetricFamily(f"password_hashing_{name}", f"Passwords {name} by the hashing pool")
+            counter.add_metric([], hashing[name])
+            yield counter
+        latency = GaugeMetricFamily("password_hashing_latency_seconds", "Hash job latency", labels=["stat"])
+        latency.add_metric(["avg"], hashing["latency_avg"])
+        latency.add_metric(["max"], hashing["latency_max"])
+        yield latency
+
+        dropped = CounterMetricFamily("log_records_dropped", "Log records dropped by full queues", labels=["handler"])
+        for handler in queue_handlers():
+            dropped.add_metric([handler.name or "unnamed"], handler.dropped)
+        yield dropped
+
+
+def queue_handlers():
+    loggers = [logging.getLogger(), *logging.Logger.manager.loggerDict.values()]
+    handlers = {handler for log in loggers for handler in getattr(log, "handlers", ())}
+    return [handler for handler in handlers if isinstance(handler, BoundedQueueHandler)]
+
+
+REGISTRY.register(ProcessCollector())
+
+
+@lru_cache
+def metrics_networks(networks):
+    return [ipaddress.ip_network(network, strict=False) for network in networks]
+
+
+def metrics_allowed(request):
+    """Whether the scraper presents METRICS_TOKEN as a bearer token or connects from METRICS_ALLOWED_NETWORKS."""
+    config = settings.INSTRUMENTATION
+    token = config["METRICS_TOKEN"]
+    if token and hmac.compare_digest(request.headers.get("Authorization", "").encode(), f"Bearer {token}".encode()):
+        return True
+    try:
+        address = ipaddress.ip_address(request.META.get("REMOTE_ADDR", ""))
+    except ValueError:
+        return False
+    return any(address in network for network in metrics_networks(tuple(config["METRICS_ALLOWED_NETWORKS"])))
+
+
+def metrics_view(request):
+    """Prometheus scrape endpoint, answered for allowed networks or the metrics token only."""
+    if not metrics_allowed(request):
+        return HttpResponseForbidden()
+    registry = REGISTRY
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        # Several server processes: merge the per-process files, see prometheus_client's multiprocess mode
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    return HttpResponse(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,26 @@
+from django.core.exceptions import EmptyResultSet
+from django.db.models import Field
+from django.db.models.lookups import In
+from django.utils.datastructures import OrderedSet
+
+
+@Field.register_lookup
+class AnyLookup(In):
+    """
+    field__any=[...] is `field = ANY(%s)` on PostgreSQL with the values bound as one array, so the
+    statement is the same whatever the number of values and the column's index is used. Other
+    databases run it as field__in.
+    """
+
+    lookup_name = "any"
+
+    def as_postgresql(self, compiler, connection):
+        if not self.rhs_is_direct_value():
+            return super().as_sql(compiler, connection)
+        values = OrderedSet(self.rhs)
+        values.discard(None)
+        if not values:
+            raise EmptyResultSet
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        _, params = self.batch_process_rhs(compiler, connection, values)
+        return f"{lhs} = ANY(%s::{self.lhs.output_field.cast_db_type(connection)}[])", (*lhs_params, list(params))
@@ -0,0 +1,66 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+from django.test.utils import setup_databases, teardown_databases
+from users.benchmarks.suite import compare_to_baseline, run_suite, write_report
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the user and client hot paths against a throwaway test database (SQLite or PostgreSQL), "
+        "write the results as JSON and optionally compare them with a stored baseline."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", default="10000", help="Comma-separated client table sizes, e.g. 10000,100000")
+        parser.add_argument("--ops", type=int, default=200, help="Operations per benchmark")
+        parser.add_argument("--output", default="benchmark.json", help="File the results are written to")
+        parser.add_argument("--compare", default=None, help="Baseline results file to compare against")
+        parser.add_argument(
+            "--threshold", type=float, default=0.2, help="Throughput drop that counts as a regression (0.2 = 20%%)"
+        )
+        parser.add_argument("--database", default=DEFAULT_DB_ALIAS, help="Database alias whose test database is used")
+        parser.add_argument("--keepdb", action="store_true", help="Keep the test database (and its seeded rows)")
+
+    def handle(self, *args, **options):
+        try:
+            sizes = [int(size) for size in options["sizes"].split(",")]
+        except ValueError:
+            raise CommandError("--sizes must be comma-separated integers")
+        if options["ops"] < 1 or min(sizes) < 1:
+            raise CommandError("--ops and --sizes must be positive")
+        baseline = None
+        if options["compare"]:
+            try:
+                with open(options["compare"], encoding="utf-8") as stream:
+                    baseline = json.load(stream)
+            except (OSError, ValueError) as e:
+                raise CommandError(f"Cannot read baseline {options['compare']}: {e}")
+
+        using = options["database"]
+        # Never benchmark against real data: every run gets the test database of the alias
+        old_config = setup_databases(verbosity=0, interactive=False, keepdb=options["keepdb"], aliases={using})
+        try:
+            results = run_suite(sizes, options["ops"], using)
+            write_report(results, options["output"], using)
+        finally:
+            teardown_databases(old_config, verbosity=0, keepdb=options["keepdb"])
+
+        for result in results:
+            self.stdout.write(
+                f"{result.key:<40} {result.ops_per_second:12.1f} ops/s  "
+                f"p50 {result.percentile(50):8.3f} ms  p95 {result.percentile(95):8.3f} ms"
+            )
+        self.stdout.write(f"Results written to {options['output']}")
+
+        if baseline is None:
+            return
+        comparisons = compare_to_baseline(results, baseline, options["threshold"])
+        for comparison in comparisons:
+            line = f"{comparison.key:<40} {comparison.change:+8.1%}"
+            self.stdout.write(self.style.ERROR(f"{line}  REGRESSION") if comparison.regressed else line)
+        regressions = [comparison.key for comparison in comparisons if comparison.regressed]
+        if regressions:
+            raise CommandError(f"{len(regressions)} benchmark(s) regressed: {', '.join(regressions)}")
+        self.stdout.write(self.style.SUCCESS(f"No regressions beyond {options['threshold']:.0%}"))
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand, CommandError
+from users.benchmarks.connections import compare
+
+
+class Command(BaseCommand):
+    help = "Compare requests/sec of cheap lookups with connection reuse off and on."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=1000, help="Simulated requests per mode")
+        parser.add_argument("--threads", type=int, default=4, help="Concurrent request threads")
+        parser.add_argument("--database", default="default", help="Database alias to benchmark")
+
+    def handle(self, *args, **options):
+        if options["requests"] < 1 or options["threads"] < 1:
+            raise CommandError("--requests and --threads must be positive")
+        results = compare(options["requests"], options["threads"], using=options["database"])
+        for result in results:
+            self.stdout.write(
+                f"pooling {result.mode:<3}  {result.requests_per_second:10.1f} req/s  "
+                f"{result.connections_opened:6d} connections opened"
+            )
+        off, on = results
+        if off.requests_per_second:
+            self.stdout.write(self.style.SUCCESS(f"Speedup: {on.requests_per_second / off.requests_per_second:.2f}x"))
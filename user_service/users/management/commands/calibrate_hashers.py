@@ -0,0 +1,97 @@
+import hashlib
+import os
+import statistics
+import time
+
+from argon2 import low_level
+from django.core.management.base import BaseCommand, CommandError
+from users.hashers import scrypt_memory
+
+
+PASSWORD = b"calibration-password"
+SALT = os.urandom(16)
+
+
+def median_ms(func, samples):
+    func()  # Warm up caches and allocators
+    timings = []
+    for _ in range(samples):
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark Argon2id and scrypt on this host and print the highest cost parameters whose "
+        "verify latency stays within the target, as settings environment variables."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--target-ms", type=float, default=50, help="Verify latency budget per password")
+        parser.add_argument("--algorithm", choices=("argon2", "scrypt", "all"), default="all")
+        parser.add_argument("--samples", type=int, default=5, help="Timed runs per candidate, the median counts")
+        parser.add_argument("--argon2-memory-kib", type=int, default=19456, help="Argon2 memory cost, kept fixed")
+        parser.add_argument("--argon2-parallelism", type=int, default=1, help="Argon2 lanes, kept fixed")
+        parser.add_argument("--argon2-max-time-cost", type=int, default=10)
+        parser.add_argument("--scrypt-block-size", type=int, default=8, help="Scrypt r, kept fixed")
+        parser.add_argument("--scrypt-max-work-factor", type=int, default=2**20)
+
+    def handle(self, *args, **options):
+        if options["target_ms"] <= 0 or options["samples"] < 1:
+            raise CommandError("--target-ms and --samples must be positive")
+        values = {}
+        if options["algorithm"] in ("argon2", "all"):
+            values.update(self.calibrate_argon2(options))
+        if options["algorithm"] in ("scrypt", "all"):
+            values.update(self.calibrate_scrypt(options))
+        for name, value in values.items():
+            self.stdout.write(f"{name}={value}")
+
+    def calibrate_argon2(self, options):
+        memory_cost, parallelism = options["argon2_memory_kib"], options["argon2_parallelism"]
+
+        def verify_time(time_cost):
+            encoded = low_level.hash_secret(PASSWORD, SALT, time_cost, memory_cost, parallelism, 32, low_level.Type.ID)
+            return median_ms(lambda: low_level.verify_secret(encoded, PASSWORD, low_level.Type.ID), options["samples"])
+
+        candidates = range(1, options["argon2_max_time_cost"] + 1)
+        time_cost = self.pick("argon2 time_cost", candidates, verify_time, options["target_ms"])
+        return {
+            "ARGON2_TIME_COST": time_cost,
+            "ARGON2_MEMORY_COST": memory_cost,
+            "ARGON2_PARALLELISM": parallelism,
+        }
+
+    def calibrate_scrypt(self, options):
+        block_size, parallelism = options["scrypt_block_size"], 1
+
+        def verify_time(work_factor):
+            maxmem = 2 * scrypt_memory(work_factor, block_size, parallelism)
+            return median_ms(
+                lambda: hashlib.scrypt(PASSWORD, salt=SALT, n=work_factor, r=block_size, p=parallelism, maxmem=maxmem),
+                options["samples"],
+            )
+
+        candidates = [2**exp for exp in range(10, options["scrypt_max_work_factor"].bit_length())]
+        work_factor = self.pick("scrypt work_factor", candidates, verify_time, options["target_ms"])
+        return {
+            "SCRYPT_WORK_FACTOR": work_factor,
+            "SCRYPT_BLOCK_SIZE": block_size,
+            "SCRYPT_PARALLELISM": parallelism,
+        }
+
+    def pick(self, label, candidates, verify_time, target_ms):
+        """Returns the highest candidate cost within the target, candidates are in increasing cost order."""
+        chosen = None
+        for cost in candidates:
+            elapsed = verify_time(cost)
+            self.stderr.write(f"{label}={cost}: {elapsed:.1f} ms")
+            if elapsed > target_ms:
+                break
+            chosen = cost
+        if chosen is None:
+            chosen = candidates[0]
+            self.stderr.write(self.style.WARNING(f"Even {label}={chosen} exceeds {target_ms} ms on this host"))
+        return chosen
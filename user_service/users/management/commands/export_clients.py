@@ -0,0 +1,45 @@
+import sys
+import uuid
+
+from django.core.management.base import BaseCommand, CommandError
+from users.export import EXPORT_FORMATS, RowEncoder, client_export_queryset, export_lines
+
+
+class Command(BaseCommand):
+    help = "Stream every client of an account as NDJSON or CSV, in id order."
+
+    def add_arguments(self, parser):
+        parser.add_argument("account_id", help="Account whose clients are exported")
+        parser.add_argument("--format", choices=tuple(EXPORT_FORMATS), default="ndjson", help="Output format")
+        parser.add_argument("--output", default="-", help="Output file, '-' writes to stdout")
+        parser.add_argument("--after", default=None, help="Resume after this client id (the last one exported)")
+        parser.add_argument("--chunk-size", type=int, default=2000, help="Rows fetched per server-side cursor read")
+        parser.add_argument("--database", default=None, help="Database alias to export from")
+
+    def handle(self, *args, **options):
+        try:
+            account_id = uuid.UUID(options["account_id"])
+            after = uuid.UUID(options["after"]) if options["after"] else None
+        except ValueError as e:
+            raise CommandError(f"Invalid id: {e}")
+
+        path = options["output"]
+        try:
+            # A resumed export appends to the file it continues
+            stream = sys.stdout if path == "-" else open(path, "a" if after else "w", newline="", encoding="utf-8")
+        except OSError as e:
+            raise CommandError(f"Cannot open {path}: {e}")
+
+        queryset = client_export_queryset(account_id, after, using=options["database"])
+        encoder = RowEncoder(options["format"])
+        header = after is None and bool(encoder.header())
+        exported = -1 if header else 0
+        try:
+            for line in export_lines(queryset, encoder, header=header, chunk_size=options["chunk_size"]):
+                stream.write(line)
+                exported += 1
+        finally:
+            if stream is not sys.stdout:
+                stream.close()
+
+        self.stderr.write(self.style.SUCCESS(f"Exported {exported} clients"))
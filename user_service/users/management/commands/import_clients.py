@@ -0,0 +1,56 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from users.models import BaseClient
+from users.service import read_rows
+
+
+class Command(BaseCommand):
+    help = "Bulk import clients from a CSV or JSONL file ('-' reads from stdin)."
+
+    max_reported_errors = 100
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Path to the CSV/JSONL file, or '-' for stdin")
+        parser.add_argument("--format", choices=("csv", "jsonl"), default=None, help="Input format")
+        parser.add_argument("--batch-size", type=int, default=1000, help="Rows per bulk_create batch")
+        parser.add_argument("--workers", type=int, default=None, help="Hashing processes (0 hashes inline)")
+        parser.add_argument("--account-id", default=None, help="Default account_id for rows without one")
+        parser.add_argument("--subaccount-id", default=None, help="Default subaccount_id for rows without one")
+        parser.add_argument(
+            "--role",
+            choices=BaseClient.Role.values,
+            default=BaseClient.Role.ACCOUNT_USER,
+            help="Default role for rows without one",
+        )
+        parser.add_argument("--database", default=None, help="Database alias to import into")
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        fmt = options["format"] or ("jsonl" if path.endswith((".jsonl", ".ndjson")) else "csv")
+
+        try:
+            stream = sys.stdin if path == "-" else open(path, newline="", encoding="utf-8")
+        except OSError as e:
+            raise CommandError(f"Cannot open {path}: {e}")
+
+        try:
+            report = BaseClient.objects.db_manager(options["database"]).bulk_import_clients(
+                read_rows(stream, fmt),
+                batch_size=options["batch_size"],
+                workers=options["workers"],
+                role=options["role"],
+                account_id=options["account_id"],
+                subaccount_id=options["subaccount_id"],
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+        for error in report.errors[: self.max_reported_errors]:
+            self.stderr.write(str(error))
+        if report.failed > self.max_reported_errors:
+            self.stderr.write(f"... and {report.failed - self.max_reported_errors} more errors")
+        self.stdout.write(self.style.SUCCESS(f"Imported {report.created} clients, {report.failed} rows failed"))
@@ -0,0 +1,40 @@
+import uuid
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from users import partitioning
+
+
+class Command(BaseCommand):
+    help = (
+        "Copy users_baseclient into the account_id hash partitions created by migration 0008, "
+        "then with --swap put the partitioned table in its place. Safe to run while the service writes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=5000, help="Rows copied per transaction")
+        parser.add_argument(
+            "--swap", action="store_true", help="After copying, lock the table briefly and swap in the partitions"
+        )
+        parser.add_argument("--database", default="default", help="Database alias holding the clients")
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be a positive integer")
+        connection = connections[options["database"]]
+        if connection.vendor != "postgresql":
+            raise CommandError("Partitioning needs PostgreSQL")
+        if not partitioning.is_prepared(connection):
+            raise CommandError(f"{partitioning.TARGET} does not exist: migrate first, or the swap is already done")
+
+        copied, last = 0, uuid.UUID(int=0)
+        while (last := partitioning.copy_batch(connection, last, options["batch_size"])) is not None:
+            copied += 1
+            self.stderr.write(f"Copied batch {copied}, up to id {last}")
+
+        if options["swap"]:
+            try:
+                partitioning.swap_tables(connection)
+            except RuntimeError as e:
+                raise CommandError(str(e))
+            self.stderr.write(f"Swapped in the partitioned table, the old one is {partitioning.RETIRED}")
@@ -0,0 +1,67 @@
+import json
+
+from config.settings.profiles import PROFILES
+from django.core.management.base import BaseCommand, CommandError
+from users.benchmarks.startup import profile_startup
+
+
+# What each kind of process imports after django.setup()
+DEFAULT_TARGETS = {
+    "full": ("config.wsgi", "config.urls"),
+    "api": ("config.asgi", "config.urls"),
+    "worker": ("celery_app", "users.tasks"),
+}
+
+
+class Command(BaseCommand):
+    help = "Report the cold start cost of a settings profile, from a fresh interpreter run with -X importtime."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--profile", choices=PROFILES, default="full", help="DJANGO_SETTINGS_PROFILE to start")
+        parser.add_argument(
+            "--import",
+            dest="targets",
+            action="append",
+            default=None,
+            help="Module imported after django.setup(), repeatable (default depends on --profile)",
+        )
+        parser.add_argument("--runs", type=int, default=3, help="Fresh starts measured, the fastest is reported")
+        parser.add_argument("--top", type=int, default=15, help="Modules and packages listed")
+        parser.add_argument("--json", dest="json_path", default=None, help="Also write the report to this file")
+
+    def handle(self, *args, **options):
+        if options["runs"] < 1:
+            raise CommandError("--runs must be positive")
+        targets = options["targets"] or DEFAULT_TARGETS[options["profile"]]
+        try:
+            runs = [profile_startup(targets, profile=options["profile"]) for _ in range(options["runs"])]
+        except RuntimeError as e:
+            raise CommandError(str(e))
+        best = min(runs, key=lambda run: run.wall_seconds)
+
+        self.stdout.write(
+            f"Profile {options['profile']}: {best.wall_seconds * 1000:.0f} ms wall, "
+            f"{best.import_seconds * 1000:.0f} ms importing {len(best.records)} modules"
+        )
+        self.stdout.write("Slowest imports (cumulative ms):")
+        for record in best.slowest(options["top"]):
+            self.stdout.write(f"  {record.cumulative_us / 1000:9.1f}  {record.module}")
+        self.stdout.write("Slowest packages (own ms):")
+        for package, self_us in best.by_package(options["top"]):
+            self.stdout.write(f"  {self_us / 1000:9.1f}  {package}")
+
+        if options["json_path"]:
+            report = {
+                "profile": options["profile"],
+                "targets": list(targets),
+                "wall_ms": [round(run.wall_seconds * 1000, 1) for run in runs],
+                "import_ms": round(best.import_seconds * 1000, 1),
+                "modules": len(best.records),
+                "slowest": [
+                    {"module": record.module, "cumulative_ms": record.cumulative_us / 1000}
+                    for record in best.slowest(options["top"])
+                ],
+                "packages": [{"package": package, "ms": self_us / 1000} for package, self_us in best.by_package()],
+            }
+            with open(options["json_path"], "w", encoding="utf-8") as stream:
+                json.dump(report, stream, indent=2)
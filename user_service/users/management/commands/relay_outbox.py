@@ -0,0 +1,40 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from users.outbox import OutboxRelay, RedisStreamPublisher
+
+
+class Command(BaseCommand):
+    help = "Publish outbox events to Redis streams, in order per user, until stopped."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=None, help="Events published per round trip")
+        parser.add_argument("--flush-interval", type=float, default=None, help="Seconds to wait once drained")
+        parser.add_argument(
+            "--partitions",
+            default=None,
+            help="Comma-separated partitions to relay (default all); run one relay per disjoint set",
+        )
+        parser.add_argument("--once", action="store_true", help="Drain the outbox once and exit")
+        parser.add_argument("--database", default="default", help="Database alias holding the outbox")
+
+    def handle(self, *args, **options):
+        if options["batch_size"] is not None and options["batch_size"] < 1:
+            raise CommandError("--batch-size must be a positive integer")
+        partitions = None
+        if options["partitions"]:
+            try:
+                partitions = [int(partition) for partition in options["partitions"].split(",")]
+            except ValueError:
+                raise CommandError("--partitions must be comma-separated integers")
+            if not all(0 <= partition < settings.OUTBOX["PARTITIONS"] for partition in partitions):
+                raise CommandError(f"Partitions range from 0 to {settings.OUTBOX['PARTITIONS'] - 1}")
+
+        relay = OutboxRelay(
+            RedisStreamPublisher(),
+            batch_size=options["batch_size"],
+            flush_interval=options["flush_interval"],
+            partitions=partitions,
+            using=options["database"],
+        )
+        relayed = relay.run(once=options["once"])
+        self.stderr.write(f"Relayed {relayed} events")
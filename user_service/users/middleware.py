@@ -0,0 +1,61 @@
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+from .routers import end_routing, get_routing_state, start_routing
+
+
+class ReplicaPinningMiddleware:
+    """
+    Opens a routing scope per request. A request that wrote sets a cookie that pins the client's
+    reads to the primary for REPLICA_STICKY_SECONDS, so it never reads older data from a replica
+    than it has just written.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = start_routing(self.is_pinned(request))
+        try:
+            response = self.get_response(request)
+            self.process_response(response)
+        finally:
+            end_routing(token)
+        return response
+
+    async def __acall__(self, request):
+        token = start_routing(self.is_pinned(request))
+        try:
+            response = await self.get_response(request)
+            self.process_response(response)
+        finally:
+            end_routing(token)
+        return response
+
+    @staticmethod
+    def is_pinned(request):
+        try:
+            return float(request.COOKIES.get(settings.REPLICA_STICKY_COOKIE, 0)) > time.time()
+        except ValueError:
+            return False
+
+    @staticmethod
+    def process_response(response):
+        if get_routing_state().wrote and settings.DATABASE_REPLICAS:
+            window = settings.REPLICA_STICKY_SECONDS
+            response.set_cookie(
+                settings.REPLICA_STICKY_COOKIE,
+                f"{time.time() + window:.3f}",
+                max_age=window,
+                httponly=True,
+                samesite="Lax",
+            )
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.15 on 2026-10-18 17:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="baseclient",
+            index=models.Index(fields=["role", "date_joined"], name="baseclient_role_joined_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="baseclient",
+            index=models.Index(fields=["account_id", "role"], name="baseclient_account_role_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="baseclient",
+            index=models.Index(fields=["subaccount_id", "role"], name="baseclient_subacct_role_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="baseuser",
+            index=models.Index(fields=["role", "date_joined"], name="baseuser_role_joined_idx"),
+        ),
+    ]
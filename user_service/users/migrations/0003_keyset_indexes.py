@@ -0,0 +1,21 @@
+# Generated by Django 4.2.15 on 2026-10-18 17:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0002_role_indexes"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="baseclient",
+            index=models.Index(fields=["date_joined", "id"], name="baseclient_joined_id_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="baseuser",
+            index=models.Index(fields=["date_joined", "id"], name="baseuser_joined_id_idx"),
+        ),
+    ]
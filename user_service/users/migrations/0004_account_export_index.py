@@ -0,0 +1,17 @@
+# Generated by Django 4.2.15 on 2026-10-18 17:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0003_keyset_indexes"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="baseclient",
+            index=models.Index(fields=["account_id", "id"], name="baseclient_account_id_idx"),
+        ),
+    ]
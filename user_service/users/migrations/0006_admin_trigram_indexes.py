@@ -0,0 +1,39 @@
+from django.db import migrations
+
+
+# Django's icontains is UPPER(col::text) LIKE UPPER(%term%) on PostgreSQL, so the indexes are on UPPER(col)
+TABLES = ("users_baseuser", "users_baseclient")
+COLUMNS = ("email", "first_name", "last_name")
+
+
+def create_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for table in TABLES:
+        for column in COLUMNS:
+            schema_editor.execute(
+                f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {table}_{column}_trgm_idx "
+                f"ON {table} USING gin (UPPER({column}) gin_trgm_ops)"
+            )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for table in TABLES:
+        for column in COLUMNS:
+            schema_editor.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {table}_{column}_trgm_idx")
+
+
+class Migration(migrations.Migration):
+    # CONCURRENTLY cannot run inside a transaction, and keeps the tables writable while the indexes build
+    atomic = False
+
+    dependencies = [
+        ("users", "0005_outbox"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
@@ -0,0 +1,52 @@
+from django.db import migrations
+
+
+# Generated columns keep themselves up to date on every insert and update. They only exist on
+# PostgreSQL and are not model fields: users/search.py refers to them in raw SQL.
+SEARCH_VECTOR = (
+    "setweight(to_tsvector('simple'::regconfig, company_name || ' ' || first_name || ' ' || last_name), 'A') || "
+    "setweight(to_tsvector('simple'::regconfig, domain || ' ' || email), 'B') || "
+    "setweight(to_tsvector('simple'::regconfig, city), 'C')"
+)
+SEARCH_TEXT = (
+    "lower(first_name || ' ' || last_name || ' ' || email || ' ' || company_name || ' ' || domain || ' ' || city)"
+)
+
+
+def add_search_columns(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    # Adding a stored generated column rewrites the table once, under an exclusive lock
+    schema_editor.execute(
+        "ALTER TABLE users_baseclient "
+        f"ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS ({SEARCH_VECTOR}) STORED, "
+        f"ADD COLUMN IF NOT EXISTS search_text text GENERATED ALWAYS AS ({SEARCH_TEXT}) STORED"
+    )
+    schema_editor.execute(
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS baseclient_search_vector_idx "
+        "ON users_baseclient USING gin (search_vector)"
+    )
+    schema_editor.execute(
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS baseclient_search_text_trgm_idx "
+        "ON users_baseclient USING gin (search_text gin_trgm_ops)"
+    )
+
+
+def drop_search_columns(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(
+        "ALTER TABLE users_baseclient DROP COLUMN IF EXISTS search_vector, DROP COLUMN IF EXISTS search_text"
+    )
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ("users", "0006_admin_trigram_indexes"),
+    ]
+
+    operations = [
+        migrations.RunPython(add_search_columns, drop_search_columns),
+    ]
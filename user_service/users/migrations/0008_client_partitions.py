@@ -0,0 +1,28 @@
+from django.conf import settings
+from django.db import migrations
+from users import partitioning
+
+
+def create_partitioned_table(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        partitioning.create_partitioned_table(schema_editor.connection, settings.CLIENT_PARTITIONS)
+
+
+def drop_partitioned_table(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        partitioning.drop_partitioned_table(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+    """
+    Prepares the hash-partitioned client table next to users_baseclient. The rows are moved and
+    the tables swapped by `manage.py partition_clients`, see users/partitioning.py.
+    """
+
+    dependencies = [
+        ("users", "0007_client_search"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_partitioned_table, drop_partitioned_table),
+    ]
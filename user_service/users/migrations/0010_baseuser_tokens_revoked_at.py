@@ -0,0 +1,18 @@
+# Generated by Django 4.2.15 on 2026-10-18 18:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0009_accounts"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="baseuser",
+            name="tokens_revoked_at",
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+    ]
@@ -1,12 +1,80 @@
 import re
 import uuid
+import zlib
 
-from django.contrib.auth.hashers import make_password
+from django.conf import settings
+from django.contrib.auth.hashers import check_password
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin
-from django.db import models
+from django.core.serializers.json import DjangoJSONEncoder
+from django.core.validators import URLValidator
+from django.db import models, router, transaction
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
+from .hashing import password_hasher
+
+
+PHONE_NUMBER_REGEX = re.compile(r"^\+?\d{10,15}$")
+DOMAIN_REGEX = re.compile(
+    r"^" + URLValidator.hostname_re + URLValidator.domain_re + URLValidator.tld_re + r"$",
+    re.IGNORECASE,
+)
+
+
+class TrackedFieldsMixin:
+    """Remembers the database values of `tracked_fields`, so saves can tell what changed."""
+
+    tracked_fields = ()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.reset_tracked_fields()
+        return instance
+
+    def reset_tracked_fields(self):
+        self._loaded_values = {name: getattr(self, name) for name in self.tracked_fields if name in self.__dict__}
+
+    def changed_fields(self):
+        """Returns the tracked fields changed since load; all of them if the instance was not loaded."""
+        loaded = getattr(self, "_loaded_values", None)
+        if loaded is None:
+            return set(self.tracked_fields)
+        return {name for name, value in loaded.items() if getattr(self, name) != value}
+
+
+class OutboxMixin:
+    """
+    Writes a lifecycle OutboxEvent in the transaction of every save, so other services learn of
+    the change exactly when it commits. Deletes are recorded by a post_delete receiver (users/signals.py).
+    Queryset updates and deletes without signals bypass the outbox.
+    """
+
+    outbox_fields = ()
+    # Saves that only touch these fields (rehash on login, last login) are not lifecycle changes
+    outbox_ignored_fields = frozenset({"password", "last_login"})
+
+    def outbox_event_type(self, update_fields=None):
+        if self._state.adding:
+            return OutboxEvent.Type.CREATED
+        if update_fields is not None and set(update_fields) <= self.outbox_ignored_fields:
+            return None
+        if getattr(self, "_loaded_values", {}).get("is_active") and not self.is_active:
+            return OutboxEvent.Type.DEACTIVATED
+        return OutboxEvent.Type.UPDATED
+
+    def outbox_payload(self):
+        return {name: getattr(self, name) for name in self.outbox_fields}
+
+    def save(self, *args, **kwargs):
+        event_type = self.outbox_event_type(kwargs.get("update_fields"))
+        using = kwargs.get("using") or router.db_for_write(type(self), instance=self)
+        with transaction.atomic(using=using, savepoint=False):
+            super().save(*args, **kwargs)
+            if event_type:
+                OutboxEvent.for_instance(self, event_type).save(using=using)
+        self.reset_tracked_fields()
+
 
 # ======= User Managers =======
 class BaseUserMgr(BaseUserManager):
@@ -20,7 +88,7 @@ class BaseUserMgr(BaseUserManager):
         email = self.normalize_email(email)
         user = self.model(email=email, role=role, **extra_fields)
         if password and password is not None:
-            user.set_password(password)
+            user.password = password_hasher.hash(password)
         user.save(using=self._db)
         return user
 
@@ -51,7 +119,20 @@ class StaffMgr(models.Manager):
 
 
 # ======= Client Managers =======
-class BaseClientMgr(BaseUserManager):
+class ClientQuerySet(models.QuerySet):
+
+    def for_account(self, account_id, subaccount_id=None):
+        """
+        The clients of an account (and subaccount). Filtering on account_id by equality lets
+        PostgreSQL scan only the account's partition once the table is partitioned.
+        """
+        queryset = self.filter(account_id=account_id)
+        if subaccount_id is not None:
+            queryset = queryset.filter(subaccount_id=subaccount_id)
+        return queryset
+
+
+class BaseClientMgr(BaseUserManager.from_queryset(ClientQuerySet)):
 
     def create_client(
         self,
@@ -89,12 +170,28 @@ class BaseClientMgr(BaseUserManager):
             role=role,
         )
         if password and password is not None:
-            client.set_password(password)
+            client.password = password_hasher.hash(password)
         client.save(using=self._db)
         return client
 
+    def bulk_import_clients(self, rows, batch_size=1000, workers=None, **defaults):
+        """
+        Validates, hashes and inserts an iterable of client rows in batches.
+        Returns an ImportReport with the number of created rows and per-row errors.
+        """
+        from .service import bulk_import_clients
+
+        return bulk_import_clients(
+            rows,
+            model=self.model,
+            using=self._db,
+            batch_size=batch_size,
+            workers=workers,
+            **defaults,
+        )
+
 
-class AccountOwnerMgr(models.Manager):
+class AccountOwnerMgr(models.Manager.from_queryset(ClientQuerySet)):
 
     def create_account_owner(
         self,
@@ -114,11 +211,11 @@ class AccountOwnerMgr(models.Manager):
         if not password:
             raise ValueError("Password must be provided")
 
-        if not phone_number or not re.match(r"^\+?\d{10,15}$", phone_number):
+        if not phone_number or not PHONE_NUMBER_REGEX.match(phone_number):
             raise ValueError("Invalid phone number format. Must be 10-15 digits long.")
 
         role = BaseClient.Role.ACCOUNT_OWNER
-        hashed_password = make_password(password)
+        hashed_password = password_hasher.hash(password)
 
         account_owner = self.create(
             first_name=first_name,
@@ -141,7 +238,7 @@ class AccountOwnerMgr(models.Manager):
         return super().get_queryset().filter(role=BaseClient.Role.ACCOUNT_OWNER)
 
 
-class AccountUserMgr(models.Manager):
+class AccountUserMgr(models.Manager.from_queryset(ClientQuerySet)):
 
     def create_account_user(
         self,
@@ -161,11 +258,11 @@ class AccountUserMgr(models.Manager):
         if not password:
             raise ValueError("Password must be provided")
 
-        if not phone_number or not re.match(r"^\+?\d{10,15}$", phone_number):
+        if not phone_number or not PHONE_NUMBER_REGEX.match(phone_number):
             raise ValueError("Invalid phone number format. Must be 10-15 digits long.")
 
         role = BaseClient.Role.ACCOUNT_USER
-        hashed_password = make_password(password)
+        hashed_password = password_hasher.hash(password)
 
         account_user = self.create(
             first_name=first_name,
@@ -189,7 +286,7 @@ class AccountUserMgr(models.Manager):
 
 
 # ======= User Models =======
-class BaseUser(AbstractBaseUser, PermissionsMixin):
+class BaseUser(OutboxMixin, TrackedFieldsMixin, AbstractBaseUser, PermissionsMixin):
 
     class Role(models.TextChoices):
         ADMIN = "Admin", _("Admin")
@@ -234,6 +331,12 @@ class BaseUser(AbstractBaseUser, PermissionsMixin):
         choices=Role.choices,
         default=Role.STAFF,
     )
+    # Tokens issued until then are stale (users/authentication.py)
+    tokens_revoked_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        editable=False,
+    )
 
     groups = models.ManyToManyField(
         "auth.Group",
@@ -256,6 +359,18 @@ class BaseUser(AbstractBaseUser, PermissionsMixin):
     USERNAME_FIELD = "email"
     REQUIRED_FIELDS = ["first_name", "last_name"]
 
+    # Changing any of these revokes the claims signed into the user's tokens
+    tracked_fields = ("is_active", "role", "password")
+    outbox_fields = ("id", "email", "first_name", "last_name", "role", "is_active", "date_joined")
+
+    class Meta:
+        indexes = [
+            # AdminMgr/StaffMgr filter on role; admin lists filter and order on date_joined
+            models.Index(fields=["role", "date_joined"], name="baseuser_role_joined_idx"),
+            # Keyset pagination seeks on (date_joined, id) for unfiltered listings
+            models.Index(fields=["date_joined", "id"], name="baseuser_joined_id_idx"),
+        ]
+
     def __str__(self):
         return f"{self.email}"
 
@@ -267,6 +382,20 @@ class BaseUser(AbstractBaseUser, PermissionsMixin):
     def is_staff_user(self):
         return self.role == self.Role.STAFF
 
+    def check_password(self, raw_password):
+        """
+        Verifies the password, rehashing it when it was stored by an older hasher or with older costs.
+        The password itself stays the same, so the rehash does not revoke the user's tokens.
+        """
+
+        def setter(raw_password):
+            self.password = password_hasher.hash(raw_password)
+            if "password" in getattr(self, "_loaded_values", {}):
+                self._loaded_values["password"] = self.password
+            self.save(update_fields=["password"])
+
+        return check_password(raw_password, self.password, setter)
+
 
 class Admin(BaseUser):
 
@@ -307,7 +436,7 @@ class Staff(BaseUser):
 
 
 # ========== Client Models ==========
-class BaseClient(AbstractBaseUser, PermissionsMixin):
+class BaseClient(OutboxMixin, TrackedFieldsMixin, AbstractBaseUser, PermissionsMixin):
 
     class Role(models.TextChoices):
         ACCOUNT_OWNER = "AccountOwner", _("Account Owner")
@@ -386,6 +515,12 @@ class BaseClient(AbstractBaseUser, PermissionsMixin):
         choices=Role.choices,
         default=Role.ACCOUNT_USER,
     )
+    # Tokens issued until then are stale (users/authentication.py)
+    tokens_revoked_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        editable=False,
+    )
 
     groups = models.ManyToManyField(
         "auth.Group",
@@ -408,6 +543,35 @@ class BaseClient(AbstractBaseUser, PermissionsMixin):
     USERNAME_FIELD = "email"
     REQUIRED_FIELDS = ["first_name", "last_name"]
 
+    # Changes to the fields signed into (or checked for) client tokens revoke them (users/signals.py)
+    tracked_fields = ("is_active", "account_id", "subaccount_id")
+    outbox_fields = (
+        "id",
+        "email",
+        "first_name",
+        "last_name",
+        "role",
+        "is_active",
+        "account_id",
+        "subaccount_id",
+        "company_name",
+        "domain",
+        "date_joined",
+    )
+
+    class Meta:
+        indexes = [
+            # AccountOwnerMgr/AccountUserMgr filter on role; admin lists filter and order on date_joined
+            models.Index(fields=["role", "date_joined"], name="baseclient_role_joined_idx"),
+            # Role-filtered lookups of an account's or subaccount's clients
+            models.Index(fields=["account_id", "role"], name="baseclient_account_role_idx"),
+            models.Index(fields=["subaccount_id", "role"], name="baseclient_subacct_role_idx"),
+            # Per-account exports stream in id order and resume after the last exported id
+            models.Index(fields=["account_id", "id"], name="baseclient_account_id_idx"),
+            # Keyset pagination seeks on (date_joined, id) for unfiltered listings
+            models.Index(fields=["date_joined", "id"], name="baseclient_joined_id_idx"),
+        ]
+
     def __str__(self):
         return f"{self.email}"
 
@@ -456,3 +620,110 @@ class AccountUser(BaseClient):
         proxy = True
         verbose_name = _("Account User")
         verbose_name_plural = _("Account Users")
+
+
+# ========== Account hierarchy ==========
+class Account(models.Model):
+    """
+    A node of the account/subaccount tree that BaseClient.account_id and subaccount_id refer to.
+    `path` is the materialized path: the hex ids from the root down to this account, 32
+    characters per level, so the subtree of an account is one range scan on the path index.
+    Hierarchy changes go through users/accounts.py, which keeps the paths and caches in step.
+    """
+
+    ID_LENGTH = 32
+    MAX_DEPTH = 8
+
+    id = models.UUIDField(
+        primary_key=True,
+        default=uuid.uuid4,
+        editable=False,
+    )
+    parent = models.ForeignKey(
+        "self",
+        null=True,
+        blank=True,
+        on_delete=models.PROTECT,
+        related_name="children",
+    )
+    path = models.CharField(
+        max_length=ID_LENGTH * MAX_DEPTH,
+        unique=True,
+        editable=False,
+    )
+    created_at = models.DateTimeField(
+        default=timezone.now,
+    )
+
+    def __str__(self):
+        return f"{self.id}"
+
+    @property
+    def depth(self):
+        return len(self.path) // self.ID_LENGTH
+
+    @property
+    def ancestor_ids(self):
+        """Ids from the root down to the parent."""
+        return [
+            uuid.UUID(self.path[i : i + self.ID_LENGTH])
+            for i in range(0, len(self.path) - self.ID_LENGTH, self.ID_LENGTH)
+        ]
+
+    def subtree(self):
+        """This account and its descendants. Hex digits sort below "g", so the range covers exactly the path prefix."""
+        return Account.objects.using(self._state.db).filter(path__gte=self.path, path__lt=self.path + "g")
+
+
+# ========== Outbox ==========
+class OutboxEvent(models.Model):
+    """
+    A user lifecycle event waiting to be published, written in the transaction of the change.
+    The relay (users/outbox.py) publishes events in id order per partition and deletes them.
+    """
+
+    class Type(models.TextChoices):
+        CREATED = "created", _("Created")
+        UPDATED = "updated", _("Updated")
+        DEACTIVATED = "deactivated", _("Deactivated")
+        DELETED = "deleted", _("Deleted")
+
+    aggregate_type = models.CharField(
+        max_length=50,
+    )
+    aggregate_id = models.UUIDField()
+    # All events of one aggregate share a partition, which is relayed in order
+    partition = models.PositiveSmallIntegerField()
+    event_type = models.CharField(
+        max_length=20,
+        choices=Type.choices,
+    )
+    payload = models.JSONField(
+        encoder=DjangoJSONEncoder,
+    )
+    created_at = models.DateTimeField(
+        default=timezone.now,
+    )
+
+    class Meta:
+        indexes = [
+            # The relay drains its partitions in id order
+            models.Index(fields=["partition", "id"], name="outbox_partition_id_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.aggregate_type}.{self.event_type} {self.aggregate_id}"
+
+    @staticmethod
+    def partition_for(aggregate_id):
+        return zlib.crc32(str(aggregate_id).encode()) % settings.OUTBOX["PARTITIONS"]
+
+    @classmethod
+    def for_instance(cls, instance, event_type):
+        return cls(
+            aggregate_type=instance._meta.concrete_model.__name__,
+            aggregate_id=instance.pk,
+            partition=cls.partition_for(instance.pk),
+            event_type=event_type,
+            payload=instance.outbox_payload(),
+        )
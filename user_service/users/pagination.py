@@ -0,0 +1,161 @@
+import base64
+import binascii
+import json
+import uuid
+from datetime import datetime
+
+from asgiref.sync import sync_to_async
+from django.db import connections
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+def estimated_count(queryset):
+    """
+    Returns the planner's row estimate for the queryset on PostgreSQL (pg_class.reltuples for a
+    whole table, the EXPLAIN estimate for a filtered one), or None where statistics are unavailable.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != "postgresql":
+        return None
+    with connection.cursor() as cursor:
+        if not queryset.query.where:
+            cursor.execute(
+                "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                [queryset.model._meta.db_table],
+            )
+            row = cursor.fetchone()
+            return max(row[0], 0) if row else None
+        sql, params = queryset.order_by().values("pk").query.sql_with_params()
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return plan[0]["Plan"]["Plan Rows"]
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset (seek) pagination over (date_joined, id), newest first.
+
+    Each page is a single index range scan: no COUNT(*) and no OFFSET, so deep pages cost the
+    same as the first one. Cursors are opaque and only ever move forward. Pass ?count=estimated
+    to get a planner-statistics row estimate instead of an exact count.
+    """
+
+    ordering = ("-date_joined", "-id")
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    count_query_param = "count"
+    max_page_size = 100
+
+    def get_page_size(self, request):
+        page_size = api_settings.PAGE_SIZE or self.max_page_size
+        value = request.GET.get(self.page_size_query_param)
+        if value:
+            try:
+                page_size = int(value)
+            except ValueError:
+                pass
+        return max(1, min(page_size, self.max_page_size))
+
+    @staticmethod
+    def cursor_values(row):
+        return [row["date_joined"].isoformat(), str(row["id"])]
+
+    @staticmethod
+    def parse_cursor(values):
+        date_joined, pk = values
+        return datetime.fromisoformat(date_joined), uuid.UUID(pk)
+
+    @staticmethod
+    def seek(queryset, cursor):
+        date_joined, pk = cursor
+        # The leading date_joined <= bound keeps this an index range scan despite the OR
+        return queryset.filter(Q(date_joined__lte=date_joined) & (Q(date_joined__lt=date_joined) | Q(pk__lt=pk)))
+
+    def encode_cursor(self, row):
+        payload = json.dumps(self.cursor_values(row), separators=(",", ":"))
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+    def decode_cursor(self, request):
+        encoded = request.GET.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            padded = encoded + "=" * (-len(encoded) % 4)
+            values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            if not isinstance(values, list):
+                raise ValueError("A cursor is a list")
+            return self.parse_cursor(values)
+        except (binascii.Error, AttributeError, TypeError, ValueError):
+            # Cursors are only ever produced by encode_cursor, anything else was crafted or truncated
+            raise NotFound("Invalid cursor.")
+
+    def get_page_queryset(self, queryset, request):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        queryset = queryset.order_by(*self.ordering)
+        cursor = self.decode_cursor(request)
+        if cursor is not None:
+            queryset = self.seek(queryset, cursor)
+        # One extra row tells whether there is a next page without counting
+        return queryset[: self.page_size + 1]
+
+    def wants_count(self, request):
+        return request.GET.get(self.count_query_param) == "estimated"
+
+    def get_next_link(self, rows):
+        if len(rows) <= self.page_size:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(rows[self.page_size - 1]))
+
+    def build_page(self, rows, count=None):
+        page = {"next": self.get_next_link(rows), "results": rows[: self.page_size]}
+        if self.wants_count(self.request):
+            page["count"] = count
+        return page
+
+    # DRF (sync) interface, rows must expose "date_joined" and "id" keys
+    def paginate_queryset(self, queryset, request, view=None):
+        self.rows = list(self.get_page_queryset(queryset, request))
+        self.count = estimated_count(queryset) if self.wants_count(request) else None
+        return self.rows[: self.page_size]
+
+    def get_paginated_response(self, data):
+        page = self.build_page(self.rows, self.count)
+        page["results"] = data
+        return Response(page)
+
+    # Async interface for AsyncAPIView
+    async def apaginate(self, queryset, request):
+        rows = [row async for row in self.get_page_queryset(queryset, request)]
+        count = None
+        if self.wants_count(request):
+            count = await sync_to_async(estimated_count)(queryset)
+        return self.build_page(rows, count)
+
+
+class RankedKeysetPagination(KeysetPagination):
+    """Keyset pagination over (rank, id), best match first, for querysets annotated with a float `rank`."""
+
+    ordering = ("-rank", "-id")
+
+    @staticmethod
+    def cursor_values(row):
+        return [row["rank"], str(row["id"])]
+
+    @staticmethod
+    def parse_cursor(values):
+        rank, pk = values
+        return float(rank), uuid.UUID(pk)
+
+    @staticmethod
+    def seek(queryset, cursor):
+        rank, pk = cursor
+        return queryset.filter(Q(rank__lt=rank) | Q(rank=rank, pk__lt=pk))
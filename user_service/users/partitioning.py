@@ -0,0 +1,267 @@
+"""
+Moves the client table to hash partitions on account_id (PostgreSQL only).
+
+PostgreSQL needs the partition key in every unique index of a partitioned table, so the new
+table's primary key is (account_id, id), lookups by id alone get a plain (id) index, and its
+email, phone_number and domain indexes are plain ones. Global uniqueness of id, email,
+phone_number and domain is kept by a guard table with one row per key, maintained by triggers
+in the writing transaction.
+
+1. Migration 0008 creates the partitioned table, its indexes, the guard and a trigger
+   mirroring every write to users_baseclient into the new table and logging the written id.
+2. `manage.py partition_clients` copies the existing rows in id batches while the service runs.
+3. `manage.py partition_clients --swap` compares the row counts without blocking writers, then
+   under an exclusive lock checks only the rows written since, renames the tables and their
+   indexes, and keeps the old table as users_baseclient_unpartitioned.
+
+After the swap, many-to-many rows (groups, permissions) no longer have a foreign key to the
+client table, and new unique fields on BaseClient need a guard entry instead of a constraint.
+"""
+
+import re
+
+from django.db import transaction
+
+
+SOURCE = "users_baseclient"
+TARGET = "users_baseclient_partitioned"
+RETIRED = "users_baseclient_unpartitioned"
+GUARD = "users_baseclient_keys"
+# Ids written since the last copy check, filled by the mirror trigger
+CHANGES = "users_baseclient_changes"
+ID_INDEX = "baseclient_id_idx"
+GUARDED_KEYS = ("id", "email", "phone_number", "domain")
+# Indexes of the new table carry this suffix until the swap gives them the old names
+INDEX_SUFFIX = "_p"
+RETIRED_INDEX_SUFFIX = "_u"
+
+
+def client_columns(cursor, table=SOURCE):
+    """The table's writable columns, generated ones (the search columns) left out."""
+    cursor.execute(
+        "SELECT column_name FROM information_schema.columns "
+        "WHERE table_schema = current_schema() AND table_name = %s AND is_generated = 'NEVER' "
+        "ORDER BY ordinal_position",
+        [table],
+    )
+    return [row[0] for row in cursor.fetchall()]
+
+
+def table_indexes(cursor, table):
+    cursor.execute(
+        "SELECT indexname, indexdef FROM pg_indexes WHERE schemaname = current_schema() AND tablename = %s",
+        [table],
+    )
+    return cursor.fetchall()
+
+
+def partitioned_index_sql(name, definition, source=SOURCE, target=TARGET):
+    """
+    Rewrites an index of the source table for the partitioned one, e.g. for baseclient_role_joined_idx:
+    CREATE INDEX baseclient_role_joined_idx_p ON users_baseclient_partitioned USING btree (role, date_joined).
+    Unique indexes become plain ones, the guard table enforces them.
+    """
+    pattern = rf"^CREATE (?:UNIQUE )?INDEX {re.escape(name)} ON (?:ONLY )?(?:\S+\.)?{re.escape(source)} "
+    sql, replaced = re.subn(pattern, f"CREATE INDEX {name}{INDEX_SUFFIX} ON {target} ", definition)
+    if not replaced:
+        raise ValueError(f"Unexpected index definition: {definition}")
+    return sql
+
+
+def partitioned_indexes_sql(indexes, source=SOURCE, target=TARGET):
+    """
+    The indexes of the partitioned table for the (name, definition) rows of the source's: each
+    but the primary key rewritten, plus a plain (id) index standing in for the source's primary
+    key, which the (account_id, id) one cannot serve.
+    """
+    statements = [
+        partitioned_index_sql(name, definition, source, target)
+        for name, definition in indexes
+        if name != f"{source}_pkey"
+    ]
+    statements.append(f"CREATE INDEX {ID_INDEX}{INDEX_SUFFIX} ON {target} USING btree (id)")
+    return statements
+
+
+def guard_function_sql():
+    keys = ", ".join(f"('{key}', {{row}}.{key}::text)" for key in GUARDED_KEYS)
+    return f"""
+        CREATE OR REPLACE FUNCTION {GUARD}_sync() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                DELETE FROM {GUARD} WHERE client_id = OLD.id AND (kind, value) IN ({keys.format(row="OLD")});
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                INSERT INTO {GUARD} (kind, value, client_id)
+                SELECT kind, value, NEW.id FROM (VALUES {keys.format(row="NEW")}) AS keys (kind, value);
+            END IF;
+            RETURN NULL;
+        END $$
+    """
+
+
+def mirror_function_sql(columns):
+    """
+    An update is mirrored as delete and insert, which also moves rows whose account_id changed.
+    The written id is logged for the swap, which re-checks only those rows under its lock.
+    """
+    names = ", ".join(columns)
+    values = ", ".join(f"NEW.{column}" for column in columns)
+    return f"""
+        CREATE OR REPLACE FUNCTION {SOURCE}_mirror() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                DELETE FROM {TARGET} WHERE account_id = OLD.account_id AND id = OLD.id;
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                INSERT INTO {TARGET} ({names}) VALUES ({values});
+            END IF;
+            INSERT INTO {CHANGES} (client_id) VALUES (COALESCE(NEW.id, OLD.id));
+            RETURN NULL;
+        END $$
+    """
+
+
+def create_partitioned_table(connection, partitions):
+    """Creates the empty partitioned table, its indexes, the guard and the mirror trigger."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"CREATE TABLE {TARGET} (LIKE {SOURCE} INCLUDING DEFAULTS INCLUDING GENERATED INCLUDING CONSTRAINTS) "
+            "PARTITION BY HASH (account_id)"
+        )
+        cursor.execute(f"ALTER TABLE {TARGET} ADD CONSTRAINT {TARGET}_pkey PRIMARY KEY (account_id, id)")
+        for remainder in range(partitions):
+            cursor.execute(
+                f"CREATE TABLE {SOURCE}_p{remainder} PARTITION OF {TARGET} "
+                f"FOR VALUES WITH (MODULUS {partitions}, REMAINDER {remainder})"
+            )
+        for statement in partitioned_indexes_sql(table_indexes(cursor, SOURCE)):
+            cursor.execute(statement)
+
+        cursor.execute(
+            f"CREATE TABLE {GUARD} (kind varchar(20) NOT NULL, value varchar(255) NOT NULL, "
+            "client_id uuid NOT NULL, PRIMARY KEY (kind, value))"
+        )
+        cursor.execute(guard_function_sql())
+        cursor.execute(
+            f"CREATE TRIGGER {GUARD}_insert_delete AFTER INSERT OR DELETE ON {TARGET} "
+            f"FOR EACH ROW EXECUTE FUNCTION {GUARD}_sync()"
+        )
+        changed = " OR ".join(f"OLD.{key} IS DISTINCT FROM NEW.{key}" for key in GUARDED_KEYS)
+        cursor.execute(
+            f"CREATE TRIGGER {GUARD}_update AFTER UPDATE ON {TARGET} "
+            f"FOR EACH ROW WHEN ({changed}) EXECUTE FUNCTION {GUARD}_sync()"
+        )
+
+        cursor.execute(f"CREATE TABLE {CHANGES} (client_id uuid NOT NULL)")
+        cursor.execute(mirror_function_sql(client_columns(cursor)))
+        cursor.execute(
+            f"CREATE TRIGGER {SOURCE}_mirror AFTER INSERT OR UPDATE OR DELETE ON {SOURCE} "
+            f"FOR EACH ROW EXECUTE FUNCTION {SOURCE}_mirror()"
+        )
+
+
+def drop_partitioned_table(connection):
+    with connection.cursor() as cursor:
+        cursor.execute(f"DROP TRIGGER IF EXISTS {SOURCE}_mirror ON {SOURCE}")
+        cursor.execute(f"DROP FUNCTION IF EXISTS {SOURCE}_mirror()")
+        cursor.execute(f"DROP TABLE IF EXISTS {CHANGES}")
+        cursor.execute(f"DROP TABLE IF EXISTS {TARGET}")
+        cursor.execute(f"DROP FUNCTION IF EXISTS {GUARD}_sync()")
+        cursor.execute(f"DROP TABLE IF EXISTS {GUARD}")
+
+
+def is_prepared(connection):
+    """Whether migration 0008 created the partitioned table and it was not swapped in yet."""
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT to_regclass(%s)", [TARGET])
+        return cursor.fetchone()[0] is not None
+
+
+def copy_batch(connection, after, batch_size):
+    """
+    Copies the next batch_size rows after the `after` id (start from the nil UUID) into the
+    partitioned table, returns the last copied id or None when done. Source rows are locked FOR
+    SHARE, so concurrent writes wait and are then mirrored; rows already mirrored are skipped.
+    """
+    with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+        columns = ", ".join(client_columns(cursor))
+        cursor.execute(f"SELECT id FROM {SOURCE} WHERE id > %s ORDER BY id LIMIT %s", [after, batch_size])
+        ids = cursor.fetchall()
+        if not ids:
+            return None
+        last = ids[-1][0]
+        cursor.execute(
+            f"INSERT INTO {TARGET} ({columns}) SELECT {columns} FROM {SOURCE} WHERE id > %s AND id <= %s FOR SHARE "
+            "ON CONFLICT (account_id, id) DO NOTHING",
+            [after, last],
+        )
+        return last
+
+
+def changed_rows_sql(columns):
+    """Ids logged since the last check whose row differs between the tables, or is in only one of them."""
+    source_row = ", ".join(f"s.{column}" for column in columns)
+    target_row = ", ".join(f"t.{column}" for column in columns)
+    return (
+        f"SELECT c.client_id FROM (SELECT DISTINCT client_id FROM {CHANGES}) c "
+        f"LEFT JOIN {SOURCE} s ON s.id = c.client_id LEFT JOIN {TARGET} t ON t.id = c.client_id "
+        f"WHERE (s.id IS NULL) <> (t.id IS NULL) OR ROW({source_row}) IS DISTINCT FROM ROW({target_row}) LIMIT 10"
+    )
+
+
+def verify_copy(connection):
+    """
+    Compares the row counts of both tables in one snapshot, without blocking writers, and clears
+    the ids that snapshot covers from the change log. Raises RuntimeError if the copy is incomplete.
+    """
+    with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+        cursor.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ")
+        cursor.execute(f"SELECT (SELECT count(*) FROM {SOURCE}), (SELECT count(*) FROM {TARGET})")
+        source_rows, target_rows = cursor.fetchone()
+        if source_rows != target_rows:
+            raise RuntimeError(f"{TARGET} has {target_rows} rows, {SOURCE} {source_rows}: finish the copy first")
+        # Deletes only the log rows visible to the snapshot; later writes stay logged for the swap
+        cursor.execute(f"DELETE FROM {CHANGES}")
+
+
+def swap_tables(connection):
+    """
+    Puts the partitioned table in place of users_baseclient. The full comparison runs before the
+    exclusive lock (verify_copy); under the lock only the rows written since are compared, then
+    the tables are renamed in the same transaction. Raises RuntimeError, changing nothing, if the
+    copy is incomplete.
+    """
+    verify_copy(connection)
+    lock_and_swap(connection)
+
+
+def lock_and_swap(connection):
+    """The locked part of swap_tables(), to run right after verify_copy()."""
+    with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+        cursor.execute(f"LOCK TABLE {SOURCE} IN ACCESS EXCLUSIVE MODE")
+        cursor.execute(changed_rows_sql(client_columns(cursor)))
+        differing = [row[0] for row in cursor.fetchall()]
+        if differing:
+            raise RuntimeError(f"{TARGET} differs from {SOURCE} for ids {differing}: run the copy again")
+
+        cursor.execute(f"DROP TRIGGER {SOURCE}_mirror ON {SOURCE}")
+        cursor.execute(f"DROP FUNCTION {SOURCE}_mirror()")
+        cursor.execute(f"DROP TABLE {CHANGES}")
+        # A foreign key needs a unique index on id alone, which a partitioned table cannot have
+        cursor.execute(
+            "SELECT conrelid::regclass::text, conname FROM pg_constraint "
+            "WHERE contype = 'f' AND confrelid = %s::regclass",
+            [SOURCE],
+        )
+        for table, constraint in cursor.fetchall():
+            cursor.execute(f"ALTER TABLE {table} DROP CONSTRAINT {constraint}")
+
+        cursor.execute(f"ALTER TABLE {SOURCE} RENAME TO {RETIRED}")
+        for name, _ in table_indexes(cursor, RETIRED):
+            cursor.execute(f"ALTER INDEX {name} RENAME TO {name}{RETIRED_INDEX_SUFFIX}")
+        cursor.execute(f"ALTER TABLE {TARGET} RENAME TO {SOURCE}")
+        cursor.execute(f"ALTER INDEX {TARGET}_pkey RENAME TO {SOURCE}_pkey")
+        for name, _ in table_indexes(cursor, SOURCE):
+            if name.endswith(INDEX_SUFFIX):
+                cursor.execute(f"ALTER INDEX {name} RENAME TO {name[: -len(INDEX_SUFFIX)]}")
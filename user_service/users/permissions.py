@@ -0,0 +1,54 @@
+import uuid
+
+from rest_framework.permissions import SAFE_METHODS, BasePermission
+
+from .models import BaseClient, BaseUser
+
+
+def is_internal(user):
+    """Admin and Staff users; every other principal is a client limited to its account."""
+    return getattr(user, "role", None) in BaseUser.Role.values
+
+
+def is_admin(user):
+    return getattr(user, "role", None) == BaseUser.Role.ADMIN
+
+
+def account_scope(user):
+    """None for Admin and Staff users, otherwise the account id a client's requests are limited to."""
+    if is_internal(user):
+        return None
+    return uuid.UUID(str(user.account_id))
+
+
+class IsInternal(BasePermission):
+    message = "Only Admin and Staff users may access this resource."
+
+    def has_permission(self, request, view):
+        return is_internal(request.user)
+
+
+class IsAdminOrReadOnly(BasePermission):
+    message = "Only Admin users may change this resource."
+
+    def has_permission(self, request, view):
+        return request.method in SAFE_METHODS or is_admin(request.user)
+
+
+class IsInternalOrAccountMember(BasePermission):
+    """
+    Admin and Staff users, or clients with an account claim, which views limit to that account.
+    Account users may only read; views that never write set `read_only = True`.
+    """
+
+    message = "This account does not allow the request."
+
+    def has_permission(self, request, view):
+        user = request.user
+        if is_internal(user):
+            return True
+        if getattr(user, "account_id", None) is None:
+            return False
+        if request.method in SAFE_METHODS or getattr(view, "read_only", False):
+            return True
+        return user.role == BaseClient.Role.ACCOUNT_OWNER
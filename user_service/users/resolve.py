@@ -0,0 +1,29 @@
+from django.contrib.auth.base_user import BaseUserManager
+
+from .models import BaseClient
+
+
+# Each is unique, so each is backed by a unique index
+RESOLVE_KEY_TYPES = ("id", "email", "phone_number", "domain")
+MAX_RESOLVE_KEYS = 1000
+
+
+def resolve_clients(key_type, keys, account_id=None, using=None):
+    """
+    Maps every key to the {"id", "account_id"} of the client it names, or None for misses,
+    with a single `key_type = ANY(...)` query. With account_id, clients of other accounts are misses.
+    """
+    if key_type not in RESOLVE_KEY_TYPES:
+        raise ValueError(f"Unsupported key type: {key_type}")
+    lookups = {key: str(key) for key in keys}
+    if key_type == "email":
+        # Stored emails have a normalized domain, the response keeps the keys as given
+        lookups = {key: BaseUserManager.normalize_email(key) for key in keys}
+    queryset = BaseClient.objects.using(using)
+    if account_id is not None:
+        queryset = queryset.for_account(account_id)
+    rows = queryset.filter(**{f"{key_type}__any": list(set(lookups.values()))}).values_list(
+        key_type, "id", "account_id"
+    )
+    found = {str(value): {"id": pk, "account_id": account_id} for value, pk, account_id in rows}
+    return {str(key): found.get(lookup) for key, lookup in lookups.items()}
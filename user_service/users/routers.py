@@ -0,0 +1,95 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+class RoutingState:
+    """Per request (or per Celery task) routing flags, shared by reference across sync/async hops."""
+
+    __slots__ = ("pinned", "wrote")
+
+    def __init__(self, pinned=False):
+        self.pinned = pinned
+        self.wrote = False
+
+
+_routing_state = ContextVar("routing_state", default=None)
+
+
+def start_routing(pinned=False):
+    """Starts a fresh routing scope, returns the token to pass to end_routing()."""
+    return _routing_state.set(RoutingState(pinned))
+
+
+def end_routing(token):
+    _routing_state.reset(token)
+
+
+def get_routing_state():
+    state = _routing_state.get()
+    if state is None:
+        # Outside a request or task scope (commands, shells) nothing is remembered, so a pin
+        # cannot outlive its unit of work; every read goes to the primary instead
+        return RoutingState(pinned=True)
+    return state
+
+
+def pin_primary():
+    """Sends every later read of the current scope to the primary."""
+    get_routing_state().pinned = True
+
+
+@contextmanager
+def primary_reads():
+    """Reads inside the block go to the primary, the scope's pinning is restored afterwards."""
+    state = get_routing_state()
+    pinned = state.pinned
+    state.pinned = True
+    try:
+        yield
+    finally:
+        state.pinned = pinned
+
+
+class ReplicaRouter:
+    """
+    Sends reads of the users app to a random alias of settings.DATABASE_REPLICAS and writes to
+    the primary. After a write the scope is pinned to the primary, so a request reads its own
+    writes; ReplicaPinningMiddleware carries the pin over to the client's next requests for
+    REPLICA_STICKY_SECONDS. Reads inside a transaction on the primary stay on the primary.
+    """
+
+    route_app_labels = {"users"}
+
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label not in self.route_app_labels:
+            return None
+        replicas = settings.DATABASE_REPLICAS
+        if not replicas or get_routing_state().pinned or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        instance = hints.get("instance")
+        if instance is not None and instance._state.db:
+            return instance._state.db
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        if model._meta.app_label not in self.route_app_labels:
+            return None
+        state = get_routing_state()
+        state.pinned = state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas receive the schema through replication
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
@@ -0,0 +1,54 @@
+from functools import reduce
+from operator import or_
+
+from django.db import connections
+from django.db.models import BooleanField, Case, FloatField, Q, Value, When
+from django.db.models.expressions import RawSQL
+
+from .models import BaseClient
+
+
+SEARCH_FIELDS = ("first_name", "last_name", "email", "company_name", "domain", "city")
+MAX_QUERY_LENGTH = 100
+
+
+def postgres_search(queryset, term):
+    """
+    Matches the search_vector (full text) or search_text (trigram word similarity, so typos match)
+    generated columns of migration 0007, each served by a GIN index. Ranked by both scores.
+    """
+    table = queryset.model._meta.db_table
+    vector, text = f'"{table}"."search_vector"', f'"{table}"."search_text"'
+    matches = RawSQL(
+        f"({vector} @@ websearch_to_tsquery('simple', %s) OR %s <%% {text})",
+        (term, term.lower()),
+        output_field=BooleanField(),
+    )
+    rank = RawSQL(
+        f"(ts_rank_cd({vector}, websearch_to_tsquery('simple', %s)) + word_similarity(%s, {text}))::float8",
+        (term, term.lower()),
+        output_field=FloatField(),
+    )
+    return queryset.filter(matches).annotate(rank=rank)
+
+
+def fallback_search(queryset, term):
+    """Every word is a substring of some searched field; rows where a field starts with the query rank first."""
+    for word in term.split():
+        queryset = queryset.filter(reduce(or_, (Q(**{f"{name}__icontains": word}) for name in SEARCH_FIELDS)))
+    prefix = reduce(or_, (Q(**{f"{name}__istartswith": term}) for name in SEARCH_FIELDS))
+    return queryset.annotate(rank=Case(When(prefix, then=Value(1.0)), default=Value(0.5), output_field=FloatField()))
+
+
+def search_clients(term, queryset=None):
+    """
+    Filters the clients to those matching `term` and annotates them with a float `rank`, higher
+    is better. PostgreSQL uses the indexed search columns, other databases (the offline test
+    settings) a substring scan.
+    """
+    if queryset is None:
+        queryset = BaseClient.objects.all()
+    term = " ".join(term.split())[:MAX_QUERY_LENGTH]
+    if connections[queryset.db].vendor == "postgresql":
+        return postgres_search(queryset, term)
+    return fallback_search(queryset, term)
@@ -0,0 +1,105 @@
+import uuid
+
+from django.utils.translation import gettext_lazy as _
+from rest_framework import serializers
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+
+from .authentication import ACCOUNT_ID_CLAIM, ROLE_CLAIM, is_token_revoked, prime_revocation
+from .models import DOMAIN_REGEX, PHONE_NUMBER_REGEX, BaseClient, BaseUser
+from .resolve import MAX_RESOLVE_KEYS, RESOLVE_KEY_TYPES
+
+
+class UserClaimsTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """Signs the claims ClaimsJWTAuthentication needs into the issued tokens."""
+
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        token[ROLE_CLAIM] = user.role
+        account_id = getattr(user, "account_id", None)
+        if account_id is not None:
+            token[ACCOUNT_ID_CLAIM] = str(account_id)
+        prime_revocation(user)
+        return token
+
+
+class UserClaimsTokenRefreshSerializer(TokenRefreshSerializer):
+    """Refuses refresh tokens issued before the user's or client's last revocation, whose claims may be stale."""
+
+    def validate(self, attrs):
+        if is_token_revoked(self.token_class(attrs["refresh"])):
+            raise InvalidToken(_("Token has been revoked"))
+        return super().validate(attrs)
+
+
+# ======= API payloads =======
+# Plain serializers: validation never queries, uniqueness is left to the database constraints.
+class UserCreateSerializer(serializers.Serializer):
+    email = serializers.EmailField()
+    password = serializers.CharField(write_only=True, required=False, allow_blank=False)
+    first_name = serializers.CharField(max_length=100, required=False, allow_blank=True)
+    last_name = serializers.CharField(max_length=100, required=False, allow_blank=True)
+    role = serializers.ChoiceField(choices=BaseUser.Role.choices, default=BaseUser.Role.STAFF)
+    is_active = serializers.BooleanField(default=True)
+
+
+class UserUpdateSerializer(serializers.Serializer):
+    first_name = serializers.CharField(max_length=100, required=False, allow_blank=True)
+    last_name = serializers.CharField(max_length=100, required=False, allow_blank=True)
+    role = serializers.ChoiceField(choices=BaseUser.Role.choices, required=False)
+    is_active = serializers.BooleanField(required=False)
+
+
+class ClientCreateSerializer(serializers.Serializer):
+    email = serializers.EmailField()
+    password = serializers.CharField(write_only=True, required=False, allow_blank=False)
+    first_name = serializers.CharField(max_length=100, required=False, allow_blank=True)
+    last_name = serializers.CharField(max_length=100, required=False, allow_blank=True)
+    phone_number = serializers.RegexField(
+        PHONE_NUMBER_REGEX, max_length=15, error_messages={"invalid": _("Must be 10-15 digits long.")}
+    )
+    company_name = serializers.CharField(max_length=255)
+    country = serializers.CharField(max_length=100)
+    city = serializers.CharField(max_length=100)
+    domain = serializers.RegexField(DOMAIN_REGEX, max_length=255)
+    account_id = serializers.UUIDField()
+    subaccount_id = serializers.UUIDField()
+    role = serializers.ChoiceField(choices=BaseClient.Role.choices, default=BaseClient.Role.ACCOUNT_USER)
+    is_active = serializers.BooleanField(default=True)
+
+
+class ClientUpdateSerializer(serializers.Serializer):
+    first_name = serializers.CharField(max_length=100, required=False, allow_blank=True)
+    last_name = serializers.CharField(max_length=100, required=False, allow_blank=True)
+    phone_number = serializers.RegexField(
+        PHONE_NUMBER_REGEX, max_length=15, required=False, error_messages={"invalid": _("Must be 10-15 digits long.")}
+    )
+    company_name = serializers.CharField(max_length=255, required=False)
+    country = serializers.CharField(max_length=100, required=False)
+    city = serializers.CharField(max_length=100, required=False)
+    account_id = serializers.UUIDField(required=False)
+    subaccount_id = serializers.UUIDField(required=False)
+    is_active = serializers.BooleanField(required=False)
+
+
+class ClientResolveSerializer(serializers.Serializer):
+    type = serializers.ChoiceField(choices=RESOLVE_KEY_TYPES)
+    keys = serializers.ListField(child=serializers.CharField(max_length=255), min_length=1, max_length=MAX_RESOLVE_KEYS)
+
+    def validate(self, attrs):
+        if attrs["type"] == "id":
+            try:
+                attrs["keys"] = [uuid.UUID(key) for key in attrs["keys"]]
+            except ValueError:
+                raise serializers.ValidationError({"keys": [_("Ids must be valid UUIDs.")]})
+        return attrs
+
+
+class AccountCreateSerializer(serializers.Serializer):
+    id = serializers.UUIDField(required=False)
+    parent_id = serializers.UUIDField(required=False, allow_null=True, default=None)
+
+
+class AccountMoveSerializer(serializers.Serializer):
+    parent_id = serializers.UUIDField(allow_null=True)
@@ -0,0 +1,273 @@
+import csv
+import json
+import logging
+import uuid
+from dataclasses import dataclass, field
+from itertools import islice
+
+from django.contrib.auth.base_user import BaseUserManager
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import DEFAULT_DB_ALIAS, IntegrityError, transaction
+
+from .hashing import PasswordHasherPool, password_hasher
+from .models import DOMAIN_REGEX, PHONE_NUMBER_REGEX, BaseClient, OutboxEvent
+from .tasks import dispatch_users_created
+
+
+logger = logging.getLogger(__name__)
+
+
+IMPORT_FIELDS = (
+    "first_name",
+    "last_name",
+    "email",
+    "phone_number",
+    "company_name",
+    "country",
+    "city",
+    "domain",
+    "role",
+    "password",
+    "account_id",
+    "subaccount_id",
+    "is_active",
+)
+# JSONL values keep their JSON type; these fields must be strings, the others are converted
+TEXT_IMPORT_FIELDS = tuple(name for name in IMPORT_FIELDS if name not in ("account_id", "subaccount_id", "is_active"))
+REQUIRED_IMPORT_FIELDS = ("email", "phone_number", "company_name", "country", "city", "domain")
+UNIQUE_IMPORT_FIELDS = ("email", "phone_number", "domain")
+TRUE_VALUES = ("1", "true", "yes", "y", "on")
+
+
+# ======= Bulk client import =======
+@dataclass
+class RowError:
+    line: int
+    message: str
+    field: str = None
+
+    def __str__(self):
+        prefix = f"line {self.line}"
+        if self.field:
+            prefix = f"{prefix} [{self.field}]"
+        return f"{prefix}: {self.message}"
+
+
+@dataclass
+class ImportReport:
+    created: int = 0
+    errors: list = field(default_factory=list)
+
+    @property
+    def failed(self):
+        return len(self.errors)
+
+
+def read_rows(stream, fmt="csv"):
+    """
+    Lazily yields (line, row) pairs from a CSV or JSONL stream.
+    Rows that cannot be parsed are yielded as ValueError instances.
+    """
+    if fmt == "csv":
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+    elif fmt == "jsonl":
+        for line, raw in enumerate(stream, start=1):
+            if not raw.strip():
+                continue
+            try:
+                row = json.loads(raw)
+            except json.JSONDecodeError as e:
+                yield line, ValueError(f"Invalid JSON: {e.msg}")
+                continue
+            if not isinstance(row, dict):
+                row = ValueError("Each JSONL line must be an object")
+            yield line, row
+    else:
+        raise ValueError(f"Unsupported import format: {fmt}")
+
+
+def _numbered(rows):
+    for line, row in enumerate(rows, start=1):
+        if isinstance(row, tuple):
+            yield row
+        else:
+            yield line, row
+
+
+def _batches(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def _to_uuid(value):
+    if isinstance(value, uuid.UUID):
+        return value
+    return uuid.UUID(str(value))
+
+
+def _to_bool(value):
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in TRUE_VALUES
+
+
+def clean_client_row(row, defaults, roles):
+    """Validates a single row and returns model field values, raises ValidationError otherwise."""
+    data = {name: defaults.get(name) for name in IMPORT_FIELDS}
+    for name in IMPORT_FIELDS:
+        value = row.get(name)
+        if value is not None and value != "":
+            data[name] = value.strip() if isinstance(value, str) else value
+
+    errors = {}
+    for name in TEXT_IMPORT_FIELDS:
+        if data[name] is not None and not isinstance(data[name], str):
+            errors[name] = "Must be a string."
+            data[name] = None
+    for name in REQUIRED_IMPORT_FIELDS:
+        if not data[name] and name not in errors:
+            errors[name] = "This field is required."
+
+    if data["email"]:
+        data["email"] = BaseUserManager.normalize_email(data["email"])
+        try:
+            validate_email(data["email"])
+        except ValidationError:
+            errors["email"] = "Enter a valid email address."
+    if data["phone_number"] and not PHONE_NUMBER_REGEX.match(data["phone_number"]):
+        errors["phone_number"] = "Invalid phone number format. Must be 10-15 digits long."
+    if data["domain"]:
+        data["domain"] = data["domain"].lower()
+        if not DOMAIN_REGEX.match(data["domain"]):
+            errors["domain"] = "Enter a valid domain name."
+
+    data["role"] = data["role"] or BaseClient.Role.ACCOUNT_USER
+    if data["role"] not in roles:
+        errors["role"] = f"Invalid role: {data['role']}"
+
+    for name in ("account_id", "subaccount_id"):
+        try:
+            data[name] = _to_uuid(data[name])
+        except (TypeError, ValueError):
+            errors[name] = "Enter a valid UUID."
+
+    data["is_active"] = True if data["is_active"] is None else _to_bool(data["is_active"])
+    data["first_name"] = data["first_name"] or ""
+    data["last_name"] = data["last_name"] or ""
+
+    if errors:
+        raise ValidationError(errors)
+    return data
+
+
+def _existing_values(model, using, batch):
+    """Fetches already stored unique values for a batch with one query per unique field."""
+    manager = model._base_manager.db_manager(using)
+    existing = {}
+    for name in UNIQUE_IMPORT_FIELDS:
+        values = {data[name] for _, data in batch}
+        existing[name] = set(manager.filter(**{f"{name}__in": values}).values_list(name, flat=True))
+    return existing
+
+
+def _record_created_events(objs, using, batch_size=None):
+    events = [OutboxEvent.for_instance(obj, OutboxEvent.Type.CREATED) for obj in objs]
+    OutboxEvent.objects.using(using).bulk_create(events, batch_size=batch_size)
+
+
+def _insert_batch(model, using, batch, batch_size, report):
+    manager = model._base_manager.db_manager(using)
+    objs = [model(**data) for _, data in batch]
+    try:
+        with transaction.atomic(using=using):
+            manager.bulk_create(objs, batch_size=batch_size)
+            # bulk_create calls no save() and sends no post_save: record the events and queue the tasks here
+            _record_created_events(objs, using, batch_size)
+            dispatch_users_created(model, [obj.pk for obj in objs], using=using)
+        report.created += len(objs)
+        return
+    except IntegrityError:
+        logger.warning(f"Bulk insert of {len(objs)} rows failed, retrying row by row")
+
+    # Fall back to one insert per row so a concurrent duplicate only rejects its own row
+    created = []
+    for (line, _), obj in zip(batch, objs):
+        try:
+            with transaction.atomic(using=using):
+                manager.bulk_create([obj])
+                _record_created_events([obj], using)
+            created.append(obj.pk)
+        except IntegrityError as e:
+            report.errors.append(RowError(line, str(e)))
+    report.created += len(created)
+    dispatch_users_created(model, created, using=using)
+
+
+def _import_batch(model, using, rows, defaults, seen, hasher, batch_size, report):
+    roles = BaseClient.Role.values
+    errors = []
+    valid = []
+    for line, row in rows:
+        if isinstance(row, Exception):
+            errors.append(RowError(line, str(row)))
+            continue
+        try:
+            valid.append((line, clean_client_row(row, defaults, roles)))
+        except ValidationError as e:
+            for name, messages in e.message_dict.items():
+                errors.append(RowError(line, " ".join(messages), name))
+
+    existing = _existing_values(model, using, valid) if valid else {}
+    accepted = []
+    for line, data in valid:
+        duplicate = None
+        for name in UNIQUE_IMPORT_FIELDS:
+            if data[name] in existing[name]:
+                duplicate = RowError(line, f"A client with this {name} already exists.", name)
+            elif data[name] in seen[name]:
+                duplicate = RowError(line, f"Duplicate {name} in import.", name)
+            if duplicate:
+                break
+        if duplicate:
+            errors.append(duplicate)
+            continue
+        for name in UNIQUE_IMPORT_FIELDS:
+            seen[name].add(data[name])
+        accepted.append((line, data))
+
+    report.errors.extend(sorted(errors, key=lambda error: error.line))
+
+    if not accepted:
+        return
+    hashed = hasher.hash_many([data["password"] for _, data in accepted])
+    for (_, data), password in zip(accepted, hashed):
+        data["password"] = password
+    _insert_batch(model, using, accepted, batch_size, report)
+
+
+def bulk_import_clients(rows, model=BaseClient, using=None, batch_size=1000, workers=None, **defaults):
+    """
+    Streams client rows into the database with bulk_create, batch_size rows at a time.
+    Passwords are hashed in the shared hashing pool, or a dedicated pool of `workers` processes (0 hashes inline).
+    Invalid rows are reported in the returned ImportReport and never abort the import.
+    """
+    if batch_size < 1:
+        raise ValueError("batch_size must be a positive integer")
+    using = using or DEFAULT_DB_ALIAS
+    report = ImportReport()
+    seen = {name: set() for name in UNIQUE_IMPORT_FIELDS}
+
+    hasher = password_hasher if workers is None else PasswordHasherPool(workers=workers)
+    try:
+        for rows_batch in _batches(_numbered(rows), batch_size):
+            _import_batch(model, using, rows_batch, defaults, seen, hasher, batch_size, report)
+    finally:
+        if hasher is not password_hasher:
+            hasher.shutdown()
+
+    logger.info(f"Client import finished: {report.created} created, {report.failed} failed")
+    return report
@@ -1,68 +1,49 @@
-import logging
-
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
-from users.models import AccountOwner, AccountUser, Admin, BaseClient, BaseUser, Staff
+from users.authentication import revoke_user_tokens
+from users.cache import user_cache
+from users.models import BaseClient, BaseUser, OutboxEvent
+from users.tasks import dispatch_users_created
+
+
+# The audit record is written by a Celery task once the save commits (users/tasks.py),
+# so the save itself stays a single INSERT.
+@receiver(post_save)
+def user_created(sender, instance, created, raw=False, using=None, **kwargs):
+    if not created or raw:
+        return
+    if isinstance(instance, (BaseUser, BaseClient)):
+        dispatch_users_created(type(instance), [instance.pk], using=using)
+
+
+@receiver(post_save)
+@receiver(post_delete)
+def invalidate_cached_user(sender, instance, using=None, **kwargs):
+    if isinstance(instance, (BaseUser, BaseClient)):
+        # Until the transaction commits other readers still see (and may cache) the old row
+        transaction.on_commit(lambda: user_cache.invalidate(instance), using=using)
 
 
-logger = logging.getLogger(__name__)
+@receiver(post_save)
+def revoke_tokens_on_auth_change(sender, instance, created, **kwargs):
+    if not isinstance(instance, (BaseUser, BaseClient)):
+        return
+    if not created and instance.changed_fields():
+        # Written in the saving transaction, so the revocation commits (or rolls back) with the change
+        instance.tokens_revoked_at = revoke_user_tokens(instance.pk, using=kwargs.get("using"), model=type(instance))
+    instance.reset_tracked_fields()
 
 
-@receiver(post_save, sender=BaseUser)
-def create_user_related_instance(sender, instance, created, **kwargs):
-    if created:
-        try:
-            if instance.role == BaseUser.Role.ADMIN:
-                Admin.objects.create_admin(
-                    first_name=instance.first_name,
-                    last_name=instance.last_name,
-                    email=instance.email,
-                )
-                logger.info(f"Admin created for user {instance.email}")
-            elif instance.role == BaseUser.Role.STAFF:
-                Staff.objects.create_staff(
-                    first_name=instance.first_name,
-                    last_name=instance.last_name,
-                    email=instance.email,
-                )
-                logger.info(f"Staff created for user {instance.email}")
-        except Exception as e:
-            # Errors logs
-            logger.error(f"Error creating related instance for user {instance.email}: {e}")
+@receiver(post_delete)
+def revoke_tokens_on_delete(sender, instance, using=None, **kwargs):
+    if isinstance(instance, (BaseUser, BaseClient)):
+        # The row is gone, which already revokes; this only refreshes the cached marker
+        revoke_user_tokens(instance.pk, using=using, model=type(instance))
 
 
-@receiver(post_save, sender=BaseClient)
-def create_account_related_instance(sender, instance, created, **kwargs):
-    if created:
-        try:
-            if instance.role == BaseClient.Role.ACCOUNT_OWNER:
-                AccountOwner.objects.create_account_owner(
-                    first_name=instance.first_name,
-                    last_name=instance.last_name,
-                    email=instance.email,
-                    phone_number=instance.phone_number,
-                    company_name=instance.company_name,
-                    country=instance.country,
-                    city=instance.city,
-                    domain=instance.domain,
-                    role=instance.role,
-                    password=instance.password,
-                )
-                logger.info(f"AccountOwner created for user {instance.email}")
-            elif instance.role == BaseClient.Role.ACCOUNT_USER:
-                AccountUser.objects.create_account_user(
-                    first_name=instance.first_name,
-                    last_name=instance.last_name,
-                    email=instance.email,
-                    phone_number=instance.phone_number,
-                    company_name=instance.company_name,
-                    country=instance.country,
-                    city=instance.city,
-                    domain=instance.domain,
-                    role=instance.role,
-                    password=instance.password,
-                )
-                logger.info(f"AccountUser created for user {instance.email}")
-        except Exception as e:
-            # Errors logs
-            logger.error(f"Error creating related instance for user {instance.email}: {e}")
+@receiver(post_delete)
+def record_delete_event(sender, instance, using=None, **kwargs):
+    # Deletion runs post_delete inside its transaction, so the event commits with the delete
+    if isinstance(instance, (BaseUser, BaseClient)):
+        OutboxEvent.for_instance(instance, OutboxEvent.Type.DELETED).save(using=using)
@@ -0,0 +1,94 @@
+import hashlib
+import logging
+from functools import partial
+
+from celery import Task, shared_task
+from celery.signals import task_postrun, task_prerun
+from django.core.cache import cache
+from django.db import InterfaceError, OperationalError, transaction
+
+from .routers import end_routing, start_routing
+
+
+logger = logging.getLogger(__name__)
+audit_logger = logging.getLogger("users.audit")
+
+
+# Transient failures worth retrying; anything else is a bug and fails the task at once
+RETRY_ON = (OperationalError, InterfaceError, ConnectionError, TimeoutError)
+IDEMPOTENCY_CLAIM_TIMEOUT = 60 * 10  # Longer than any task runs, so a dead worker's claim expires
+IDEMPOTENCY_DONE_TIMEOUT = 60 * 60 * 24 * 7  # Longer than a message can stay in the broker
+
+
+class IdempotentTask(Task):
+    """
+    Runs at most once per `idempotency_key` keyword argument: the key is claimed in the cache
+    before the task runs and kept as done afterwards, so redelivered or resent messages
+    (acks_late, retries of the dispatch) are skipped. A failed run releases its claim.
+    Transient database and connection errors are retried with jittered exponential backoff.
+    """
+
+    autoretry_for = RETRY_ON
+    max_retries = 5
+    retry_backoff = True
+    retry_backoff_max = 60 * 10
+    retry_jitter = True
+    typing = False  # idempotency_key is consumed by __call__, not part of the task signatures
+
+    def __call__(self, *args, idempotency_key=None, **kwargs):
+        # The worker already pushed the request; Task.__call__ would replace it and break retries
+        if idempotency_key is None:
+            return self.run(*args, **kwargs)
+        key = f"task:{idempotency_key}"
+        if not cache.add(key, "running", IDEMPOTENCY_CLAIM_TIMEOUT):
+            logger.info(f"Skipping {self.name}, {idempotency_key} already ran")
+            return None
+        try:
+            result = self.run(*args, **kwargs)
+        except BaseException:
+            # Including celery.exceptions.Retry: the retry is a new delivery that claims the key again
+            cache.delete(key)
+            raise
+        cache.set(key, "done", IDEMPOTENCY_DONE_TIMEOUT)
+        return result
+
+
+# Every task runs in its own replica routing scope, like a request: a write pins only that task
+_routing_tokens = {}
+
+
+@task_prerun.connect
+def start_task_routing(task_id=None, **kwargs):
+    _routing_tokens[task_id] = start_routing()
+
+
+@task_postrun.connect
+def end_task_routing(task_id=None, **kwargs):
+    token = _routing_tokens.pop(task_id, None)
+    if token is not None:
+        end_routing(token)
+
+
+@shared_task(base=IdempotentTask)
+def record_audit_events(label, pks, action):
+    for pk in pks:
+        audit_logger.info(f"{label} {pk} {action}", extra={"action": action, "model": label, "object_id": pk})
+
+
+def dispatch_users_created(model, pks, using=None):
+    """
+    Queues the audit task for `pks` once the current transaction commits, so workers never see
+    rows that may still roll back. Role setup needs no task (the roles are proxies over the
+    created rows) and the created events are published from the outbox, so this is one message
+    per batch with no reads. The idempotency key is derived from the rows it covers.
+    """
+    pks = [str(pk) for pk in pks]
+    if not pks:
+        return
+    label = model._meta.label
+    ident = pks[0] if len(pks) == 1 else hashlib.sha1(",".join(sorted(pks)).encode()).hexdigest()
+    kwargs = {"action": "created", "idempotency_key": f"{record_audit_events.name}:{label}:{ident}"}
+    # robust: a broker outage is logged and must not fail the request that already committed
+    transaction.on_commit(
+        partial(record_audit_events.apply_async, args=(label, pks), kwargs=kwargs), using=using, robust=True
+    )
@@ -1,7 +1,12 @@
+import hashlib
 import os
+from pathlib import Path
 
 import pytest
-from faker import Faker
+from django.core.cache import cache
+from users.accounts import account_membership
+from users.cache import user_cache
+from users.routers import end_routing, start_routing
 
 from .factories import AccountOwnerFactory, AccountUserFactory, AdminFactory, StaffFactory
 
@@ -9,6 +14,47 @@ from .factories import AccountOwnerFactory, AccountUserFactory, AdminFactory, St
 if not os.environ.get("DJANGO_SETTINGS_MODULE"):
     raise RuntimeError("DJANGO_SETTINGS_MODULE is not set")
 
+APP_DIR = Path(__file__).resolve().parents[1]
+SCHEMA_SNAPSHOT_DIR = APP_DIR.parent / ".pytest_db"
+
+
+def schema_fingerprint():
+    """Changes with the models and migrations, so a reused test database never has a stale schema"""
+    digest = hashlib.sha1()
+    for path in sorted([APP_DIR / "models.py", *(APP_DIR / "migrations").glob("*.py")]):
+        digest.update(path.read_bytes())
+    return digest.hexdigest()[:12]
+
+
+def use_schema_snapshot(databases, fingerprint):
+    """
+    Points every test database at a name derived from the schema fingerprint. With --reuse-db the
+    schema built by the first session is kept (SQLite in a file under .pytest_db) and later sessions
+    skip creating it; a model or migration change gets a fresh database under a new name.
+    """
+    for alias, config in databases.items():
+        test = config.setdefault("TEST", {})
+        if test.get("MIRROR"):
+            continue
+        if config["ENGINE"].endswith("sqlite3"):
+            SCHEMA_SNAPSHOT_DIR.mkdir(exist_ok=True)
+            for stale in SCHEMA_SNAPSHOT_DIR.glob(f"{alias}_*.sqlite3"):
+                if stale.stem != f"{alias}_{fingerprint}":
+                    stale.unlink()
+            test["NAME"] = str(SCHEMA_SNAPSHOT_DIR / f"{alias}_{fingerprint}.sqlite3")
+        else:
+            test["NAME"] = f"test_{config['NAME']}_{fingerprint}"
+
+
+@pytest.fixture(scope="session")
+def django_db_modify_db_settings(request):
+    from django.conf import settings
+
+    if request.config.getvalue("reuse_db") and not request.config.getvalue("create_db"):
+        use_schema_snapshot(settings.DATABASES, schema_fingerprint())
+    # Applied last, so parallel workers still get their own copy of the snapshot
+    request.getfixturevalue("django_db_modify_db_settings_parallel_suffix")
+
 
 @pytest.fixture
 def admin(db):
@@ -30,9 +76,18 @@ def account_user(db):
     return AccountUserFactory()
 
 
-@pytest.fixture(scope="session", autouse=True)
-def clear_faker_unique():
-    """Clean the cache of Faker unique values after tests execution"""
+@pytest.fixture(autouse=True)
+def clear_caches():
+    """Start every test with empty shared and in-process caches"""
+    cache.clear()
+    user_cache.local.clear()
+    account_membership.local.clear()
+    yield
+
+
+@pytest.fixture(autouse=True)
+def routing_scope():
+    """Run every test in its own replica routing scope, like a request"""
+    token = start_routing()
     yield
-    fake = Faker()
-    fake.unique.clear()
+    end_routing(token)
@@ -1,7 +1,7 @@
-import secrets
-import string
+import uuid
 
 import factory
+from django.contrib.auth.hashers import make_password
 from django.utils import timezone
 from factory.django import DjangoModelFactory
 from faker import Faker
@@ -10,23 +10,34 @@ from users.models import AccountOwner, AccountUser, Admin, BaseClient, BaseUser,
 
 fake = Faker()
 
+# Every factory user gets this password, hashed once per session instead of once per object
+TEST_PASSWORD = "test-password"
+TEST_PASSWORD_HASH = make_password(TEST_PASSWORD)
+
+
+class BulkModelFactory(DjangoModelFactory):
+    """create_batch builds the objects in Python and inserts them with a single bulk_create."""
+
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def create_batch(cls, size, **kwargs):
+        objs = cls.build_batch(size, **kwargs)
+        return cls._meta.model._base_manager.bulk_create(objs)
+
 
 # ========= Users Factory ==========
-class BaseUserFactory(DjangoModelFactory):
+class BaseUserFactory(BulkModelFactory):
 
     class Meta:
         model = BaseUser
-        skip_postgeneration_save = True
-
-    @staticmethod
-    def generate_password(length=12):
-        alphabet = string.ascii_letters + string.digits + string.punctuation
-        return "".join(secrets.choice(alphabet) for _ in range(length))
 
-    email = factory.LazyAttribute(lambda _: fake.unique.email()[:255])
-    password = factory.PostGenerationMethodCall("set_password", factory.LazyFunction(generate_password))
-    first_name = factory.LazyAttribute(lambda _: fake.unique.first_name()[:30])
-    last_name = factory.LazyAttribute(lambda _: fake.unique.last_name()[:30])
+    # Sequences stay unique without Faker's ever-growing set of used values
+    email = factory.Sequence(lambda n: f"factory-user{n}@example.com")
+    password = TEST_PASSWORD_HASH
+    first_name = factory.LazyFunction(lambda: fake.first_name()[:30])
+    last_name = factory.LazyFunction(lambda: fake.last_name()[:30])
     date_joined = factory.LazyFunction(timezone.now)
 
 
@@ -34,7 +45,6 @@ class AdminFactory(BaseUserFactory):
 
     class Meta:
         model = Admin
-        # skip_postgeneration_save = True
 
     role = BaseUser.Role.ADMIN
 
@@ -43,33 +53,33 @@ class StaffFactory(BaseUserFactory):
 
     class Meta:
         model = Staff
-        # skip_postgeneration_save = True
 
     role = BaseUser.Role.STAFF
 
 
 # ========= Clients Factory ==========
-class BaseClientFactory(DjangoModelFactory):
+class BaseClientFactory(BulkModelFactory):
 
     class Meta:
         model = BaseClient
-        skip_postgeneration_save = True
 
-    first_name = factory.LazyAttribute(lambda _: fake.unique.first_name()[:30])
-    last_name = factory.LazyAttribute(lambda _: fake.unique.last_name()[:30])
-    email = factory.LazyAttribute(lambda _: fake.unique.email()[:255])
-    phone_number = factory.LazyAttribute(lambda _: fake.unique.msisdn()[:15])
-    company_name = factory.LazyAttribute(lambda _: fake.unique.company()[:100])
-    country = factory.LazyAttribute(lambda _: fake.unique.country()[:50])
-    city = factory.LazyAttribute(lambda _: fake.unique.city()[:50])
-    domain = factory.LazyAttribute(lambda _: fake.unique.domain_name()[:100])
+    first_name = factory.LazyFunction(lambda: fake.first_name()[:30])
+    last_name = factory.LazyFunction(lambda: fake.last_name()[:30])
+    email = factory.Sequence(lambda n: f"factory-client{n}@example.com")
+    phone_number = factory.Sequence(lambda n: f"1{n:010d}")
+    password = TEST_PASSWORD_HASH
+    company_name = factory.LazyFunction(lambda: fake.company()[:100])
+    country = factory.LazyFunction(lambda: fake.country()[:50])
+    city = factory.LazyFunction(lambda: fake.city()[:50])
+    domain = factory.Sequence(lambda n: f"factory-client{n}.example.com")
+    account_id = factory.LazyFunction(uuid.uuid4)
+    subaccount_id = factory.LazyFunction(uuid.uuid4)
 
 
 class AccountOwnerFactory(BaseClientFactory):
 
     class Meta:
         model = AccountOwner
-        # skip_postgeneration_save = True
 
     role = BaseClient.Role.ACCOUNT_OWNER
 
@@ -78,6 +88,5 @@ class AccountUserFactory(BaseClientFactory):
 
     class Meta:
         model = AccountUser
-        # skip_postgeneration_save = True
 
     role = BaseClient.Role.ACCOUNT_USER
@@ -0,0 +1,157 @@
+import uuid
+
+import pytest
+from django.db.models import QuerySet
+from users.accounts import AccountTreeError, account_membership, create_account, lock_subtree, move_account
+from users.models import Account
+from users.tests.factories import AccountOwnerFactory, AccountUserFactory
+
+
+@pytest.fixture
+def tree(db):
+    """root -> child -> grandchild, with one client on each level"""
+    root = create_account()
+    child = create_account(root.id)
+    grandchild = create_account(child.id)
+    clients = {
+        "owner": AccountOwnerFactory(account_id=root.id, subaccount_id=root.id),
+        "child": AccountUserFactory(account_id=root.id, subaccount_id=child.id),
+        "grandchild": AccountUserFactory(account_id=root.id, subaccount_id=grandchild.id),
+    }
+    return root, child, grandchild, clients
+
+
+@pytest.mark.django_db
+class TestAccountTree:
+
+    def test_materialized_path(self, tree):
+        """Check that paths, ancestors and subtrees follow the tree"""
+        root, child, grandchild, _ = tree
+
+        assert grandchild.path == root.id.hex + child.id.hex + grandchild.id.hex
+        assert grandchild.ancestor_ids == [root.id, child.id] and grandchild.depth == 3
+        assert set(child.subtree().values_list("id", flat=True)) == {child.id, grandchild.id}
+        assert root.subtree().count() == 3
+
+    def test_missing_parent(self):
+        """Check that accounts are only created under existing parents"""
+        with pytest.raises(AccountTreeError):
+            create_account(uuid.uuid4())
+
+    def test_max_depth(self):
+        """Check that the tree is at most MAX_DEPTH levels deep"""
+        account = create_account()
+        for _ in range(Account.MAX_DEPTH - 1):
+            account = create_account(account.id)
+
+        with pytest.raises(AccountTreeError):
+            create_account(account.id)
+
+    def test_move(self, tree):
+        """Check that a move rewrites the paths of the whole subtree"""
+        root, child, grandchild, _ = tree
+        other = create_account()
+
+        move_account(child.id, other.id)
+
+        grandchild.refresh_from_db()
+        assert grandchild.path == other.id.hex + child.id.hex + grandchild.id.hex
+        assert root.subtree().count() == 1
+        with pytest.raises(AccountTreeError):
+            move_account(other.id, grandchild.id)
+
+    def test_move_locks_parent_and_subtree(self, tree):
+        """Check that a move locks its new parent and the whole subtree, in id order"""
+        root, child, grandchild, _ = tree
+        other = create_account()
+
+        locked = lock_subtree(child.id, other.id)
+
+        assert set(locked) == {other.id, child.id, grandchild.id}
+        assert list(locked) == sorted(locked)
+
+    def test_lock_follows_a_concurrent_move(self, tree, monkeypatch):
+        """Check that a subtree moved between the path read and the lock is locked at its new place"""
+        root, child, grandchild, _ = tree
+        other = create_account()
+        select_for_update = QuerySet.select_for_update
+
+        def moved_first(queryset, *args, **kwargs):
+            monkeypatch.setattr(QuerySet, "select_for_update", select_for_update)
+            move_account(child.id, other.id)
+            return select_for_update(queryset, *args, **kwargs)
+
+        monkeypatch.setattr(QuerySet, "select_for_update", moved_first)
+        locked = lock_subtree(child.id, None)
+
+        assert set(locked) == {child.id, grandchild.id}
+        assert locked[child.id].path == other.id.hex + child.id.hex
+
+
+@pytest.mark.django_db
+class TestAccountMembership:
+
+    @staticmethod
+    def member_ids(account_id):
+        return set(account_membership.members(account_id).values_list("pk", flat=True))
+
+    def test_members(self, tree):
+        """Check that an account's members include the clients of its subaccounts"""
+        root, child, grandchild, clients = tree
+
+        assert self.member_ids(root.id) == {client.pk for client in clients.values()}
+        assert self.member_ids(child.id) == {clients["child"].pk, clients["grandchild"].pk}
+        assert account_membership.is_member(child.id, clients["grandchild"].pk)
+        assert not account_membership.is_member(grandchild.id, clients["child"].pk)
+
+    def test_unregistered_account_is_a_leaf(self):
+        """Check that clients of an account id without an Account row are still its members"""
+        client = AccountUserFactory()
+
+        assert self.member_ids(client.subaccount_id) == {client.pk}
+
+    def test_subtrees_are_cached(self, tree, django_assert_num_queries):
+        """Check that a cached subtree leaves membership checks a single query"""
+        root, _, _, clients = tree
+        account_membership.subtree_ids(root.id)
+        account_membership.local.clear()
+
+        with django_assert_num_queries(1):
+            assert account_membership.is_member(root.id, clients["grandchild"].pk)
+
+    def test_load_racing_invalidation_is_dropped(self, tree, monkeypatch):
+        """Check that a subtree loaded across a concurrent hierarchy change is not left in the cache"""
+        root, *_ = tree
+        subtree = Account.subtree
+
+        def racing(account):
+            account_membership.invalidate_subtrees([account.pk])
+            return subtree(account)
+
+        monkeypatch.setattr(Account, "subtree", racing)
+        assert len(account_membership.subtree_ids(root.id)) == 3
+        assert account_membership.shared.get(account_membership.make_key("subtree", root.id)) is None
+
+    def test_client_move(self, tree):
+        """Check that changing a client's subaccount moves it between the accounts' members"""
+        root, child, grandchild, clients = tree
+        client = type(clients["grandchild"]).objects.get(pk=clients["grandchild"].pk)
+        client.subaccount_id = root.id
+        client.save()
+
+        assert not account_membership.is_member(child.id, client.pk)
+        assert self.member_ids(grandchild.id) == set()
+        assert account_membership.is_member(root.id, client.pk)
+
+    def test_hierarchy_change_invalidates(self, tree, django_capture_on_commit_callbacks):
+        """Check that moving a subaccount moves its members to the new ancestors"""
+        root, child, _, clients = tree
+        other = create_account()
+        assert self.member_ids(other.id) == set()
+
+        with django_capture_on_commit_callbacks(execute=True):
+            move_account(child.id, other.id)
+
+        assert self.member_ids(other.id) == {clients["child"].pk, clients["grandchild"].pk}
+        # The clients keep account_id=root, so the root still counts them as its own
+        assert self.member_ids(root.id) == {client.pk for client in clients.values()}
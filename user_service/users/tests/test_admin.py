@@ -0,0 +1,54 @@
+from unittest import mock
+
+import pytest
+from django.contrib.admin.sites import site
+from django.test import RequestFactory
+from django.urls import reverse
+from users.admin import EstimatedCountPaginator
+from users.models import AccountUser
+from users.tests.factories import AccountUserFactory, AdminFactory
+
+
+@pytest.mark.django_db
+class TestFastAdmin:
+
+    @pytest.fixture
+    def superuser(self):
+        return AdminFactory(is_active=True, is_staff=True, is_superuser=True)
+
+    def test_changelist(self, client, superuser):
+        """Check that the changelist renders without the unfiltered full count"""
+        AccountUserFactory.create_batch(3)
+        client.force_login(superuser)
+
+        response = client.get(reverse("admin:users_accountuser_changelist"))
+
+        assert response.status_code == 200
+        assert response.context["cl"].result_count == 3
+        assert response.context["cl"].full_result_count is None
+
+    def test_prefix_search(self, client, superuser):
+        """Check that without trigram indexes the search matches email prefixes, in either case"""
+        AccountUserFactory(email="support.lead@example.com")
+        AccountUserFactory(email="other@example.com")
+        model_admin = site._registry[AccountUser]
+        request = RequestFactory().get("/")
+
+        for term in ("support", "Support.", " SUPPORT.Lead@ "):
+            queryset, duplicates = model_admin.get_search_results(request, AccountUser.objects.all(), term)
+            assert [user.email for user in queryset] == ["support.lead@example.com"]
+            assert duplicates is False
+        queryset, _ = model_admin.get_search_results(request, AccountUser.objects.all(), "lead")
+        assert not queryset.exists()
+
+    def test_paginator_estimates_large_tables(self):
+        """Check that the paginator counts exactly below the threshold and estimates above it"""
+        AccountUserFactory.create_batch(2)
+        queryset = AccountUser.objects.order_by("-date_joined")
+
+        assert EstimatedCountPaginator(queryset, 1).count == 2
+        with mock.patch("users.admin.estimated_count", return_value=50_000):
+            assert EstimatedCountPaginator(queryset, 100).count == 50_000
+            assert EstimatedCountPaginator(queryset, 100).num_pages == 500
+        with mock.patch("users.admin.estimated_count", return_value=10):
+            assert EstimatedCountPaginator(queryset, 1).count == 2
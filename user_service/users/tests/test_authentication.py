@@ -0,0 +1,129 @@
+import uuid
+
+import pytest
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+from users.authentication import ClaimsJWTAuthentication, ClaimsUser, is_token_revoked
+from users.cache import user_cache
+from users.models import BaseUser
+from users.serializers import UserClaimsTokenObtainPairSerializer
+
+
+@pytest.mark.django_db
+class TestClaimsJWTAuthentication:
+
+    @pytest.fixture
+    def user(self):
+        return BaseUser.objects.create_user("erin@example.com", "secret-password", role=BaseUser.Role.ADMIN)
+
+    @staticmethod
+    def access_token(user):
+        return UserClaimsTokenObtainPairSerializer.get_token(user).access_token
+
+    def test_token_obtain_embeds_claims(self, user, client):
+        """Check that the token endpoint signs the role claim into both tokens"""
+        response = client.post(
+            "/api/token/", {"email": user.email, "password": "secret-password"}, content_type="application/json"
+        )
+
+        assert response.status_code == 200
+        assert AccessToken(response.json()["access"])["role"] == BaseUser.Role.ADMIN
+        assert RefreshToken(response.json()["refresh"])["role"] == BaseUser.Role.ADMIN
+
+    def test_user_built_from_claims(self, user, django_assert_num_queries):
+        """Check that a token with claims authenticates without any query"""
+        token = self.access_token(user)
+        with django_assert_num_queries(0):
+            request_user = ClaimsJWTAuthentication().get_user(token)
+
+        assert isinstance(request_user, ClaimsUser)
+        assert request_user.id == str(user.id)
+        assert request_user.is_admin and request_user.is_authenticated
+
+    def test_claims_user_is_slotted(self, user):
+        """Check that the request user carries no per-instance dict"""
+        assert not hasattr(ClaimsUser(self.access_token(user)), "__dict__")
+
+    def test_profile_change_keeps_tokens(self, user, django_capture_on_commit_callbacks):
+        """Check that saving non-auth fields does not revoke tokens"""
+        token = self.access_token(user)
+        with django_capture_on_commit_callbacks(execute=True):
+            user.first_name = "Erin"
+            user.save()
+
+        assert not is_token_revoked(token)
+
+    def test_deactivation_revokes_tokens(self, user, django_capture_on_commit_callbacks, django_assert_num_queries):
+        """Check that tokens issued before a deactivation hit the database and are rejected"""
+        token = self.access_token(user)
+        with django_capture_on_commit_callbacks(execute=True):
+            user.is_active = False
+            user.save()
+
+        assert is_token_revoked(token)
+        with django_assert_num_queries(1), pytest.raises(AuthenticationFailed):
+            ClaimsJWTAuthentication().get_user(token)
+
+    def test_revocation_survives_cache_loss(self, user, django_capture_on_commit_callbacks):
+        """Check that a revocation is read back from the user row once its cache entry is gone"""
+        token = self.access_token(user)
+        with django_capture_on_commit_callbacks(execute=True):
+            user.is_active = False
+            user.save()
+        user_cache.shared.clear()
+
+        assert BaseUser.objects.get(pk=user.pk).tokens_revoked_at is not None
+        assert is_token_revoked(token)
+        with pytest.raises(AuthenticationFailed):
+            ClaimsJWTAuthentication().get_user(token)
+
+    def test_client_tokens_are_trusted(self, account_owner):
+        """Check that tokens of unchanged clients are trusted after the cache is lost"""
+        token = self.access_token(account_owner)
+        user_cache.shared.clear()
+
+        assert not is_token_revoked(token)
+        assert ClaimsJWTAuthentication().get_user(token).account_id == str(account_owner.account_id)
+
+    @pytest.mark.parametrize("field", ["is_active", "account_id", "subaccount_id"])
+    def test_client_change_revokes_tokens(self, account_owner, field, django_capture_on_commit_callbacks):
+        """Check that (de)activating a client or moving it to another account rejects its tokens"""
+        token = self.access_token(account_owner)
+        with django_capture_on_commit_callbacks(execute=True):
+            setattr(account_owner, field, not account_owner.is_active if field == "is_active" else uuid.uuid4())
+            account_owner.save()
+        user_cache.shared.clear()
+
+        assert is_token_revoked(token)
+        with pytest.raises(AuthenticationFailed):
+            ClaimsJWTAuthentication().get_user(token)
+
+    def test_revoked_refresh_token_is_refused(self, account_owner, client, django_capture_on_commit_callbacks):
+        """Check that a refresh token issued before a revocation gets no new access token"""
+        refresh = str(UserClaimsTokenObtainPairSerializer.get_token(account_owner))
+        assert (
+            client.post("/api/token/refresh/", {"refresh": refresh}, content_type="application/json").status_code == 200
+        )
+        with django_capture_on_commit_callbacks(execute=True):
+            account_owner.account_id = uuid.uuid4()
+            account_owner.save()
+
+        assert (
+            client.post("/api/token/refresh/", {"refresh": refresh}, content_type="application/json").status_code == 401
+        )
+
+    def test_role_change_resolves_user(self, user, django_capture_on_commit_callbacks):
+        """Check that tokens with stale role claims resolve the stored user"""
+        token = self.access_token(user)
+        with django_capture_on_commit_callbacks(execute=True):
+            user.role = BaseUser.Role.STAFF
+            user.save()
+
+        request_user = ClaimsJWTAuthentication().get_user(token)
+        assert isinstance(request_user, BaseUser)
+        assert request_user.role == BaseUser.Role.STAFF
+
+    def test_token_without_claims_resolves_user(self, user):
+        """Check that tokens issued without claims fall back to the cached user lookup"""
+        request_user = ClaimsJWTAuthentication().get_user(AccessToken.for_user(user))
+        assert request_user.pk == user.pk
@@ -0,0 +1,83 @@
+import io
+import json
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from users.benchmarks.connections import compare
+from users.benchmarks.startup import StartupProfile, parse_importtime
+from users.benchmarks.suite import BenchmarkResult, compare_to_baseline, run_suite, write_report
+
+
+@pytest.mark.django_db(transaction=True)
+class TestConnectionBenchmark:
+
+    def test_compare(self):
+        """Check that both modes run every request and that reuse never opens more connections"""
+        off, on = compare(requests=20)
+
+        assert (off.mode, on.mode) == ("off", "on")
+        assert off.requests == on.requests == 20
+        assert on.requests_per_second > 0
+        assert on.connections_opened <= off.connections_opened
+        if connection.vendor == "postgresql":
+            assert off.connections_opened == 20
+
+    def test_command(self):
+        """Check that the command reports both modes"""
+        stdout = io.StringIO()
+        call_command("benchmark_connections", "--requests=10", "--threads=1", stdout=stdout)
+        assert "pooling off" in stdout.getvalue() and "pooling on" in stdout.getvalue()
+
+
+@pytest.mark.django_db
+class TestBenchmarkSuite:
+
+    def test_run_suite(self, tmp_path):
+        """Check that every hot path is measured and written as a machine-readable report"""
+        results = run_suite(sizes=(30,), ops=3)
+        path = tmp_path / "results.json"
+        write_report(results, path)
+
+        report = json.loads(path.read_text())
+        keys = [entry["key"] for entry in report["results"]]
+        assert "create_account_user" in keys and "token_authentication" in keys
+        assert "list_account_users[rows=30]" in keys and "lookup_domain[rows=30]" in keys
+        assert "search_clients[rows=30]" in keys
+        assert keys[-1].startswith("signal_fanout")
+        assert all(entry["ops_per_second"] > 0 for entry in report["results"])
+
+    def test_compare_to_baseline(self):
+        """Check that only throughput drops beyond the threshold are regressions"""
+        baseline = {"results": [{"key": "lookup_email[rows=10]", "ops_per_second": 100.0}]}
+        slower = BenchmarkResult("lookup_email", ops=70, seconds=1.0, params={"rows": 10})
+        faster = BenchmarkResult("lookup_email", ops=120, seconds=1.0, params={"rows": 10})
+        unknown = BenchmarkResult("lookup_phone", ops=1, seconds=1.0, params={"rows": 10})
+
+        [comparison] = compare_to_baseline([slower, unknown], baseline, threshold=0.2)
+        assert comparison.regressed and round(comparison.change, 2) == -0.3
+        assert not compare_to_baseline([faster], baseline, threshold=0.2)[0].regressed
+
+
+class TestStartupProfile:
+
+    def test_parse_importtime(self):
+        """Check that -X importtime output becomes per-module records with their nesting"""
+        output = "\n".join(
+            [
+                "import time: self [us] | cumulative | imported package",
+                "import time:       271 |        271 |   _io",
+                "import time:       549 |       1453 | django.conf",
+                "import time:      1200 |       1200 | celery",
+            ]
+        )
+        profile = StartupProfile(0.5, parse_importtime(output))
+
+        assert [(record.module, record.depth) for record in profile.records] == [
+            ("_io", 1),
+            ("django.conf", 0),
+            ("celery", 0),
+        ]
+        assert [record.module for record in profile.slowest()] == ["django.conf", "celery"]
+        assert profile.by_package(1) == [("celery", 1200)]
+        assert profile.import_seconds == pytest.approx(0.00202)
@@ -0,0 +1,150 @@
+import uuid
+
+import pytest
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.tokens import AccessToken
+from users.authentication import CachedJWTAuthentication
+from users.cache import LocalLRUCache, UserCache, user_cache
+from users.models import AccountUser, BaseClient, BaseUser
+
+
+class TestLocalLRUCache:
+
+    def test_evicts_least_recently_used(self):
+        """Check that the oldest untouched entry is evicted first"""
+        lru = LocalLRUCache(maxsize=2, timeout=60)
+        lru.set("a", 1)
+        lru.set("b", 2)
+        lru.get("a")
+        lru.set("c", 3)
+
+        assert lru.get("a") == 1
+        assert lru.get("b", None) is None
+        assert len(lru) == 2
+
+    def test_expired_entries_are_dropped(self):
+        """Check that entries are not served after their timeout"""
+        lru = LocalLRUCache(maxsize=2, timeout=-1)
+        lru.set("a", 1)
+        assert lru.get("a", None) is None
+
+
+@pytest.mark.django_db
+class TestUserCache:
+
+    @pytest.fixture
+    def client_user(self):
+        return BaseClient.objects.create(
+            first_name="Alice",
+            last_name="Smith",
+            email="alice.smith@example.com",
+            phone_number="1234567890",
+            company_name="Example Corp",
+            country="Wonderland",
+            city="Magic City",
+            domain="example.com",
+            account_id=uuid.uuid4(),
+            subaccount_id=uuid.uuid4(),
+        )
+
+    def test_get_by_id_reads_through(self, client_user, django_assert_num_queries):
+        """Check that only the first lookup by id hits the database"""
+        with django_assert_num_queries(1):
+            assert user_cache.get_by_id(BaseClient, client_user.id).email == client_user.email
+        with django_assert_num_queries(0):
+            assert user_cache.get_by_id(AccountUser, str(client_user.id)).pk == client_user.pk
+
+    def test_get_by_email_reads_through(self, client_user, django_assert_num_queries):
+        """Check that only the first lookup by email hits the database, and it primes the id key"""
+        with django_assert_num_queries(1):
+            user_cache.get_by_email(BaseClient, client_user.email)
+        with django_assert_num_queries(0):
+            user_cache.get_by_email(BaseClient, client_user.email)
+            user_cache.get_by_id(BaseClient, client_user.id)
+
+    def test_local_tier_serves_without_shared_cache(self, client_user, django_assert_num_queries):
+        """Check that the in-process tier answers when the shared entry is gone"""
+        user_cache.get_by_id(BaseClient, client_user.id)
+        user_cache.shared.clear()
+        with django_assert_num_queries(0):
+            user_cache.get_by_id(BaseClient, client_user.id)
+
+    def test_missing_user_raises(self):
+        """Check that unknown ids raise DoesNotExist and release the loader lock"""
+        pk = uuid.uuid4()
+        with pytest.raises(BaseUser.DoesNotExist):
+            user_cache.get_by_id(BaseUser, pk)
+        assert user_cache.shared.get(f"{user_cache.make_key(BaseUser, 'id', pk)}:lock") is None
+
+    def test_invalidated_on_save(self, client_user, django_capture_on_commit_callbacks):
+        """Check that saving a user drops its cached entries once the transaction commits"""
+        user_cache.get_by_id(BaseClient, client_user.id)
+        with django_capture_on_commit_callbacks(execute=True):
+            client_user.first_name = "Alicia"
+            client_user.save()
+
+        assert user_cache.get_by_id(BaseClient, client_user.id).first_name == "Alicia"
+
+    def test_invalidated_on_delete(self, client_user, django_capture_on_commit_callbacks):
+        """Check that deleting a user drops its cached entries"""
+        user_cache.get_by_email(BaseClient, client_user.email)
+        with django_capture_on_commit_callbacks(execute=True):
+            BaseClient.objects.filter(pk=client_user.pk).first().delete()
+
+        with pytest.raises(BaseClient.DoesNotExist):
+            user_cache.get_by_email(BaseClient, client_user.email)
+
+    def test_stale_email_pointer_is_ignored(self, client_user):
+        """Check that an email pointer to a user whose email changed is not trusted"""
+        user_cache.get_by_email(BaseClient, client_user.email)
+        old_email = client_user.email
+        client_user.email = "alicia@example.com"
+        client_user.save()
+        user_cache.store(client_user)
+
+        with pytest.raises(BaseClient.DoesNotExist):
+            user_cache.get_by_email(BaseClient, old_email)
+
+    def test_load_racing_invalidation_is_dropped(self, client_user):
+        """Check that a row fetched before a concurrent invalidation is not left in the cache"""
+        key = user_cache.make_key(BaseClient, "id", client_user.id)
+
+        def fetch():
+            user = BaseClient.objects.get(pk=client_user.pk)
+            BaseClient.objects.filter(pk=client_user.pk).update(first_name="Alicia")
+            user_cache.invalidate(client_user)
+            return user
+
+        assert user_cache._load(key, fetch, resolve=lambda value: value).first_name == "Alice"
+        assert user_cache.get_by_id(BaseClient, client_user.id).first_name == "Alicia"
+
+    def test_waits_for_concurrent_loader(self, client_user, django_assert_num_queries):
+        """Check that a held loader lock makes readers fall back to the database once it times out"""
+        cache = UserCache(local_maxsize=0, lock_timeout=0.1)
+        key = cache.make_key(BaseClient, "id", client_user.id)
+        cache.shared.add(f"{key}:lock", 1, 10)
+
+        with django_assert_num_queries(1):
+            assert cache.get_by_id(BaseClient, client_user.id).pk == client_user.pk
+        assert cache.shared.get(key) is None
+
+
+@pytest.mark.django_db
+class TestCachedJWTAuthentication:
+
+    def test_user_resolved_from_cache(self, django_assert_num_queries):
+        """Check that repeated authentication with the same token does not query the database"""
+        user = BaseUser.objects.create_user("erin@example.com", "secret-password")
+        token = AccessToken.for_user(user)
+        auth = CachedJWTAuthentication()
+
+        with django_assert_num_queries(1):
+            assert auth.get_user(token).pk == user.pk
+        with django_assert_num_queries(0):
+            assert auth.get_user(token).pk == user.pk
+
+    def test_inactive_user_rejected(self):
+        """Check that inactive users are rejected"""
+        user = BaseUser.objects.create_user("frank@example.com", "secret-password", is_active=False)
+        with pytest.raises(AuthenticationFailed):
+            CachedJWTAuthentication().get_user(AccessToken.for_user(user))
@@ -0,0 +1,156 @@
+import csv
+import io
+import json
+import threading
+import uuid
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from users.export import EXPORT_FIELDS, RowEncoder, aexport_lines, client_export_queryset, export_lines, iter_rows
+from users.models import BaseClient, BaseUser
+from users.serializers import UserClaimsTokenObtainPairSerializer
+
+
+ACCOUNT_ID = uuid.uuid4()
+
+
+@pytest.fixture
+def clients(db):
+    other_account = uuid.uuid4()
+    BaseClient.objects.bulk_create(
+        BaseClient(
+            email=f"client{n}@example.com",
+            phone_number=f"+1555000{n:04d}",
+            domain=f"client{n}.example.com",
+            account_id=other_account if n == 0 else ACCOUNT_ID,
+            subaccount_id=ACCOUNT_ID,
+        )
+        for n in range(6)
+    )
+    return list(BaseClient.objects.filter(account_id=ACCOUNT_ID).order_by("id").values_list("id", flat=True))
+
+
+@pytest.mark.django_db
+class TestExportLines:
+
+    def test_ndjson(self, clients):
+        """Check that NDJSON exports contain only the account's clients in id order"""
+        lines = list(export_lines(client_export_queryset(ACCOUNT_ID), RowEncoder("ndjson"), chunk_size=2))
+        rows = [json.loads(line) for line in lines]
+
+        assert [row["id"] for row in rows] == [str(pk) for pk in clients]
+        assert set(rows[0]) == set(EXPORT_FIELDS)
+
+    def test_csv_resume(self, clients):
+        """Check that a CSV export resumed after an id continues without repeating rows or the header"""
+        encoder = RowEncoder("csv")
+        first = list(export_lines(client_export_queryset(ACCOUNT_ID), encoder))
+        resumed = list(export_lines(client_export_queryset(ACCOUNT_ID, after=clients[1]), encoder, header=False))
+
+        assert next(csv.reader(io.StringIO(first[0]))) == list(EXPORT_FIELDS)
+        assert resumed == first[3:]
+
+    def test_keyset_chunks_without_server_side_cursors(self, clients, monkeypatch):
+        """Check that exports page by id instead of buffering when server-side cursors are disabled"""
+        monkeypatch.setitem(connection.settings_dict, "DISABLE_SERVER_SIDE_CURSORS", True)
+        queryset = client_export_queryset(ACCOUNT_ID, fields=("id",))
+
+        with CaptureQueriesContext(connection) as queries:
+            rows = list(iter_rows(queryset, chunk_size=2))
+
+        assert [row[0] for row in rows] == clients
+        assert len(queries) == 3
+
+    def test_unknown_format(self):
+        """Check that unsupported formats are rejected"""
+        with pytest.raises(ValueError):
+            RowEncoder("xml")
+
+
+# The export reads on a thread with its own connection, which only sees committed rows
+@pytest.mark.django_db(transaction=True)
+class TestExportView:
+
+    @staticmethod
+    def auth_headers(user):
+        return {"Authorization": f"Bearer {UserClaimsTokenObtainPairSerializer.get_token(user).access_token}"}
+
+    @pytest.fixture
+    def headers(self, db):
+        api_user = BaseUser.objects.create_user("api@example.com", "secret-password", role=BaseUser.Role.ADMIN)
+        return self.auth_headers(api_user)
+
+    def get(self, async_client, headers, params):
+        async def fetch():
+            response = await async_client.get("/api/clients/export/", params, headers=headers)
+            if not response.streaming:
+                return response, b""
+            return response, b"".join([chunk async for chunk in response.streaming_content])
+
+        return async_to_sync(fetch)()
+
+    def test_streams_ndjson(self, async_client, headers, clients):
+        """Check that the endpoint streams the account's clients and resumes after a given id"""
+        response, body = self.get(async_client, headers, {"account_id": str(ACCOUNT_ID)})
+        assert response.status_code == 200
+        assert response["Content-Type"] == "application/x-ndjson"
+        assert [json.loads(line)["id"] for line in body.splitlines()] == [str(pk) for pk in clients]
+
+        response, body = self.get(async_client, headers, {"account_id": str(ACCOUNT_ID), "after": str(clients[2])})
+        assert [json.loads(line)["id"] for line in body.splitlines()] == [str(pk) for pk in clients[3:]]
+
+    def test_clients_export_only_their_account(self, async_client, clients):
+        """Check that a client token may export its own account only"""
+        headers = self.auth_headers(BaseClient.objects.get(pk=clients[0]))
+        response, body = self.get(async_client, headers, {"account_id": str(ACCOUNT_ID)})
+        assert response.status_code == 200 and len(body.splitlines()) == len(clients)
+
+        response, _ = self.get(async_client, headers, {"account_id": str(uuid.uuid4())})
+        assert response.status_code == 403
+
+    def test_abandoned_stream_stops_its_thread(self, clients):
+        """Check that the export thread finishes once the client stops reading"""
+        main = threading.get_ident()
+        producers = []
+
+        async def read_first_chunk():
+            lines = aexport_lines(client_export_queryset(ACCOUNT_ID), RowEncoder("ndjson"), chunk_size=1, prefetch=1)
+            await lines.__anext__()
+            producers.extend(thread for thread in threading.enumerate() if thread.name == "client-export")
+            await lines.aclose()
+
+        async_to_sync(read_first_chunk)()
+
+        assert producers and producers[0].ident != main
+        producers[0].join(timeout=5)
+        assert not producers[0].is_alive()
+
+    @pytest.mark.parametrize("params", [{}, {"account_id": "nope"}, {"account_id": str(ACCOUNT_ID), "format": "xml"}])
+    def test_invalid_parameters(self, async_client, headers, params):
+        """Check that missing or malformed parameters are answered with 400"""
+        response, _ = self.get(async_client, headers, params)
+        assert response.status_code == 400
+
+
+@pytest.mark.django_db
+class TestExportClientsCommand:
+
+    def test_export_and_resume(self, clients, tmp_path):
+        """Check that the command writes a CSV file and appends to it when resuming"""
+        path = tmp_path / "clients.csv"
+        call_command("export_clients", str(ACCOUNT_ID), "--format=csv", f"--output={path}", stderr=io.StringIO())
+        complete = path.read_text()
+
+        path.write_text("".join(complete.splitlines(keepends=True)[:3]))
+        call_command(
+            "export_clients",
+            str(ACCOUNT_ID),
+            "--format=csv",
+            f"--output={path}",
+            f"--after={clients[1]}",
+            stderr=io.StringIO(),
+        )
+        assert path.read_text() == complete
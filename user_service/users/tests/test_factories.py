@@ -0,0 +1,44 @@
+import pytest
+from users.models import AccountUser, BaseUser
+
+from .conftest import schema_fingerprint, use_schema_snapshot
+from .factories import TEST_PASSWORD, AccountUserFactory, StaffFactory
+
+
+@pytest.mark.django_db
+class TestFactories:
+
+    def test_create_batch_is_one_insert(self, django_assert_num_queries):
+        """Check that create_batch inserts every object with a single bulk INSERT"""
+        with django_assert_num_queries(1):
+            clients = AccountUserFactory.create_batch(25)
+
+        assert len(clients) == 25
+        assert AccountUser.objects.count() == 25
+        assert len({client.phone_number for client in clients}) == 25
+
+    def test_pre_hashed_password(self):
+        """Check that factory users log in with TEST_PASSWORD without hashing per object"""
+        staff = StaffFactory()
+
+        assert BaseUser.objects.get(pk=staff.pk).check_password(TEST_PASSWORD)
+
+
+class TestSchemaSnapshot:
+
+    def test_snapshot_names(self, tmp_path, monkeypatch):
+        """Check that test databases are named after the schema fingerprint, mirrors excepted"""
+        monkeypatch.setattr("users.tests.conftest.SCHEMA_SNAPSHOT_DIR", tmp_path)
+        (tmp_path / "default_stale.sqlite3").touch()
+        databases = {
+            "default": {"ENGINE": "django.db.backends.sqlite3", "NAME": ":memory:"},
+            "replica": {"ENGINE": "django.db.backends.sqlite3", "NAME": ":memory:", "TEST": {"MIRROR": "default"}},
+            "pg": {"ENGINE": "django.db.backends.postgresql", "NAME": "users"},
+        }
+        use_schema_snapshot(databases, schema_fingerprint())
+
+        fingerprint = schema_fingerprint()
+        assert databases["default"]["TEST"]["NAME"] == str(tmp_path / f"default_{fingerprint}.sqlite3")
+        assert databases["pg"]["TEST"]["NAME"] == f"test_users_{fingerprint}"
+        assert "NAME" not in databases["replica"]["TEST"]
+        assert not (tmp_path / "default_stale.sqlite3").exists()
@@ -0,0 +1,97 @@
+import io
+
+import pytest
+from django.contrib.auth.hashers import identify_hasher, make_password
+from django.core.management import call_command
+from django.test import override_settings
+from users.authentication import is_token_revoked
+from users.models import BaseUser
+from users.serializers import UserClaimsTokenObtainPairSerializer
+
+
+CHEAP_COSTS = {
+    "ARGON2_TIME_COST": 1,
+    "ARGON2_MEMORY_COST": 1024,
+    "ARGON2_PARALLELISM": 1,
+    "SCRYPT_WORK_FACTOR": 2**10,
+    "SCRYPT_BLOCK_SIZE": 8,
+    "SCRYPT_PARALLELISM": 1,
+}
+
+
+@pytest.fixture
+def tuned_hashers():
+    with override_settings(
+        PASSWORD_HASHERS=[
+            "users.hashers.TunedArgon2PasswordHasher",
+            "users.hashers.TunedScryptPasswordHasher",
+            "django.contrib.auth.hashers.MD5PasswordHasher",
+        ],
+        PASSWORD_HASHER_COSTS=CHEAP_COSTS,
+    ):
+        yield
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures("tuned_hashers")
+class TestRehashOnLogin:
+
+    def make_user(self, encoded):
+        user = BaseUser.objects.create_user("user@example.com", None, role=BaseUser.Role.STAFF)
+        BaseUser.objects.filter(pk=user.pk).update(password=encoded)
+        return BaseUser.objects.get(pk=user.pk)
+
+    def test_legacy_hash_is_upgraded(self):
+        """Check that a successful login rewrites a hash of a legacy hasher with Argon2id"""
+        user = self.make_user(make_password("secret-password", hasher="md5"))
+
+        assert user.check_password("secret-password")
+        stored = BaseUser.objects.get(pk=user.pk).password
+        assert identify_hasher(stored).algorithm == "argon2"
+        assert BaseUser.objects.get(pk=user.pk).check_password("secret-password")
+
+    def test_cost_change_is_upgraded(self, settings):
+        """Check that hashes made with outdated costs are rewritten with the current ones"""
+        user = self.make_user(make_password("secret-password"))
+        settings.PASSWORD_HASHER_COSTS = {**CHEAP_COSTS, "ARGON2_TIME_COST": 2}
+
+        assert user.check_password("secret-password")
+        assert "t=2" in BaseUser.objects.get(pk=user.pk).password
+
+    def test_failed_login_does_not_rehash(self):
+        """Check that a wrong password leaves the stored hash alone"""
+        encoded = make_password("secret-password", hasher="md5")
+        user = self.make_user(encoded)
+
+        assert not user.check_password("wrong-password")
+        assert BaseUser.objects.get(pk=user.pk).password == encoded
+
+    def test_rehash_keeps_tokens(self, django_capture_on_commit_callbacks):
+        """Check that a rehash is not treated as a password change that revokes tokens"""
+        user = self.make_user(make_password("secret-password", hasher="md5"))
+        token = UserClaimsTokenObtainPairSerializer.get_token(user).access_token
+
+        with django_capture_on_commit_callbacks(execute=True):
+            user.check_password("secret-password")
+        assert not is_token_revoked(token)
+
+
+class TestCalibrateHashers:
+
+    def test_prints_settings(self):
+        """Check that calibration prints a cost for every setting of the chosen algorithm"""
+        stdout = io.StringIO()
+        call_command(
+            "calibrate_hashers",
+            "--algorithm=scrypt",
+            "--target-ms=10000",
+            "--samples=1",
+            "--scrypt-max-work-factor=2048",
+            stdout=stdout,
+            stderr=io.StringIO(),
+        )
+        assert stdout.getvalue().splitlines() == [
+            "SCRYPT_WORK_FACTOR=2048",
+            "SCRYPT_BLOCK_SIZE=8",
+            "SCRYPT_PARALLELISM=1",
+        ]
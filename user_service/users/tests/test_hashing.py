@@ -0,0 +1,148 @@
+import threading
+import time
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.contrib.auth.hashers import check_password, is_password_usable
+from users import hashing, views
+from users.hashing import HashingPoolFull, PasswordHasherPool
+from users.models import BaseUser
+from users.serializers import UserClaimsTokenObtainPairSerializer
+
+
+@pytest.fixture
+def full_pool():
+    pool = PasswordHasherPool(workers=0, max_pending=1, acquire_timeout=0.01)
+    pool._slots.acquire()
+    return pool
+
+
+class TestPasswordHasherPool:
+
+    def test_hash(self):
+        """Check that hashes are valid and empty passwords become unusable"""
+        pool = PasswordHasherPool(workers=0)
+
+        assert check_password("secret", pool.hash("secret"))
+        assert not is_password_usable(pool.hash(None))
+        assert check_password("secret", async_to_sync(pool.ahash)("secret"))
+
+    def test_hash_many_preserves_order(self):
+        """Check that batch hashing keeps the input order across chunks"""
+        pool = PasswordHasherPool(workers=0)
+        hashed = pool.hash_many(["one", "", "two", "three"], chunk_size=2)
+
+        assert check_password("one", hashed[0])
+        assert not is_password_usable(hashed[1])
+        assert check_password("two", hashed[2]) and check_password("three", hashed[3])
+
+    def test_batches_leave_slots_to_interactive_callers(self):
+        """Check that hash_many keeps at most its share of the slots while other callers still get theirs"""
+        pool = PasswordHasherPool(workers=1, max_pending=4, acquire_timeout=0.01)
+        submitted = []
+
+        class ManualExecutor:
+            def submit(self, fn, passwords):
+                submitted.append((Future(), passwords))
+                return submitted[-1][0]
+
+        pool._executor = ManualExecutor()
+        batch = threading.Thread(
+            target=pool.hash_many, args=([f"password{n}" for n in range(6)],), kwargs={"chunk_size": 1}
+        )
+        batch.start()
+        time.sleep(0.1)
+
+        assert len(submitted) == pool.max_batch_pending == 2
+        interactive = pool.submit_many(["secret"])
+        while batch.is_alive() and len(submitted) <= 7:
+            for future, passwords in submitted:
+                if future is not interactive and not future.done():
+                    future.set_result(passwords)
+            time.sleep(0.02)
+        assert len(submitted) == 7
+        batch.join(timeout=5)
+        assert not batch.is_alive()
+
+    def test_failed_submit_releases_its_slot(self):
+        """Check that a job the executor refuses gives back its slot and leaves the pending gauge"""
+        pool = PasswordHasherPool(workers=1, max_pending=1, acquire_timeout=0.01)
+
+        class RefusingExecutor:
+            def submit(self, fn, passwords):
+                raise RuntimeError("cannot schedule new futures after shutdown")
+
+        pool._executor = RefusingExecutor()
+        for _ in range(2):
+            with pytest.raises(RuntimeError):
+                pool.submit_many(["secret"])
+
+        metrics = pool.metrics.snapshot()
+        assert metrics["pending"] == 0 and metrics["failed"] == 2 and metrics["rejected"] == 0
+
+    def test_broken_pool_is_replaced(self, monkeypatch):
+        """Check that a pool whose worker died is replaced, both on submit and when a job fails with it"""
+        executors = []
+
+        class FakeExecutor:
+            def __init__(self, **kwargs):
+                self.broken = False
+                self.futures = []
+                executors.append(self)
+
+            def submit(self, fn, passwords):
+                if self.broken:
+                    raise BrokenProcessPool("A child process terminated abruptly")
+                self.futures.append(Future())
+                return self.futures[-1]
+
+            def shutdown(self, wait=True, cancel_futures=False):
+                pass
+
+        monkeypatch.setattr(hashing, "ProcessPoolExecutor", FakeExecutor)
+        pool = PasswordHasherPool(workers=1, max_pending=2)
+
+        pool.submit_many(["one"])
+        executors[0].broken = True
+        future = pool.submit_many(["two"])
+        assert len(executors) == 2 and pool._executor is executors[1]
+
+        future.set_exception(BrokenProcessPool("A child process terminated abruptly"))
+        assert pool._executor is None
+        pool.submit_many(["three"])
+        assert len(executors) == 3
+
+    def test_backpressure(self, full_pool):
+        """Check that callers are rejected once every slot is taken, and counted in the metrics"""
+        with pytest.raises(HashingPoolFull):
+            full_pool.hash("secret")
+        with pytest.raises(HashingPoolFull):
+            async_to_sync(full_pool.ahash)("secret")
+
+        full_pool._slots.release()
+        full_pool.hash("secret")
+        metrics = full_pool.metrics.snapshot()
+        assert metrics["rejected"] == 2
+        assert metrics["completed"] == 1
+        assert metrics["pending"] == 0
+
+
+@pytest.mark.django_db
+class TestHashingBackpressureInViews:
+
+    def test_signup_sheds_load_when_pool_is_full(self, client, full_pool, monkeypatch):
+        """Check that signups get 503 with Retry-After while the hashing pool is saturated"""
+        api_user = BaseUser.objects.create_user("api@example.com", "secret-password", role=BaseUser.Role.ADMIN)
+        token = UserClaimsTokenObtainPairSerializer.get_token(api_user).access_token
+        monkeypatch.setattr(views, "password_hasher", full_pool)
+
+        response = client.post(
+            "/api/users/",
+            {"email": "staff@example.com", "password": "secret-password"},
+            content_type="application/json",
+            HTTP_AUTHORIZATION=f"Bearer {token}",
+        )
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "1"
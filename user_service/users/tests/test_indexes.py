@@ -0,0 +1,50 @@
+import uuid
+
+import pytest
+from django.db import connection
+from users.models import AccountOwner, AccountUser, Admin, BaseClient, Staff
+
+
+def explain(queryset):
+    """Returns the query plan, forbidding sequential scans on PostgreSQL so that usable indexes are chosen."""
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+    return queryset.explain()
+
+
+@pytest.mark.django_db
+class TestRoleIndexPlans:
+
+    @pytest.fixture(autouse=True)
+    def skip_unsupported_vendor(self):
+        if connection.vendor not in ("postgresql", "sqlite"):
+            pytest.skip("Query plans are checked on PostgreSQL and SQLite only")
+
+    @pytest.mark.parametrize(
+        "model, index",
+        [
+            (Admin, "baseuser_role_joined_idx"),
+            (Staff, "baseuser_role_joined_idx"),
+            (AccountOwner, "baseclient_role_joined_idx"),
+            (AccountUser, "baseclient_role_joined_idx"),
+        ],
+    )
+    def test_proxy_manager_listing_uses_role_index(self, model, index):
+        """Check that role-filtered listings ordered by date_joined use the (role, date_joined) index"""
+        assert index in explain(model.objects.order_by("-date_joined"))
+
+    def test_date_joined_filter_uses_role_index(self):
+        """Check that date_joined range filters within a role use the (role, date_joined) index"""
+        queryset = AccountUser.objects.filter(date_joined__year=2024)
+        assert "baseclient_role_joined_idx" in explain(queryset)
+
+    def test_account_lookup_uses_account_index(self):
+        """Check that account lookups through a proxy manager use the (account_id, role) index"""
+        queryset = AccountUser.objects.filter(account_id=uuid.uuid4())
+        assert "baseclient_account_role_idx" in explain(queryset)
+
+    def test_subaccount_lookup_uses_subaccount_index(self):
+        """Check that subaccount lookups use the (subaccount_id, role) index"""
+        queryset = BaseClient.objects.filter(subaccount_id=uuid.uuid4(), role=BaseClient.Role.ACCOUNT_OWNER)
+        assert "baseclient_subacct_role_idx" in explain(queryset)
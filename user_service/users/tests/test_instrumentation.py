@@ -0,0 +1,67 @@
+import logging
+
+import pytest
+from django.http import HttpResponse
+from django.test import RequestFactory
+from users.instrumentation import InstrumentationMiddleware, span
+from users.models import BaseUser
+from users.serializers import UserClaimsTokenObtainPairSerializer
+
+
+def server_timing(response):
+    return dict(
+        (part.split(";")[0], part) for part in (item.strip() for item in response.headers["Server-Timing"].split(","))
+    )
+
+
+@pytest.mark.django_db
+class TestInstrumentationMiddleware:
+
+    def test_server_timing(self, client):
+        """Check that API responses report their SQL and total time"""
+        user = BaseUser.objects.create_user("timing@example.com", "secret-password", role=BaseUser.Role.ADMIN)
+        token = UserClaimsTokenObtainPairSerializer.get_token(user).access_token
+
+        response = client.get("/api/users/", HTTP_AUTHORIZATION=f"Bearer {token}")
+
+        timings = server_timing(response)
+        assert response.status_code == 200
+        assert timings["db"].endswith('desc="1 queries"')
+        assert "total" in timings
+
+    def test_duplicate_queries(self, caplog, settings):
+        """Check that a request repeating one statement is logged as a likely N+1"""
+        settings.INSTRUMENTATION = {**settings.INSTRUMENTATION, "DUPLICATE_QUERY_THRESHOLD": 3}
+        users = [BaseUser.objects.create_user(f"n{i}@example.com", None, role=BaseUser.Role.STAFF) for i in range(3)]
+
+        def view(request):
+            with span("serialize"):
+                for user in users:
+                    BaseUser.objects.get(pk=user.pk)
+            return HttpResponse()
+
+        with caplog.at_level(logging.WARNING, logger="users.instrumentation"):
+            response = InstrumentationMiddleware(view)(RequestFactory().get("/n-plus-one/"))
+
+        assert 'desc="3 queries"' in response.headers["Server-Timing"]
+        assert "serialize;dur=" in response.headers["Server-Timing"]
+        assert "repeated a query 3 times" in caplog.text
+
+    def test_metrics_endpoint(self, client):
+        """Check that the scrape endpoint exposes request, hashing and logging metrics"""
+        client.get("/metrics")
+        body = client.get("/metrics").content.decode()
+
+        assert 'http_request_duration_seconds_count{endpoint="metrics",method="GET",status="200"}' in body
+        assert "password_hashing_pending" in body
+        assert "log_records_dropped" in body
+
+    def test_metrics_endpoint_is_internal(self, client, settings):
+        """Check that /metrics refuses other networks unless they present the metrics token"""
+        settings.INSTRUMENTATION = {**settings.INSTRUMENTATION, "METRICS_TOKEN": "scrape-secret"}
+
+        assert client.get("/metrics", REMOTE_ADDR="203.0.113.7").status_code == 403
+        response = client.get("/metrics", REMOTE_ADDR="203.0.113.7", HTTP_AUTHORIZATION="Bearer wrong")
+        assert response.status_code == 403
+        response = client.get("/metrics", REMOTE_ADDR="203.0.113.7", HTTP_AUTHORIZATION="Bearer scrape-secret")
+        assert response.status_code == 200
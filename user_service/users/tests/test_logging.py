@@ -0,0 +1,99 @@
+import json
+import logging
+import os
+import threading
+
+from config.log import BoundedQueueHandler, JsonFormatter, SamplingFilter
+from users.tasks import record_audit_events
+
+
+class BlockingHandler(logging.Handler):
+    """Stands in for a handler stuck on a stalled disk"""
+
+    def __init__(self):
+        super().__init__()
+        self.unblock = threading.Event()
+        self.records = []
+
+    def emit(self, record):
+        self.unblock.wait(5)
+        self.records.append(record)
+
+
+def make_record(level=logging.INFO, **extra):
+    return logging.makeLogRecord({"name": "users.test", "levelno": level, "levelname": "INFO", "msg": "hi", **extra})
+
+
+class TestBoundedQueueHandler:
+
+    def test_stalled_target_drops_instead_of_blocking(self):
+        """Check that a full queue drops and counts records while its target is stuck"""
+        target = BlockingHandler()
+        handler = BoundedQueueHandler([target], maxsize=1)
+        for _ in range(5):
+            handler.handle(make_record())
+
+        assert handler.dropped >= 3
+        target.unblock.set()
+        handler.close()
+        assert len(target.records) == 5 - handler.dropped
+
+    def test_forked_child_starts_its_own_listener(self, tmp_path):
+        """Check that records logged in a forked child reach the targets instead of an orphaned queue"""
+        path = tmp_path / "child.log"
+        target = logging.FileHandler(path)
+        handler = BoundedQueueHandler([target])
+        handler.handle(make_record(msg="parent"))
+
+        pid = os.fork()
+        if pid == 0:
+            try:
+                handler.handle(make_record(msg="child"))
+                handler.close()
+            finally:
+                os._exit(0)
+        os.waitpid(pid, 0)
+        handler.close()
+        target.close()
+
+        assert sorted(path.read_text().split()) == ["child", "parent"]
+
+    def test_django_logger_is_queued(self):
+        """Check that the settings route django logs through a queue to the configured handlers"""
+        handler = logging.getLogger("django").handlers[0]
+
+        assert isinstance(handler, BoundedQueueHandler)
+        assert [target.name for target in handler.targets] == ["console_handler", "detailed_handler"]
+
+    def test_audit_records_are_kept(self, monkeypatch):
+        """Check that the settings pass audit records at INFO to the audit file, without caplog lowering the level"""
+        handler = logging.getLogger("users.audit").handlers[0]
+        records = []
+        monkeypatch.setattr(handler, "enqueue", records.append)
+
+        record_audit_events.run("users.BaseUser", ["1"], action="created")
+
+        assert [target.name for target in handler.targets] == ["audit_handler"]
+        assert [record.getMessage() for record in records] == ["users.BaseUser 1 created"]
+
+
+class TestJsonFormatter:
+
+    def test_format(self):
+        """Check that records become one JSON object including extra fields"""
+        data = json.loads(JsonFormatter().format(make_record(user_id="42")))
+
+        assert data["message"] == "hi"
+        assert data["logger"] == "users.test"
+        assert data["user_id"] == "42"
+
+
+class TestSamplingFilter:
+
+    def test_sampling(self):
+        """Check that records below the level are sampled and the rest always pass"""
+        sampler = SamplingFilter(rate=0)
+
+        assert not sampler.filter(make_record(logging.INFO))
+        assert sampler.filter(make_record(logging.WARNING))
+        assert SamplingFilter(rate=1).filter(make_record(logging.DEBUG))
@@ -0,0 +1,133 @@
+import json
+import uuid
+
+import pytest
+import redis
+from django.db import transaction
+from users.models import AccountUser, BaseUser, OutboxEvent
+from users.outbox import OutboxRelay, event_message
+
+
+class ListPublisher:
+    """Records published events in place of Redis"""
+
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.events = []
+
+    def publish(self, events):
+        if self.fail:
+            raise redis.ConnectionError("broker down")
+        self.events.extend(events)
+
+
+def create_client(index, **extra):
+    return AccountUser.objects.create(
+        email=f"outbox{index}@example.com",
+        phone_number=f"555100{index:04d}",
+        company_name="Outbox Corp",
+        country="Wonderland",
+        city="Event City",
+        domain=f"outbox{index}.example.com",
+        account_id=uuid.uuid4(),
+        subaccount_id=uuid.uuid4(),
+        **extra,
+    )
+
+
+@pytest.mark.django_db
+class TestOutboxEvents:
+
+    def event_types(self, instance):
+        return list(
+            OutboxEvent.objects.filter(aggregate_id=instance.pk).order_by("id").values_list("event_type", flat=True)
+        )
+
+    def test_lifecycle_events(self):
+        """Check that creating, updating, deactivating and deleting a client each record an event"""
+        client = create_client(1, is_active=True)
+        client.city = "New City"
+        client.save()
+        client.is_active = False
+        client.save()
+        pk = client.pk
+        client.delete()
+
+        assert list(OutboxEvent.objects.filter(aggregate_id=pk).values_list("event_type", flat=True)) == [
+            "created",
+            "updated",
+            "deactivated",
+            "deleted",
+        ]
+        event = OutboxEvent.objects.filter(aggregate_id=pk).first()
+        assert event.aggregate_type == "BaseClient"
+        assert event.payload["email"] == "outbox1@example.com"
+        assert "password" not in event.payload
+
+    def test_event_rolls_back_with_the_change(self):
+        """Check that the event is written in the transaction of the change"""
+        with pytest.raises(RuntimeError), transaction.atomic():
+            create_client(2)
+            raise RuntimeError
+
+        assert not OutboxEvent.objects.exists()
+
+    def test_password_rehash_records_no_event(self, settings):
+        """Check that bookkeeping saves such as a rehash on login are not lifecycle events"""
+        user = BaseUser.objects.create_user("rehash@example.com", "secret-password", role=BaseUser.Role.STAFF)
+        settings.PASSWORD_HASHERS = ["django.contrib.auth.hashers.PBKDF2PasswordHasher", *settings.PASSWORD_HASHERS]
+        assert BaseUser.objects.get(pk=user.pk).check_password("secret-password")
+
+        assert self.event_types(user) == ["created"]
+
+
+@pytest.mark.django_db
+class TestOutboxRelay:
+
+    def test_relays_in_order_and_drains(self):
+        """Check that batches are published in id order per partition and deleted afterwards"""
+        client = create_client(3, is_active=True)
+        other = create_client(4)
+        client.is_active = False
+        client.save()
+        publisher = ListPublisher()
+
+        relayed = OutboxRelay(publisher, batch_size=2).run(once=True)
+
+        assert relayed == 3
+        assert [
+            (event.aggregate_id, event.event_type) for event in publisher.events if event.aggregate_id == client.pk
+        ] == [
+            (client.pk, "created"),
+            (client.pk, "deactivated"),
+        ]
+        assert other.pk in {event.aggregate_id for event in publisher.events}
+        assert not OutboxEvent.objects.exists()
+
+    def test_failed_publish_keeps_events(self):
+        """Check that events stay in the outbox until a publish succeeds (at-least-once)"""
+        create_client(5)
+
+        with pytest.raises(redis.ConnectionError):
+            OutboxRelay(ListPublisher(fail=True)).run(once=True)
+        assert OutboxEvent.objects.count() == 1
+
+    def test_partitions(self):
+        """Check that a relay only drains its own partitions, and a user's events share one"""
+        client = create_client(6)
+        client.save()
+        partition = OutboxEvent.partition_for(client.pk)
+        others = [p for p in range(16) if p != partition]
+
+        assert OutboxRelay(ListPublisher(), partitions=others).run(once=True) == 0
+        assert set(OutboxEvent.objects.values_list("partition", flat=True)) == {partition}
+        assert OutboxRelay(ListPublisher(), partitions=[partition]).run(once=True) == 2
+
+    def test_message(self):
+        """Check the stream entry carries the event id consumers deduplicate on"""
+        create_client(7)
+        message = event_message(OutboxEvent.objects.get())
+
+        assert message["event_type"] == "BaseClient.created"
+        assert json.loads(message["payload"])["email"] == "outbox7@example.com"
+        assert message["event_id"] == str(OutboxEvent.objects.get().pk)
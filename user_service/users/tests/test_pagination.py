@@ -0,0 +1,117 @@
+import base64
+import json
+import uuid
+from datetime import timedelta
+
+import pytest
+from django.db import connection
+from django.db.models import Value
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.exceptions import NotFound
+from users.models import BaseClient
+from users.pagination import KeysetPagination, RankedKeysetPagination, estimated_count
+
+
+ACCOUNT_ID = uuid.uuid4()
+
+
+def make_clients(count, same_date_joined=False):
+    now = timezone.now()
+    BaseClient.objects.bulk_create(
+        BaseClient(
+            email=f"client{n}@example.com",
+            phone_number=f"+1555000{n:04d}",
+            domain=f"client{n}.example.com",
+            account_id=ACCOUNT_ID,
+            subaccount_id=ACCOUNT_ID,
+            date_joined=now if same_date_joined else now - timedelta(minutes=n),
+        )
+        for n in range(count)
+    )
+
+
+def walk(queryset, **params):
+    """Follows next links until the end and returns the pages"""
+    factory, pages, cursor = RequestFactory(), [], None
+    while True:
+        query = dict(params, **({"cursor": cursor} if cursor else {}))
+        paginator = KeysetPagination()
+        results = paginator.paginate_queryset(queryset, factory.get("/api/clients/", query))
+        page = paginator.get_paginated_response(results).data
+        pages.append(page)
+        if not page["next"]:
+            return pages
+        cursor = page["next"].split("cursor=")[1].split("&")[0]
+
+
+@pytest.mark.django_db
+class TestKeysetPagination:
+
+    @pytest.mark.parametrize("same_date_joined", [False, True])
+    def test_pages_cover_every_row_once(self, same_date_joined):
+        """Check that following cursors returns each row exactly once, newest first, ties broken by id"""
+        make_clients(7, same_date_joined)
+        queryset = BaseClient.objects.values("id", "date_joined")
+
+        pages = walk(queryset, page_size=3)
+
+        assert [len(page["results"]) for page in pages] == [3, 3, 1]
+        rows = [row for page in pages for row in page["results"]]
+        assert rows == list(queryset.order_by("-date_joined", "-id"))
+
+    def test_page_queries_do_not_count_or_offset(self):
+        """Check that a page is a single query without COUNT or OFFSET"""
+        make_clients(5)
+        request = RequestFactory().get("/api/clients/", {"page_size": 2})
+
+        with CaptureQueriesContext(connection) as queries:
+            KeysetPagination().paginate_queryset(BaseClient.objects.values("id", "date_joined"), request)
+
+        assert len(queries) == 1
+        sql = queries[0]["sql"].upper()
+        assert "COUNT(" not in sql and "OFFSET" not in sql
+
+    @pytest.mark.parametrize("page_size, expected", [("1000", 100), ("0", 1), ("nope", 10)])
+    def test_page_size_is_bounded(self, page_size, expected):
+        """Check that requested page sizes are clamped to [1, max_page_size]"""
+        request = RequestFactory().get("/api/clients/", {"page_size": page_size})
+        assert KeysetPagination().get_page_size(request) == expected
+
+    def test_invalid_cursor(self):
+        """Check that tampered cursors are answered with 404"""
+        request = RequestFactory().get("/api/clients/", {"cursor": "not-a-cursor"})
+        with pytest.raises(NotFound):
+            KeysetPagination().paginate_queryset(BaseClient.objects.values("id", "date_joined"), request)
+
+    @pytest.mark.parametrize(
+        "pagination, values",
+        [
+            (KeysetPagination, ["2024-01-01T00:00:00", 2]),
+            (KeysetPagination, [None, None]),
+            (KeysetPagination, {"date_joined": "2024-01-01T00:00:00"}),
+            (KeysetPagination, "2024-01-01T00:00:00"),
+            (RankedKeysetPagination, [[1.0], str(uuid.uuid4())]),
+            (RankedKeysetPagination, [1.0, 2]),
+        ],
+    )
+    def test_cursor_of_the_wrong_types(self, pagination, values):
+        """Check that well-formed cursors holding values of the wrong types are answered with 404"""
+        cursor = base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+        request = RequestFactory().get("/api/clients/", {"cursor": cursor})
+        queryset = BaseClient.objects.values("id", "date_joined")
+        with pytest.raises(NotFound):
+            pagination().paginate_queryset(queryset.annotate(rank=Value(1.0)), request)
+
+    def test_estimated_count(self):
+        """Check that the estimated count is only returned on request and read from planner statistics"""
+        make_clients(3)
+        queryset = BaseClient.objects.values("id", "date_joined")
+
+        assert "count" not in walk(queryset)[0]
+        page = walk(queryset, count="estimated")[0]
+        if connection.vendor == "postgresql":
+            assert page["count"] == estimated_count(queryset)
+        else:
+            assert page["count"] is None
@@ -0,0 +1,208 @@
+import uuid
+
+import pytest
+from django.core.management import CommandError, call_command
+from django.db import connection, transaction
+from users import partitioning
+from users.models import AccountUser, BaseClient
+from users.tests.factories import AccountOwnerFactory, AccountUserFactory
+
+
+class RecordingCursor:
+    """Stands in for a PostgreSQL cursor: records the statements and answers the swap's queries"""
+
+    def __init__(self, counts=(3, 3), differing=()):
+        self.statements = []
+        self.counts = counts
+        self.differing = differing
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def execute(self, sql, params=None):
+        self.statements.append(sql)
+
+    def fetchone(self):
+        return self.counts
+
+    def fetchall(self):
+        last = self.statements[-1]
+        if "information_schema.columns" in last:
+            return [("id",), ("email",), ("account_id",)]
+        if "users_baseclient_changes" in last:
+            return [(pk,) for pk in self.differing]
+        return []
+
+
+class RecordingConnection:
+    alias = "default"
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def cursor(self):
+        return self._cursor
+
+
+class TestPartitioningSQL:
+
+    @pytest.mark.parametrize(
+        "name, definition, expected",
+        [
+            (
+                "baseclient_role_joined_idx",
+                "CREATE INDEX baseclient_role_joined_idx ON public.users_baseclient USING btree (role, date_joined)",
+                "CREATE INDEX baseclient_role_joined_idx_p ON users_baseclient_partitioned USING btree (role, date_joined)",
+            ),
+            (
+                "users_baseclient_email_key",
+                "CREATE UNIQUE INDEX users_baseclient_email_key ON public.users_baseclient USING btree (email)",
+                "CREATE INDEX users_baseclient_email_key_p ON users_baseclient_partitioned USING btree (email)",
+            ),
+        ],
+    )
+    def test_partitioned_index_sql(self, name, definition, expected):
+        """Check that source indexes are recreated on the partitioned table, unique ones as plain indexes"""
+        assert partitioning.partitioned_index_sql(name, definition) == expected
+
+    def test_partitioned_indexes_sql(self):
+        """Check that the partitioned table gets every source index but the primary key, and a plain (id) index"""
+        indexes = [
+            (
+                "users_baseclient_pkey",
+                "CREATE UNIQUE INDEX users_baseclient_pkey ON public.users_baseclient USING btree (id)",
+            ),
+            (
+                "users_baseclient_email_key",
+                "CREATE UNIQUE INDEX users_baseclient_email_key ON public.users_baseclient USING btree (email)",
+            ),
+            (
+                "baseclient_account_id_idx",
+                "CREATE INDEX baseclient_account_id_idx ON public.users_baseclient USING btree (account_id, id)",
+            ),
+        ]
+
+        assert set(partitioning.partitioned_indexes_sql(indexes)) == {
+            "CREATE INDEX users_baseclient_email_key_p ON users_baseclient_partitioned USING btree (email)",
+            "CREATE INDEX baseclient_account_id_idx_p ON users_baseclient_partitioned USING btree (account_id, id)",
+            "CREATE INDEX baseclient_id_idx_p ON users_baseclient_partitioned USING btree (id)",
+        }
+
+    def test_unexpected_index_definition(self):
+        """Check that an index of another table is not silently rewritten"""
+        with pytest.raises(ValueError):
+            partitioning.partitioned_index_sql("other_idx", "CREATE INDEX other_idx ON public.other USING btree (id)")
+
+    def test_mirror_function_sql(self):
+        """Check that the mirror copies only the given columns and moves rows by delete and insert"""
+        sql = partitioning.mirror_function_sql(["id", "email", "account_id"])
+
+        assert "INSERT INTO users_baseclient_partitioned (id, email, account_id) VALUES (NEW.id, NEW.email" in sql
+        assert "DELETE FROM users_baseclient_partitioned WHERE account_id = OLD.account_id AND id = OLD.id" in sql
+        assert "INSERT INTO users_baseclient_changes (client_id) VALUES (COALESCE(NEW.id, OLD.id))" in sql
+
+    def test_guard_function_sql(self):
+        """Check that the guard keeps one row per unique key"""
+        sql = partitioning.guard_function_sql()
+
+        for key in partitioning.GUARDED_KEYS:
+            assert f"('{key}', NEW.{key}::text)" in sql and f"('{key}', OLD.{key}::text)" in sql
+
+    def test_command_needs_postgresql(self, db):
+        """Check that the command refuses to run on other databases"""
+        with pytest.raises(CommandError, match="PostgreSQL"):
+            call_command("partition_clients")
+
+
+@pytest.mark.django_db
+class TestSwapTables:
+
+    def test_counts_before_locking(self):
+        """Check that the full count runs before the exclusive lock, and only logged rows are compared under it"""
+        cursor = RecordingCursor()
+        partitioning.swap_tables(RecordingConnection(cursor))
+
+        lock = cursor.statements.index("LOCK TABLE users_baseclient IN ACCESS EXCLUSIVE MODE")
+        counts = [i for i, sql in enumerate(cursor.statements) if "count(*)" in sql]
+        assert counts and max(counts) < lock
+        assert cursor.statements[lock - 1] == "DELETE FROM users_baseclient_changes"
+        assert "FROM users_baseclient_changes" in cursor.statements[lock + 2]
+        assert "DROP TABLE users_baseclient_changes" in cursor.statements
+
+    @pytest.mark.parametrize("cursor", [RecordingCursor(counts=(3, 2)), RecordingCursor(differing=[uuid.uuid4()])])
+    def test_incomplete_copy_is_not_swapped(self, cursor):
+        """Check that a count mismatch or a differing logged row stops the swap before any rename"""
+        with pytest.raises(RuntimeError):
+            partitioning.swap_tables(RecordingConnection(cursor))
+
+        assert not any("RENAME" in sql for sql in cursor.statements)
+
+
+@pytest.mark.skipif(connection.vendor != "postgresql", reason="Partitioning needs PostgreSQL")
+@pytest.mark.django_db(transaction=True)
+class TestPartitioningOnPostgreSQL:
+
+    @pytest.fixture(autouse=True)
+    def empty_partitions(self, transactional_db):
+        # The flush between tests truncates users_baseclient without firing the mirror trigger
+        with connection.cursor() as cursor:
+            cursor.execute(f"TRUNCATE {partitioning.TARGET}, {partitioning.GUARD}, {partitioning.CHANGES}")
+
+    def test_copy_and_swap(self):
+        """Check that copied and mirrored rows pass the checks and the swap leaves an indexed, partitioned table"""
+        clients = AccountUserFactory.create_batch(5)
+        assert partitioning.is_prepared(connection)
+        last = uuid.UUID(int=0)
+        while (last := partitioning.copy_batch(connection, last, 2)) is not None:
+            pass
+        BaseClient.objects.filter(pk=clients[0].pk).update(city="Mirror City")
+        AccountOwnerFactory()
+
+        partitioning.verify_copy(connection)
+        # DDL is transactional in PostgreSQL: roll the swap back so the rest of the suite keeps the plain table
+        with transaction.atomic():
+            partitioning.lock_and_swap(connection)
+            with connection.cursor() as cursor:
+                indexes = {name for name, _ in partitioning.table_indexes(cursor, partitioning.SOURCE)}
+                cursor.execute(
+                    "SELECT count(*) FROM pg_partitioned_table WHERE partrelid = %s::regclass", ["users_baseclient"]
+                )
+                assert cursor.fetchone()[0] == 1
+            assert {"users_baseclient_pkey", "baseclient_id_idx", "baseclient_account_id_idx"} <= indexes
+            assert BaseClient.objects.count() == 6
+            assert BaseClient.objects.get(pk=clients[0].pk).city == "Mirror City"
+            transaction.set_rollback(True)
+
+    def test_swap_rejects_a_differing_row(self):
+        """Check that a logged row whose copy differs stops the swap"""
+        client = AccountUserFactory()
+        last = uuid.UUID(int=0)
+        while (last := partitioning.copy_batch(connection, last, 100)) is not None:
+            pass
+        partitioning.verify_copy(connection)
+        with connection.cursor() as cursor:
+            cursor.execute(f"UPDATE {partitioning.TARGET} SET city = 'Stale City' WHERE id = %s", [client.pk])
+            cursor.execute(f"INSERT INTO {partitioning.CHANGES} (client_id) VALUES (%s)", [client.pk])
+
+        with pytest.raises(RuntimeError, match=str(client.pk)):
+            partitioning.lock_and_swap(connection)
+        assert partitioning.is_prepared(connection)
+
+
+@pytest.mark.django_db
+class TestForAccount:
+
+    def test_for_account(self):
+        """Check that clients are scoped to an account and optionally a subaccount"""
+        account_id, subaccount_id = uuid.uuid4(), uuid.uuid4()
+        owner = AccountOwnerFactory(account_id=account_id, subaccount_id=subaccount_id)
+        user = AccountUserFactory(account_id=account_id)
+        AccountUserFactory()
+
+        assert set(BaseClient.objects.for_account(account_id)) == {owner, user}
+        assert list(BaseClient.objects.for_account(account_id, subaccount_id)) == [owner]
+        assert list(AccountUser.objects.for_account(account_id)) == [user]
+        assert list(AccountUser.objects.filter(is_active=True).for_account(account_id)) == []
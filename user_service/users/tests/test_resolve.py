@@ -0,0 +1,64 @@
+import uuid
+
+import pytest
+from django.db import connection
+from django.db.backends.postgresql.base import DatabaseWrapper
+from users.models import BaseClient
+from users.resolve import resolve_clients
+from users.tests.factories import AccountUserFactory
+
+
+def postgresql_sql(queryset):
+    wrapper = DatabaseWrapper({**connection.settings_dict, "ENGINE": "django.db.backends.postgresql"})
+    return queryset.query.get_compiler(connection=wrapper).as_sql()
+
+
+class TestAnyLookup:
+
+    def test_postgresql_binds_one_array(self):
+        """Check that the lookup is `= ANY` over a single array parameter on PostgreSQL"""
+        keys = ["a@example.com", "b@example.com", "a@example.com", None]
+        sql, params = postgresql_sql(BaseClient.objects.filter(email__any=keys).values("id"))
+
+        assert '"users_baseclient"."email" = ANY(%s::varchar(254)[])' in sql
+        assert params == (["a@example.com", "b@example.com"],)
+
+    def test_uuid_array(self):
+        """Check that ids are bound as a uuid array"""
+        pk = uuid.uuid4()
+        sql, params = postgresql_sql(BaseClient.objects.filter(id__any=[pk]).values("id"))
+
+        assert "= ANY(%s::uuid[])" in sql
+        assert params == ([pk],)
+
+
+@pytest.mark.django_db
+class TestResolveClients:
+
+    @pytest.fixture
+    def clients(self):
+        return AccountUserFactory.create_batch(3)
+
+    @pytest.mark.parametrize("key_type", ["email", "phone_number", "domain", "id"])
+    def test_resolves_with_one_query(self, clients, key_type, django_assert_num_queries):
+        """Check that every key type resolves to client and account ids and marks misses"""
+        keys = [getattr(client, key_type) for client in clients]
+        missing = uuid.uuid4() if key_type == "id" else "missing"
+
+        with django_assert_num_queries(1):
+            results = resolve_clients(key_type, [*keys, missing])
+
+        assert results[str(missing)] is None
+        for key, client in zip(keys, clients):
+            assert results[str(key)] == {"id": client.pk, "account_id": client.account_id}
+
+    def test_email_domain_is_normalized(self, clients):
+        """Check that emails match whatever the case of their domain, keyed as given"""
+        email = clients[0].email.replace("example.com", "EXAMPLE.com")
+
+        assert resolve_clients("email", [email])[email]["id"] == clients[0].pk
+
+    def test_unsupported_key_type(self):
+        """Check that only unique-indexed columns can be resolved"""
+        with pytest.raises(ValueError):
+            resolve_clients("city", ["Springfield"])
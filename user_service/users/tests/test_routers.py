@@ -0,0 +1,146 @@
+import threading
+import uuid
+
+import pytest
+from celery.signals import task_postrun, task_prerun
+from django.db import transaction
+from django.http import HttpResponse
+from django.test import RequestFactory
+from users.middleware import ReplicaPinningMiddleware
+from users.models import AccountUser, BaseClient, BaseUser
+from users.routers import ReplicaRouter, end_routing, get_routing_state, pin_primary, primary_reads, start_routing
+
+
+def make_client(n=1):
+    return BaseClient.objects.create(
+        email=f"client{n}@example.com",
+        phone_number=f"+1555000{n:04d}",
+        domain=f"client{n}.example.com",
+        account_id=uuid.uuid4(),
+        subaccount_id=uuid.uuid4(),
+    )
+
+
+@pytest.fixture(autouse=True)
+def replicas(settings):
+    settings.DATABASE_REPLICAS = ["replica"]
+    settings.REPLICA_STICKY_SECONDS = 5
+
+
+class TestReplicaRouter:
+
+    def test_reads_go_to_replicas_until_a_write(self):
+        """Check that reads use a replica and that a write pins the scope to the primary"""
+        router = ReplicaRouter()
+        assert router.db_for_read(AccountUser) == "replica"
+        assert router.db_for_write(AccountUser) == "default"
+        assert router.db_for_read(AccountUser) == "default"
+
+    def test_primary_reads(self):
+        """Check that primary_reads() forces the primary only inside the block"""
+        router = ReplicaRouter()
+        with primary_reads():
+            assert router.db_for_read(BaseUser) == "default"
+        assert router.db_for_read(BaseUser) == "replica"
+
+    def test_other_apps_are_not_routed(self):
+        """Check that models outside the users app keep the default routing"""
+        from django.contrib.sessions.models import Session
+
+        assert ReplicaRouter().db_for_read(Session) is None
+        assert ReplicaRouter().allow_migrate("replica", "users") is False
+
+    @pytest.mark.django_db(transaction=True, databases=["default", "replica"])
+    def test_transactions_read_from_primary(self):
+        """Check that reads inside a transaction see the transaction's writes"""
+        assert AccountUser.objects.db == "replica"
+        with transaction.atomic():
+            assert AccountUser.objects.db == "default"
+
+    @pytest.mark.django_db(transaction=True, databases=["default", "replica"])
+    def test_read_your_writes(self):
+        """Check that a created client is read back from the primary in its scope and from the replica later"""
+        client = make_client()
+        assert AccountUser.objects.get(pk=client.pk).email == "client1@example.com"
+        assert get_routing_state().wrote
+
+        token = start_routing()
+        try:
+            assert AccountUser.objects.db == "replica"
+            assert AccountUser.objects.filter(pk=client.pk).exists()
+        finally:
+            end_routing(token)
+
+
+class TestRoutingScopes:
+
+    @staticmethod
+    def in_new_context(fn):
+        """Runs fn in a thread, whose context has no routing scope"""
+        results = []
+        thread = threading.Thread(target=lambda: results.append(fn()))
+        thread.start()
+        thread.join()
+        return results[0]
+
+    def test_no_scope_reads_primary_and_remembers_nothing(self):
+        """Check that without a scope reads go to the primary and a pin does not stick to the context"""
+
+        def run():
+            pin_primary()
+            ReplicaRouter().db_for_write(BaseClient)
+            return ReplicaRouter().db_for_read(BaseClient), get_routing_state().wrote
+
+        assert self.in_new_context(run) == ("default", False)
+
+    def test_tasks_get_their_own_scope(self):
+        """Check that a Celery task's write pins only that task"""
+
+        def run():
+            task_prerun.send(sender=None, task_id="task-1", task=None)
+            ReplicaRouter().db_for_write(BaseClient)
+            pinned_in_task = ReplicaRouter().db_for_read(BaseClient)
+            task_postrun.send(sender=None, task_id="task-1", task=None)
+            task_prerun.send(sender=None, task_id="task-2", task=None)
+            try:
+                return pinned_in_task, ReplicaRouter().db_for_read(BaseClient)
+            finally:
+                task_postrun.send(sender=None, task_id="task-2", task=None)
+
+        assert self.in_new_context(run) == ("default", "replica")
+
+
+class TestReplicaPinningMiddleware:
+
+    def test_write_sets_sticky_cookie(self):
+        """Check that a writing request pins the client's next requests to the primary"""
+
+        def view(request):
+            ReplicaRouter().db_for_write(BaseClient)
+            return HttpResponse()
+
+        response = ReplicaPinningMiddleware(view)(RequestFactory().post("/"))
+        cookie = response.cookies["primary_pin"]
+        assert cookie["max-age"] == 5
+
+        request = RequestFactory().get("/")
+        request.COOKIES["primary_pin"] = cookie.value
+        seen = []
+        ReplicaPinningMiddleware(
+            lambda request: seen.append(ReplicaRouter().db_for_read(BaseClient)) or HttpResponse()
+        )(request)
+        assert seen == ["default"]
+
+    def test_reads_do_not_set_cookie(self):
+        """Check that read-only requests stay unpinned and set no cookie"""
+        seen = []
+
+        def view(request):
+            seen.append(ReplicaRouter().db_for_read(BaseClient))
+            return HttpResponse()
+
+        request = RequestFactory().get("/")
+        request.COOKIES["primary_pin"] = "0"
+        response = ReplicaPinningMiddleware(view)(request)
+        assert seen == ["replica"]
+        assert "primary_pin" not in response.cookies
@@ -0,0 +1,39 @@
+import pytest
+from users.models import BaseClient
+from users.search import search_clients
+from users.tests.factories import AccountOwnerFactory, AccountUserFactory
+
+
+@pytest.mark.django_db
+class TestSearchClients:
+
+    @pytest.fixture
+    def clients(self):
+        return [
+            AccountOwnerFactory(company_name="Acme Rockets", city="Springfield", domain="acme.example.com"),
+            AccountUserFactory(first_name="Wile", last_name="Coyote", company_name="Desert Supplies"),
+            AccountUserFactory(company_name="Road Runner Acme Fans", city="Tucson"),
+        ]
+
+    def search(self, term):
+        return list(search_clients(term).order_by("-rank", "-id").values_list("company_name", flat=True))
+
+    def test_matches_any_field(self, clients):
+        """Check that names, company, domain and city are searched by substring"""
+        assert self.search("coyote") == ["Desert Supplies"]
+        assert self.search("SPRING") == ["Acme Rockets"]
+        assert self.search("acme.example") == ["Acme Rockets"]
+        assert self.search("nobody") == []
+
+    def test_every_word_must_match(self, clients):
+        """Check that multi-word queries narrow the results"""
+        assert self.search("acme tucson") == ["Road Runner Acme Fans"]
+
+    def test_ranking(self, clients):
+        """Check that fields starting with the query rank above other matches"""
+        assert self.search("acme") == ["Acme Rockets", "Road Runner Acme Fans"]
+
+    def test_restricts_given_queryset(self, clients):
+        """Check that the search filters the queryset it is given"""
+        owners = BaseClient.objects.filter(role=BaseClient.Role.ACCOUNT_OWNER)
+        assert [client.pk for client in search_clients("acme", owners)] == [clients[0].pk]
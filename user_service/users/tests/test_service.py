@@ -0,0 +1,178 @@
+import io
+import json
+import uuid
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from users.models import AccountOwner, AccountUser, BaseClient, OutboxEvent
+from users.service import read_rows
+
+
+ACCOUNT_ID = uuid.uuid4()
+SUBACCOUNT_ID = uuid.uuid4()
+
+
+def make_row(n, **overrides):
+    row = {
+        "first_name": f"First{n}",
+        "last_name": f"Last{n}",
+        "email": f"client{n}@example.com",
+        "phone_number": f"+1555000{n:04d}",
+        "company_name": f"Company {n}",
+        "country": "Wonderland",
+        "city": "Magic City",
+        "domain": f"client{n}.example.com",
+        "password": f"secret-{n}",
+    }
+    row.update(overrides)
+    return row
+
+
+@pytest.mark.django_db
+class TestBulkImportClients:
+
+    def import_rows(self, rows, **kwargs):
+        kwargs.setdefault("workers", 0)
+        kwargs.setdefault("account_id", ACCOUNT_ID)
+        kwargs.setdefault("subaccount_id", SUBACCOUNT_ID)
+        return BaseClient.objects.bulk_import_clients(rows, **kwargs)
+
+    def test_import_creates_clients(self):
+        """Check that valid rows are inserted with hashed passwords and default ids"""
+        report = self.import_rows([make_row(i) for i in range(5)])
+
+        assert report.created == 5
+        assert report.errors == []
+        client = AccountUser.objects.get(email="client3@example.com")
+        assert client.account_id == ACCOUNT_ID
+        assert client.check_password("secret-3")
+
+    def test_import_uses_bulk_insert_per_batch(self):
+        """Check that a batch costs one lookup per unique field, a single INSERT and one for its outbox events"""
+        with CaptureQueriesContext(connection) as ctx:
+            self.import_rows([make_row(i) for i in range(20)], batch_size=20)
+
+        inserts = [q["sql"] for q in ctx.captured_queries if q["sql"].startswith("INSERT")]
+        assert len(inserts) == 2
+        assert OutboxEvent.objects.count() == 20
+        assert BaseClient.objects.count() == 20
+
+    def test_import_reports_row_errors(self):
+        """Check that invalid and duplicate rows are reported without aborting the import"""
+        rows = [
+            make_row(1),
+            make_row(2, phone_number="InvalidPhone"),
+            make_row(3, email="not-an-email"),
+            make_row(4, domain="-bad-.example"),
+            make_row(5, email="client1@example.com"),
+            make_row(6, role="Owner"),
+            make_row(7),
+        ]
+        report = self.import_rows(rows, batch_size=3)
+
+        assert report.created == 2
+        assert [(error.line, error.field) for error in report.errors] == [
+            (2, "phone_number"),
+            (3, "email"),
+            (4, "domain"),
+            (5, "email"),
+            (6, "role"),
+        ]
+
+    def test_import_reports_values_of_the_wrong_type(self):
+        """Check that non-string JSONL values are reported for their row without aborting the import"""
+        rows = [
+            make_row(1, phone_number=15550001234),
+            make_row(2, domain=42),
+            make_row(3, email=["client3@example.com"], role={"name": "Owner"}),
+            make_row(4, account_id=4),
+            make_row(5),
+        ]
+        report = self.import_rows(rows)
+
+        assert report.created == 1
+        assert [(error.line, error.field, error.message) for error in report.errors] == [
+            (1, "phone_number", "Must be a string."),
+            (2, "domain", "Must be a string."),
+            (3, "email", "Must be a string."),
+            (3, "role", "Must be a string."),
+            (4, "account_id", "Enter a valid UUID."),
+        ]
+
+    def test_import_skips_existing_clients(self):
+        """Check that rows colliding with stored clients are rejected"""
+        self.import_rows([make_row(1)])
+        report = self.import_rows([make_row(2, domain="client1.example.com"), make_row(3)])
+
+        assert report.created == 1
+        assert report.errors[0].field == "domain"
+
+    def test_import_with_process_pool(self):
+        """Check that hashing across worker processes produces valid passwords"""
+        report = self.import_rows([make_row(i) for i in range(4)], workers=2, role=BaseClient.Role.ACCOUNT_OWNER)
+
+        assert report.created == 4
+        owner = AccountOwner.objects.get(email="client2@example.com")
+        assert owner.check_password("secret-2")
+
+    def test_import_without_password(self):
+        """Check that rows without a password get an unusable password"""
+        self.import_rows([make_row(1, password="")])
+        assert not BaseClient.objects.get(email="client1@example.com").has_usable_password()
+
+
+class TestReadRows:
+
+    def test_read_csv(self):
+        """Check that CSV rows are read with their line numbers"""
+        stream = io.StringIO("email,city\na@example.com,Paris\nb@example.com,Rome\n")
+        assert [(line, row["email"]) for line, row in read_rows(stream, "csv")] == [
+            (2, "a@example.com"),
+            (3, "b@example.com"),
+        ]
+
+    def test_read_jsonl_with_invalid_line(self):
+        """Check that malformed JSONL lines are yielded as errors"""
+        stream = io.StringIO('{"email": "a@example.com"}\n{broken\n\n[1]\n')
+        rows = list(read_rows(stream, "jsonl"))
+
+        assert rows[0] == (1, {"email": "a@example.com"})
+        assert isinstance(rows[1][1], ValueError)
+        assert rows[2][0] == 4 and isinstance(rows[2][1], ValueError)
+
+
+@pytest.mark.django_db
+class TestImportClientsCommand:
+
+    def test_command_imports_jsonl(self, tmp_path):
+        """Check that the import_clients command reads JSONL files"""
+        path = tmp_path / "clients.jsonl"
+        path.write_text("\n".join(json.dumps(make_row(i)) for i in range(3)))
+        stdout, stderr = io.StringIO(), io.StringIO()
+
+        call_command(
+            "import_clients",
+            str(path),
+            "--workers=0",
+            f"--account-id={ACCOUNT_ID}",
+            f"--subaccount-id={SUBACCOUNT_ID}",
+            stdout=stdout,
+            stderr=stderr,
+        )
+
+        assert "Imported 3 clients, 0 rows failed" in stdout.getvalue()
+        assert AccountUser.objects.count() == 3
+
+    def test_command_reports_missing_account(self, tmp_path):
+        """Check that rows without an account id are reported"""
+        path = tmp_path / "clients.csv"
+        row = make_row(1)
+        path.write_text(",".join(row) + "\n" + ",".join(row.values()) + "\n")
+        stdout, stderr = io.StringIO(), io.StringIO()
+
+        call_command("import_clients", str(path), "--workers=0", stdout=stdout, stderr=stderr)
+
+        assert "[account_id]" in stderr.getvalue()
+        assert BaseClient.objects.count() == 0
@@ -0,0 +1,69 @@
+import runpy
+
+import pytest
+from config.settings.base import database
+from config.settings.profiles import apply_profile
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+
+def settings_namespace():
+    return {name: getattr(settings, name) for name in ("INSTALLED_APPS", "MIDDLEWARE", "TEMPLATES", "REST_FRAMEWORK")}
+
+
+class TestSettingsProfiles:
+
+    def test_full_keeps_everything(self):
+        """Check that the default profile leaves the settings untouched"""
+        namespace = settings_namespace()
+        apply_profile(namespace, "full")
+
+        assert namespace == settings_namespace()
+
+    def test_api(self):
+        """Check that the api profile drops the browser apps, middleware and renderers"""
+        namespace = settings_namespace()
+        apply_profile(namespace, "api")
+
+        assert "django.contrib.admin" not in namespace["INSTALLED_APPS"]
+        assert "rest_framework" in namespace["INSTALLED_APPS"]
+        assert "django.contrib.sessions.middleware.SessionMiddleware" not in namespace["MIDDLEWARE"]
+        assert "users.instrumentation.InstrumentationMiddleware" in namespace["MIDDLEWARE"]
+        assert namespace["REST_FRAMEWORK"]["DEFAULT_RENDERER_CLASSES"] == ["rest_framework.renderers.JSONRenderer"]
+        assert "django.contrib.admin" in settings.INSTALLED_APPS
+
+    def test_worker(self):
+        """Check that the worker profile keeps only the apps the models need"""
+        namespace = settings_namespace()
+        apply_profile(namespace, "worker")
+
+        assert namespace["INSTALLED_APPS"] == ["django.contrib.auth", "django.contrib.contenttypes", "users"]
+        assert namespace["MIDDLEWARE"] == []
+
+    def test_unknown_profile(self):
+        """Check that a misspelled profile fails loudly"""
+        with pytest.raises(ImproperlyConfigured):
+            apply_profile(settings_namespace(), "slim")
+
+
+class TestDatabaseSettings:
+
+    @staticmethod
+    def load(monkeypatch, **environ):
+        for name in ("DJANGO_SERVER_INTERFACE", "DB_POOL_MODE"):
+            monkeypatch.delenv(name, raising=False)
+        for name, value in environ.items():
+            monkeypatch.setenv(name, value)
+        return runpy.run_path(database.__file__)
+
+    def test_wsgi_keeps_connections(self, monkeypatch):
+        """Check that the WSGI server reuses connections by default"""
+        assert self.load(monkeypatch)["DATABASES"]["default"]["CONN_MAX_AGE"] == 300
+
+    def test_asgi_does_not_keep_connections(self, monkeypatch):
+        """Check that the ASGI server defaults to a connection per request and refuses persistent ones"""
+        namespace = self.load(monkeypatch, DJANGO_SERVER_INTERFACE="asgi")
+        assert namespace["DB_POOL_MODE"] == "off"
+        assert namespace["DATABASES"]["default"]["CONN_MAX_AGE"] == 0
+        with pytest.raises(ValueError):
+            self.load(monkeypatch, DJANGO_SERVER_INTERFACE="asgi", DB_POOL_MODE="persistent")
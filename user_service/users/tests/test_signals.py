@@ -1,8 +1,9 @@
 import secrets
 import string
+import uuid
 
 import pytest
-from users.models import AccountOwner, AccountUser, BaseClient
+from users.models import AccountOwner, AccountUser, Admin, BaseClient, BaseUser, Staff
 
 
 @pytest.mark.django_db
@@ -27,6 +28,8 @@ class TestAccountRelatedInstanceSignal:
             country="Wonderland",
             city="Magic City",
             domain="example.com",
+            account_id=uuid.uuid4(),
+            subaccount_id=uuid.uuid4(),
             role=BaseClient.Role.ACCOUNT_OWNER,
             password=password,
         )
@@ -51,6 +54,8 @@ class TestAccountRelatedInstanceSignal:
             country="Wonderland",
             city="Dream City",
             domain="example.org",
+            account_id=uuid.uuid4(),
+            subaccount_id=uuid.uuid4(),
             role=BaseClient.Role.ACCOUNT_USER,
             password=password,
         )
@@ -73,6 +78,8 @@ class TestAccountRelatedInstanceSignal:
             country="Wonderland",
             city="Happy City",
             domain="example.net",
+            account_id=uuid.uuid4(),
+            subaccount_id=uuid.uuid4(),
             role=BaseClient.Role.ACCOUNT_OWNER,
         )
 
@@ -86,3 +93,64 @@ class TestAccountRelatedInstanceSignal:
         # Check that resaving does not create a new AccountOwner object
         account_owners_count = AccountOwner.objects.filter(id=base_client.id).count()
         assert account_owners_count == 1
+
+
+@pytest.mark.django_db
+class TestUserCreationQueries:
+    """Creating one logical user must cost its INSERT plus the outbox INSERT, and no follow-up queries."""
+
+    client_fields = {
+        "first_name": "Dana",
+        "last_name": "White",
+        "email": "dana.white@example.com",
+        "phone_number": "5550001111",
+        "company_name": "Query Corp",
+        "country": "Wonderland",
+        "city": "Count City",
+        "domain": "query.example.com",
+    }
+
+    def test_base_client_create_queries(self, django_assert_num_queries):
+        """Check that BaseClient.objects.create issues the user and outbox INSERTs only"""
+        with django_assert_num_queries(2):
+            BaseClient.objects.create(
+                role=BaseClient.Role.ACCOUNT_OWNER,
+                account_id=uuid.uuid4(),
+                subaccount_id=uuid.uuid4(),
+                **self.client_fields,
+            )
+        assert BaseClient.objects.count() == 1
+
+    def test_account_owner_create_queries(self, django_assert_num_queries):
+        """Check that create_account_owner issues the user and outbox INSERTs only"""
+        with django_assert_num_queries(2):
+            AccountOwner.objects.create_account_owner(
+                password="secret-password",
+                account_id=uuid.uuid4(),
+                subaccount_id=uuid.uuid4(),
+                **self.client_fields,
+            )
+        assert AccountOwner.objects.count() == 1
+
+    def test_account_user_create_queries(self, django_assert_num_queries):
+        """Check that create_account_user issues the user and outbox INSERTs only"""
+        with django_assert_num_queries(2):
+            AccountUser.objects.create_account_user(
+                password="secret-password",
+                account_id=uuid.uuid4(),
+                subaccount_id=uuid.uuid4(),
+                **self.client_fields,
+            )
+        assert AccountUser.objects.count() == 1
+
+    def test_base_user_create_queries(self, django_assert_num_queries):
+        """Check that create_user issues the user and outbox INSERTs only"""
+        with django_assert_num_queries(2):
+            BaseUser.objects.create_user("erin@example.com", "secret-password", role=BaseUser.Role.ADMIN)
+        assert Admin.objects.count() == 1
+
+    def test_staff_create_queries(self, django_assert_num_queries):
+        """Check that create_staff issues the user and outbox INSERTs only"""
+        with django_assert_num_queries(2):
+            Staff.objects.create_staff(first_name="Frank", last_name="Green", email="frank@example.com")
+        assert BaseUser.objects.count() == 1
@@ -0,0 +1,83 @@
+import logging
+import uuid
+from functools import partial
+
+import pytest
+from django.db import OperationalError
+from users.models import BaseUser
+from users.service import bulk_import_clients
+from users.tasks import audit_logger, record_audit_events
+
+
+def client_row(index):
+    return {
+        "email": f"client{index}@example.com",
+        "phone_number": f"555000{index:04d}",
+        "company_name": "Task Corp",
+        "country": "Wonderland",
+        "city": "Queue City",
+        "domain": f"client{index}.example.com",
+        "account_id": str(uuid.uuid4()),
+        "subaccount_id": str(uuid.uuid4()),
+    }
+
+
+@pytest.mark.django_db
+class TestPostCreateTasks:
+
+    def test_tasks_run_after_commit(self, django_capture_on_commit_callbacks, caplog, django_assert_num_queries):
+        """Check that creating a user queues one audit task for commit, which runs without queries"""
+        caplog.set_level(logging.INFO)
+        with django_capture_on_commit_callbacks() as callbacks:
+            user = BaseUser.objects.create_user("tasks@example.com", "secret-password", role=BaseUser.Role.ADMIN)
+            assert "users.audit" not in {record.name for record in caplog.records}
+
+        tasks = [callback for callback in callbacks if isinstance(callback, partial)]
+        assert len(tasks) == 1
+        with django_assert_num_queries(0):
+            tasks[0]()
+        assert f"users.BaseUser {user.pk} created" in caplog.text
+
+    def test_bulk_import_dispatches_once_per_batch(self, django_capture_on_commit_callbacks, caplog):
+        """Check that imported rows get their tasks, one set per batch"""
+        caplog.set_level(logging.INFO, logger="users.audit")
+        with django_capture_on_commit_callbacks(execute=True) as callbacks:
+            report = bulk_import_clients([client_row(i) for i in range(3)], workers=0)
+
+        assert report.created == 3
+        # One apply_async for the batch
+        assert len([callback for callback in callbacks if isinstance(callback, partial)]) == 1
+        assert len([record for record in caplog.records if record.name == "users.audit"]) == 3
+
+    def test_idempotency_key(self, caplog):
+        """Check that a task sent twice with one key only runs once"""
+        caplog.set_level(logging.INFO, logger="users.audit")
+        key = f"audit-test:{uuid.uuid4()}"
+        for _ in range(2):
+            record_audit_events.apply_async(
+                args=("users.BaseUser", ["1"]), kwargs={"action": "x", "idempotency_key": key}
+            )
+
+        assert len([record for record in caplog.records if record.name == "users.audit"]) == 1
+
+    def test_transient_errors_are_retried(self, monkeypatch, caplog):
+        """Check that a transient error is retried and the key stays usable"""
+        caplog.set_level(logging.INFO, logger="users.audit")
+        calls = []
+        original = audit_logger.info
+
+        def flaky(*args, **kwargs):
+            calls.append(1)
+            if len(calls) == 1:
+                raise OperationalError("connection lost")
+            return original(*args, **kwargs)
+
+        monkeypatch.setattr(audit_logger, "info", flaky)
+        monkeypatch.setattr(record_audit_events, "retry_backoff", False)
+        # Eager mode raises Retry to the caller unless told not to propagate
+        record_audit_events.apply(
+            args=("users.BaseClient", ["1"]), kwargs={"action": "created", "idempotency_key": "retry-test"}, throw=False
+        )
+
+        assert len(calls) == 2
+        assert "users.BaseClient 1 created" in caplog.text
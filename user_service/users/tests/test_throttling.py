@@ -0,0 +1,84 @@
+import uuid
+
+import pytest
+import redis
+from django.test import RequestFactory
+from users.authentication import ClaimsUser
+from users.models import BaseUser
+from users.serializers import UserClaimsTokenObtainPairSerializer
+from users.throttling import AccountGCRAThrottle, GCRALimiter, GCRAThrottle, RoleGCRAThrottle
+
+
+RATES = {"anon": "2/min", "user": "3/min", "role:Admin": "5/min", "account": "4/min"}
+
+
+@pytest.fixture
+def rates(monkeypatch):
+    monkeypatch.setattr(GCRAThrottle, "THROTTLE_RATES", RATES)
+
+
+def claims_request(role="Admin", account_id=None):
+    request = RequestFactory().get("/api/clients/")
+    request.user = ClaimsUser({"user_id": str(uuid.uuid4()), "role": role, "account_id": account_id})
+    return request
+
+
+def allowed_count(throttle_class, request, attempts=10):
+    return sum(throttle_class().allow_request(request, None) for _ in range(attempts))
+
+
+class TestGCRALimiter:
+
+    def test_burst_then_reject(self):
+        """Check that a full bucket allows `limit` requests and then reports when the next one fits"""
+        limiter = GCRALimiter()
+        results = [limiter.hit("throttle_test", 3, 60) for _ in range(4)]
+
+        assert [allowed for allowed, _ in results] == [True, True, True, False]
+        assert 19 < results[-1][1] <= 20
+
+    def test_redis_script(self, settings):
+        """Check the Lua implementation against a live Redis, when one is reachable"""
+        url = "redis://localhost:6379/15"
+        try:
+            redis.Redis.from_url(url, socket_connect_timeout=0.2).ping()
+        except redis.ConnectionError:
+            pytest.skip("Redis is not reachable")
+        settings.CACHES = {
+            **settings.CACHES,
+            "throttle": {"BACKEND": "django_redis.cache.RedisCache", "LOCATION": url},
+        }
+        limiter = GCRALimiter("throttle")
+        key = f"throttle_test:{uuid.uuid4()}"
+        results = [limiter.hit(key, 3, 60) for _ in range(4)]
+
+        assert [allowed for allowed, _ in results] == [True, True, True, False]
+        assert 19 < results[-1][1] <= 20
+
+
+@pytest.mark.usefixtures("rates")
+class TestThrottles:
+
+    def test_role_rates(self):
+        """Check that users get the rate of their role, or the user rate without one"""
+        assert allowed_count(RoleGCRAThrottle, claims_request("Admin")) == 5
+        assert allowed_count(RoleGCRAThrottle, claims_request("Staff")) == 3
+
+    def test_account_rate_is_shared(self):
+        """Check that all users of an account draw from one bucket"""
+        account_id = str(uuid.uuid4())
+        first = allowed_count(AccountGCRAThrottle, claims_request(account_id=account_id), attempts=3)
+        second = allowed_count(AccountGCRAThrottle, claims_request(account_id=account_id), attempts=3)
+
+        assert (first, second) == (3, 1)
+        assert allowed_count(AccountGCRAThrottle, claims_request()) == 10
+
+    @pytest.mark.django_db
+    def test_throttled_api_request(self, client):
+        """Check that the API answers 429 with Retry-After once the role bucket is empty"""
+        user = BaseUser.objects.create_user("api@example.com", "secret-password", role=BaseUser.Role.STAFF)
+        token = UserClaimsTokenObtainPairSerializer.get_token(user).access_token
+
+        statuses = [client.get("/api/users/", HTTP_AUTHORIZATION=f"Bearer {token}").status_code for _ in range(4)]
+        assert statuses == [200, 200, 200, 429]
+        assert 0 < int(client.get("/api/users/", HTTP_AUTHORIZATION=f"Bearer {token}").headers["Retry-After"]) <= 20
@@ -0,0 +1,350 @@
+import uuid
+
+import pytest
+from django.test import Client
+from users.models import AccountOwner, AccountUser, BaseClient, BaseUser
+from users.serializers import UserClaimsTokenObtainPairSerializer
+from users.views import ClientListView
+
+
+ACCOUNT_ID = uuid.uuid4()
+
+
+def client_payload(n, **overrides):
+    payload = {
+        "first_name": f"First{n}",
+        "last_name": f"Last{n}",
+        "email": f"client{n}@example.com",
+        "phone_number": f"+1555000{n:04d}",
+        "company_name": f"Company {n}",
+        "country": "Wonderland",
+        "city": "Magic City",
+        "domain": f"client{n}.example.com",
+        "account_id": str(ACCOUNT_ID),
+        "subaccount_id": str(uuid.uuid4()),
+        "password": "secret-password",
+    }
+    payload.update(overrides)
+    return payload
+
+
+@pytest.fixture
+def api_user(db):
+    return BaseUser.objects.create_user("api@example.com", "secret-password", role=BaseUser.Role.ADMIN)
+
+
+def authorized_client(user):
+    token = UserClaimsTokenObtainPairSerializer.get_token(user).access_token
+    return Client(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+
+@pytest.fixture
+def api_client(client, api_user):
+    token = UserClaimsTokenObtainPairSerializer.get_token(api_user).access_token
+    client.defaults["HTTP_AUTHORIZATION"] = f"Bearer {token}"
+    return client
+
+
+@pytest.mark.django_db
+class TestAsyncAPIView:
+
+    def test_views_are_async(self):
+        """Check that the API views run natively on the event loop"""
+        assert ClientListView.view_is_async
+
+    def test_authentication_required(self, client):
+        """Check that anonymous requests are rejected with a JWT challenge"""
+        response = client.get("/api/clients/")
+        assert response.status_code == 401
+        assert response.headers["WWW-Authenticate"].startswith("Bearer")
+
+    def test_invalid_json(self, api_client):
+        """Check that malformed bodies are answered with 400"""
+        response = api_client.post("/api/clients/", "{broken", content_type="application/json")
+        assert response.status_code == 400
+
+
+@pytest.mark.django_db
+class TestClientViews:
+
+    def test_create_client(self, api_client):
+        """Check that a client is created with the role's proxy model and a hashed password"""
+        response = api_client.post(
+            "/api/clients/", client_payload(1, role=BaseClient.Role.ACCOUNT_OWNER), content_type="application/json"
+        )
+
+        assert response.status_code == 201
+        owner = AccountOwner.objects.get(pk=response.json()["id"])
+        assert owner.check_password("secret-password")
+        assert "password" not in response.json()
+
+    def test_create_client_validation(self, api_client):
+        """Check that invalid phone numbers and duplicates are rejected"""
+        response = api_client.post(
+            "/api/clients/", client_payload(1, phone_number="InvalidPhone"), content_type="application/json"
+        )
+        assert response.status_code == 400
+        assert "phone_number" in response.json()
+
+        api_client.post("/api/clients/", client_payload(2), content_type="application/json")
+        response = api_client.post("/api/clients/", client_payload(2), content_type="application/json")
+        assert response.status_code == 400
+
+    def test_list_clients(self, api_client):
+        """Check that listings are filtered by role and account and ordered newest first"""
+        for n in range(3):
+            api_client.post("/api/clients/", client_payload(n), content_type="application/json")
+        api_client.post(
+            "/api/clients/",
+            client_payload(3, account_id=str(uuid.uuid4()), role=BaseClient.Role.ACCOUNT_OWNER),
+            content_type="application/json",
+        )
+
+        response = api_client.get("/api/clients/", {"role": "AccountUser", "account_id": str(ACCOUNT_ID)})
+        body = response.json()
+        assert response.status_code == 200
+        assert body["next"] is None
+        assert [row["email"] for row in body["results"]] == [f"client{n}@example.com" for n in (2, 1, 0)]
+
+    def test_list_invalid_account_id(self, api_client):
+        """Check that malformed UUID filters are answered with 400"""
+        assert api_client.get("/api/clients/", {"account_id": "nope"}).status_code == 400
+
+    def test_search_clients(self, api_client):
+        """Check that search results are ranked and paged with a cursor until every match is seen"""
+        for n in range(3):
+            api_client.post("/api/clients/", client_payload(n), content_type="application/json")
+        api_client.post("/api/clients/", client_payload(3, company_name="Other Corp"), content_type="application/json")
+
+        seen, params = [], {"q": "company", "page_size": 2, "account_id": str(ACCOUNT_ID)}
+        while True:
+            body = api_client.get("/api/clients/search/", params).json()
+            seen += [row["email"] for row in body["results"]]
+            if not body["next"]:
+                break
+            params["cursor"] = body["next"].split("cursor=")[1].split("&")[0]
+
+        assert sorted(seen) == [f"client{n}@example.com" for n in range(3)]
+        assert all("rank" in row for row in body["results"])
+
+    def test_search_requires_query(self, api_client):
+        """Check that a missing, overlong or malformed search is answered with 400"""
+        assert api_client.get("/api/clients/search/").status_code == 400
+        assert api_client.get("/api/clients/search/", {"q": "x" * 101}).status_code == 400
+        assert api_client.get("/api/clients/search/", {"q": "acme", "cursor": "nope"}).status_code == 404
+
+    def test_resolve_clients(self, api_client):
+        """Check that a batch of keys resolves in one call, with misses marked"""
+        created = api_client.post("/api/clients/", client_payload(1), content_type="application/json").json()
+        payload = {"type": "email", "keys": ["client1@example.com", "nobody@example.com"]}
+
+        response = api_client.post("/api/clients/resolve/", payload, content_type="application/json")
+
+        assert response.status_code == 200
+        assert response.json() == {
+            "results": {
+                "client1@example.com": {"id": created["id"], "account_id": str(ACCOUNT_ID)},
+                "nobody@example.com": None,
+            },
+            "missing": ["nobody@example.com"],
+        }
+
+    @pytest.mark.parametrize(
+        "payload",
+        [
+            {"type": "city", "keys": ["Magic City"]},
+            {"type": "email", "keys": []},
+            {"type": "email", "keys": ["x"] * 1001},
+            {"type": "id", "keys": ["not-a-uuid"]},
+        ],
+    )
+    def test_resolve_validation(self, api_client, payload):
+        """Check that unknown key types, empty or oversized batches and malformed ids are rejected"""
+        assert api_client.post("/api/clients/resolve/", payload, content_type="application/json").status_code == 400
+
+    def test_retrieve_and_update_client(self, api_client):
+        """Check that a client can be fetched and partially updated"""
+        pk = api_client.post("/api/clients/", client_payload(1), content_type="application/json").json()["id"]
+
+        response = api_client.patch(f"/api/clients/{pk}/", {"city": "Dream City"}, content_type="application/json")
+        assert response.status_code == 200
+        assert AccountUser.objects.get(pk=pk).city == "Dream City"
+        assert api_client.get(f"/api/clients/{pk}/").json()["city"] == "Dream City"
+
+    def test_retrieve_missing_client(self, api_client):
+        """Check that unknown clients are answered with 404"""
+        assert api_client.get(f"/api/clients/{uuid.uuid4()}/").status_code == 404
+
+
+@pytest.mark.django_db
+class TestUserViews:
+
+    def test_create_and_list_users(self, api_client):
+        """Check that users are created and listed by role"""
+        response = api_client.post(
+            "/api/users/",
+            {"email": "staff@EXAMPLE.com", "password": "secret-password"},
+            content_type="application/json",
+        )
+        assert response.status_code == 201
+        assert response.json()["email"] == "staff@example.com"
+
+        body = api_client.get("/api/users/", {"role": "Staff"}).json()
+        assert [row["email"] for row in body["results"]] == ["staff@example.com"]
+
+    def test_update_user(self, api_client, api_user):
+        """Check that a user can be partially updated"""
+        response = api_client.patch(
+            f"/api/users/{api_user.pk}/", {"first_name": "Updated"}, content_type="application/json"
+        )
+        assert response.status_code == 200
+        assert BaseUser.objects.get(pk=api_user.pk).first_name == "Updated"
+
+
+@pytest.mark.django_db
+class TestAccountViews:
+
+    def test_account_hierarchy(self, api_client):
+        """Check that subaccounts are created, described and moved through the API"""
+        root = api_client.post("/api/accounts/", {}, content_type="application/json").json()
+        child = api_client.post("/api/accounts/", {"parent_id": root["id"]}, content_type="application/json").json()
+        assert child["ancestors"] == [root["id"]] and child["depth"] == 2
+        assert api_client.get(f"/api/accounts/{root['id']}/").json()["children"] == [child["id"]]
+
+        response = api_client.patch(
+            f"/api/accounts/{child['id']}/", {"parent_id": None}, content_type="application/json"
+        )
+        assert response.status_code == 200
+        assert response.json()["depth"] == 1
+
+        response = api_client.patch(
+            f"/api/accounts/{root['id']}/", {"parent_id": root["id"]}, content_type="application/json"
+        )
+        assert response.status_code == 400
+        assert api_client.post("/api/accounts/", {"id": root["id"]}, content_type="application/json").status_code == 400
+        assert api_client.get(f"/api/accounts/{uuid.uuid4()}/").status_code == 404
+
+    def test_account_members(self, api_client):
+        """Check that members of an account include its subaccounts' clients, a page at a time"""
+        root = api_client.post("/api/accounts/", {"id": str(ACCOUNT_ID)}, content_type="application/json").json()
+        child = api_client.post("/api/accounts/", {"parent_id": root["id"]}, content_type="application/json").json()
+        owner = api_client.post("/api/clients/", client_payload(1), content_type="application/json").json()
+        user = api_client.post(
+            "/api/clients/", client_payload(2, subaccount_id=child["id"]), content_type="application/json"
+        ).json()
+
+        body = api_client.get(f"/api/accounts/{child['id']}/members/").json()
+        assert [member["id"] for member in body["results"]] == [user["id"]] and body["next"] is None
+        body = api_client.get(f"/api/accounts/{root['id']}/members/", {"page_size": 1}).json()
+        assert [member["id"] for member in body["results"]] == [user["id"]]
+        assert [member["id"] for member in api_client.get(body["next"]).json()["results"]] == [owner["id"]]
+
+        url = f"/api/accounts/{child['id']}/members/"
+        assert api_client.get(url, {"client_id": user["id"]}).json()["is_member"] is True
+        assert api_client.get(url, {"client_id": owner["id"]}).json()["is_member"] is False
+        assert api_client.get(url, {"client_id": "nope"}).status_code == 400
+
+
+@pytest.mark.django_db
+class TestPermissions:
+
+    @pytest.fixture
+    def staff_user(self):
+        return BaseUser.objects.create_user("staff@example.com", "secret-password", role=BaseUser.Role.STAFF)
+
+    @pytest.fixture
+    def owner(self, api_client):
+        pk = api_client.post(
+            "/api/clients/", client_payload(1, role=BaseClient.Role.ACCOUNT_OWNER), content_type="application/json"
+        ).json()["id"]
+        return BaseClient.objects.get(pk=pk)
+
+    def test_staff_cannot_grant_roles(self, staff_user, api_user):
+        """Check that Staff users can neither create users nor change roles, activity or other users"""
+        staff_client = authorized_client(staff_user)
+        payload = {"email": "new@example.com", "role": "Admin"}
+
+        assert staff_client.post("/api/users/", payload, content_type="application/json").status_code == 403
+        url = f"/api/users/{staff_user.pk}/"
+        for body in ({"role": "Admin"}, {"is_active": True}):
+            assert staff_client.patch(url, body, content_type="application/json").status_code == 403
+        assert staff_client.patch(url, {"first_name": "Sam"}, content_type="application/json").status_code == 200
+        response = staff_client.patch(
+            f"/api/users/{api_user.pk}/", {"first_name": "X"}, content_type="application/json"
+        )
+        assert response.status_code == 403
+        assert BaseUser.objects.get(pk=staff_user.pk).role == BaseUser.Role.STAFF
+
+    def test_clients_cannot_access_users(self, owner):
+        """Check that client tokens are kept away from the user endpoints"""
+        assert authorized_client(owner).get("/api/users/").status_code == 403
+
+    def test_clients_are_scoped_to_their_account(self, api_client, owner):
+        """Check that client tokens only see and write clients of their own account"""
+        other = api_client.post(
+            "/api/clients/", client_payload(2, account_id=str(uuid.uuid4())), content_type="application/json"
+        ).json()
+        owner_client = authorized_client(owner)
+
+        assert [row["id"] for row in owner_client.get("/api/clients/").json()["results"]] == [str(owner.pk)]
+        assert owner_client.get("/api/clients/search/", {"q": "company"}).json()["results"][0]["id"] == str(owner.pk)
+        assert len(owner_client.get("/api/clients/search/", {"q": "company"}).json()["results"]) == 1
+        payload = {"type": "id", "keys": [str(owner.pk), other["id"]]}
+        body = owner_client.post("/api/clients/resolve/", payload, content_type="application/json").json()
+        assert body["missing"] == [other["id"]]
+        assert owner_client.get(f"/api/clients/{other['id']}/").status_code == 404
+        response = owner_client.post(
+            "/api/clients/", client_payload(3, account_id=str(uuid.uuid4())), content_type="application/json"
+        )
+        assert response.status_code == 403
+
+    def test_clients_stay_in_the_account_tree(self, api_client, owner):
+        """Check that client tokens can only place clients under subaccounts of their own account"""
+        api_client.post("/api/accounts/", {"id": str(ACCOUNT_ID)}, content_type="application/json")
+        child = api_client.post("/api/accounts/", {"parent_id": str(ACCOUNT_ID)}, content_type="application/json")
+        other = api_client.post("/api/accounts/", {}, content_type="application/json").json()
+        owner_client = authorized_client(owner)
+
+        response = owner_client.post(
+            "/api/clients/", client_payload(3, subaccount_id=other["id"]), content_type="application/json"
+        )
+        assert response.status_code == 403
+        response = owner_client.patch(
+            f"/api/clients/{owner.pk}/", {"subaccount_id": other["id"]}, content_type="application/json"
+        )
+        assert response.status_code == 403
+        assert not api_client.get(f"/api/accounts/{other['id']}/members/").json()["results"]
+        response = owner_client.post(
+            "/api/clients/", client_payload(3, subaccount_id=child.json()["id"]), content_type="application/json"
+        )
+        assert response.status_code == 201
+
+    def test_account_users_are_read_only(self, account_user):
+        """Check that account users may read and resolve, but not create clients or accounts"""
+        user_client = authorized_client(account_user)
+        payload = client_payload(3, account_id=str(account_user.account_id))
+
+        assert user_client.get("/api/clients/").status_code == 200
+        assert user_client.post("/api/clients/", payload, content_type="application/json").status_code == 403
+        payload = {"type": "email", "keys": [account_user.email]}
+        assert user_client.post("/api/clients/resolve/", payload, content_type="application/json").status_code == 200
+        assert user_client.post("/api/accounts/", {}, content_type="application/json").status_code == 403
+
+    def test_accounts_are_scoped_to_the_account_tree(self, api_client, owner):
+        """Check that account owners manage only their own account's subtree"""
+        api_client.post("/api/accounts/", {"id": str(ACCOUNT_ID)}, content_type="application/json")
+        other = api_client.post("/api/accounts/", {}, content_type="application/json").json()
+        owner_client = authorized_client(owner)
+
+        assert owner_client.post("/api/accounts/", {}, content_type="application/json").status_code == 403
+        response = owner_client.post("/api/accounts/", {"parent_id": other["id"]}, content_type="application/json")
+        assert response.status_code == 403
+        child = owner_client.post("/api/accounts/", {"parent_id": str(ACCOUNT_ID)}, content_type="application/json")
+        assert child.status_code == 201
+        assert owner_client.get(f"/api/accounts/{child.json()['id']}/members/").status_code == 200
+        assert owner_client.get(f"/api/accounts/{other['id']}/").status_code == 404
+        assert owner_client.get(f"/api/accounts/{other['id']}/members/").status_code == 404
+        response = owner_client.patch(
+            f"/api/accounts/{ACCOUNT_ID}/", {"parent_id": other["id"]}, content_type="application/json"
+        )
+        assert response.status_code == 403
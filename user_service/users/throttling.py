@@ -0,0 +1,142 @@
+import math
+import threading
+import time
+
+from django.core.cache import caches
+from django_redis import get_redis_connection
+from django_redis.cache import RedisCache
+from rest_framework.throttling import SimpleRateThrottle
+
+
+# GCRA: the key holds the theoretical arrival time (TAT) of the next request in milliseconds.
+# A request is allowed while TAT - now <= period - interval, and then pushes TAT by one interval.
+# The clock is Redis' own, so every worker agrees on it. Returns {allowed, retry_after_ms}.
+GCRA_SCRIPT = """
+local interval = tonumber(ARGV[1])
+local period = tonumber(ARGV[2])
+local clock = redis.call("TIME")
+local now = tonumber(clock[1]) * 1000 + math.floor(tonumber(clock[2]) / 1000)
+local tat = tonumber(redis.call("GET", KEYS[1]) or now)
+if tat < now then
+    tat = now
+end
+local excess = tat - now - (period - interval)
+if excess > 0 then
+    return {0, excess}
+end
+redis.call("SET", KEYS[1], tat + interval, "PX", tat + interval - now)
+return {1, 0}
+"""
+
+
+class GCRALimiter:
+    """
+    Generic cell rate algorithm over a shared cache: fixed memory (one integer per key) and
+    one atomic round trip per request on Redis. Other cache backends run the same algorithm
+    under a process-wide lock, which is only correct for process-local caches.
+    """
+
+    _lock = threading.Lock()
+
+    def __init__(self, cache_alias="default"):
+        self.cache_alias = cache_alias
+        self._script = None
+
+    @property
+    def cache(self):
+        return caches[self.cache_alias]
+
+    def hit(self, key, limit, period):
+        """Records a request against `limit` requests per `period` seconds, returns (allowed, retry_after)."""
+        interval, period_ms = period * 1000 / limit, period * 1000
+        if isinstance(self.cache, RedisCache):
+            allowed, retry_after_ms = self._hit_redis(self.cache.make_key(key), interval, period_ms)
+        else:
+            allowed, retry_after_ms = self._hit_local(key, interval, period_ms)
+        return bool(allowed), retry_after_ms / 1000
+
+    def _hit_redis(self, key, interval, period_ms):
+        if self._script is None:
+            self._script = get_redis_connection(self.cache_alias).register_script(GCRA_SCRIPT)
+        return self._script(keys=[key], args=[math.ceil(interval), period_ms])
+
+    def _hit_local(self, key, interval, period_ms):
+        with self._lock:
+            now = time.time() * 1000
+            tat = max(self.cache.get(key, now), now)
+            excess = tat - now - (period_ms - interval)
+            if excess > 0:
+                return 0, excess
+            self.cache.set(key, tat + interval, math.ceil((tat + interval - now) / 1000))
+            return 1, 0
+
+
+limiter = GCRALimiter()
+
+
+class GCRAThrottle(SimpleRateThrottle):
+    """
+    SimpleRateThrottle that keeps a GCRA token bucket in Redis instead of a timestamp history.
+    Subclasses pick the scope of the rate and the identity the bucket belongs to.
+    """
+
+    limiter = limiter
+
+    def get_rate_for_request(self, request):
+        return self.rate
+
+    def allow_request(self, request, view):
+        rate = self.get_rate_for_request(request)
+        if rate is None:
+            return True
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+        self.num_requests, self.duration = self.parse_rate(rate)
+        allowed, self.retry_after = self.limiter.hit(self.key, self.num_requests, self.duration)
+        return allowed
+
+    def wait(self):
+        return self.retry_after
+
+    def get_rate(self):
+        # Rates may be chosen per request, a missing scope rate only disables the throttle
+        return self.THROTTLE_RATES.get(self.scope)
+
+
+class AnonGCRAThrottle(GCRAThrottle):
+    """Limits anonymous requests per client IP, using the "anon" rate."""
+
+    scope = "anon"
+
+    def get_cache_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            return None
+        return self.cache_format % {"scope": self.scope, "ident": self.get_ident(request)}
+
+
+class RoleGCRAThrottle(GCRAThrottle):
+    """Limits each authenticated user with the "role:<role>" rate, falling back to the "user" rate."""
+
+    scope = "user"
+
+    def get_rate_for_request(self, request):
+        role = getattr(request.user, "role", None)
+        return self.THROTTLE_RATES.get(f"role:{role}", self.rate)
+
+    def get_cache_key(self, request, view):
+        if not (request.user and request.user.is_authenticated):
+            return None
+        return self.cache_format % {"scope": self.scope, "ident": request.user.pk}
+
+
+class AccountGCRAThrottle(GCRAThrottle):
+    """Limits all users of one account_id together with the "account" rate."""
+
+    scope = "account"
+
+    def get_cache_key(self, request, view):
+        account_id = getattr(request.user, "account_id", None)
+        if not account_id:
+            return None
+        return self.cache_format % {"scope": self.scope, "ident": account_id}
@@ -0,0 +1,19 @@
+from django.urls import path
+
+from . import views
+
+
+app_name = "users"
+
+urlpatterns = [
+    path("users/", views.UserListView.as_view(), name="user-list"),
+    path("users/<uuid:pk>/", views.UserDetailView.as_view(), name="user-detail"),
+    path("clients/", views.ClientListView.as_view(), name="client-list"),
+    path("clients/search/", views.ClientSearchView.as_view(), name="client-search"),
+    path("clients/resolve/", views.ClientResolveView.as_view(), name="client-resolve"),
+    path("clients/export/", views.ClientExportView.as_view(), name="client-export"),
+    path("clients/<uuid:pk>/", views.ClientDetailView.as_view(), name="client-detail"),
+    path("accounts/", views.AccountListView.as_view(), name="account-list"),
+    path("accounts/<uuid:pk>/", views.AccountDetailView.as_view(), name="account-detail"),
+    path("accounts/<uuid:pk>/members/", views.AccountMembersView.as_view(), name="account-members"),
+]
@@ -1,4 +1,452 @@
-from django.shortcuts import render
+import json
+import uuid
 
+from asgiref.sync import sync_to_async
+from django.contrib.auth.base_user import BaseUserManager
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import IntegrityError
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views import View
+from rest_framework import exceptions, status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.settings import api_settings
 
-# Create your views here.
+from .accounts import AccountTreeError, account_membership, create_account, in_subtree, move_account
+from .authentication import ClaimsJWTAuthentication
+from .export import EXPORT_FORMATS, RowEncoder, aexport_lines, client_export_queryset
+from .hashing import HashingPoolFull, password_hasher
+from .instrumentation import span
+from .models import Account, AccountOwner, AccountUser, Admin, BaseClient, BaseUser, Staff
+from .pagination import KeysetPagination, RankedKeysetPagination
+from .permissions import IsAdminOrReadOnly, IsInternal, IsInternalOrAccountMember, account_scope, is_admin
+from .resolve import resolve_clients
+from .search import MAX_QUERY_LENGTH, search_clients
+from .serializers import (
+    AccountCreateSerializer,
+    AccountMoveSerializer,
+    ClientCreateSerializer,
+    ClientResolveSerializer,
+    ClientUpdateSerializer,
+    UserCreateSerializer,
+    UserUpdateSerializer,
+)
+
+
+USER_FIELDS = ("id", "email", "first_name", "last_name", "role", "is_active", "date_joined")
+CLIENT_FIELDS = (
+    "id",
+    "email",
+    "first_name",
+    "last_name",
+    "phone_number",
+    "company_name",
+    "country",
+    "city",
+    "domain",
+    "account_id",
+    "subaccount_id",
+    "role",
+    "is_active",
+    "date_joined",
+)
+
+
+class HashingUnavailable(exceptions.APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = "Too many signups are being processed, try again shortly."
+    default_code = "hashing_unavailable"
+    wait = 1
+
+
+class AsyncAPIView(View):
+    """
+    Async counterpart of DRF's APIView for handlers written against the async ORM.
+    Authentication, permissions and throttling run in a single thread hop; the handlers
+    themselves stay on the event loop.
+    """
+
+    authentication_classes = (ClaimsJWTAuthentication,)
+    permission_classes = api_settings.DEFAULT_PERMISSION_CLASSES
+    pagination_class = KeysetPagination
+
+    def get_authenticators(self):
+        return [auth() for auth in self.authentication_classes]
+
+    def get_permissions(self):
+        return [permission() for permission in self.permission_classes]
+
+    def get_throttles(self):
+        return [throttle() for throttle in api_settings.DEFAULT_THROTTLE_CLASSES]
+
+    async def dispatch(self, request, *args, **kwargs):
+        method = request.method.lower()
+        handler = getattr(self, method, None) if method in self.http_method_names else None
+        if handler is None:
+            handler = self.http_method_not_allowed
+        try:
+            await sync_to_async(self.initial)(request)
+            return await handler(request, *args, **kwargs)
+        except exceptions.APIException as exc:
+            return self.handle_exception(request, exc)
+
+    def initial(self, request):
+        self.perform_authentication(request)
+        self.check_permissions(request)
+        self.check_throttles(request)
+
+    def perform_authentication(self, request):
+        request.auth = None
+        for authenticator in self.get_authenticators():
+            result = authenticator.authenticate(request)
+            if result is not None:
+                request.user, request.auth = result
+                return
+
+    def check_permissions(self, request):
+        for permission in self.get_permissions():
+            if not permission.has_permission(request, self):
+                if request.auth is None:
+                    raise exceptions.NotAuthenticated()
+                raise exceptions.PermissionDenied(getattr(permission, "message", None))
+
+    def check_throttles(self, request):
+        durations = [throttle.wait() for throttle in self.get_throttles() if not throttle.allow_request(request, self)]
+        if durations:
+            raise exceptions.Throttled(max((d for d in durations if d is not None), default=None))
+
+    def handle_exception(self, request, exc):
+        headers = {}
+        if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+            exc.status_code = status.HTTP_401_UNAUTHORIZED
+            headers["WWW-Authenticate"] = self.get_authenticators()[0].authenticate_header(request)
+        if getattr(exc, "wait", None):
+            headers["Retry-After"] = str(int(exc.wait))
+        data = exc.detail if isinstance(exc.detail, (list, dict)) else {"detail": exc.detail}
+        return JsonResponse(data, status=exc.status_code, headers=headers, safe=False)
+
+    @staticmethod
+    def validate(serializer_class, request, partial=False):
+        try:
+            data = json.loads(request.body or b"{}")
+        except ValueError as e:
+            raise exceptions.ParseError(f"JSON parse error - {e}")
+        with span("serialize"):
+            serializer = serializer_class(data=data, partial=partial)
+            serializer.is_valid(raise_exception=True)
+            return dict(serializer.validated_data)
+
+    @staticmethod
+    def serialize(instance, fields):
+        return {name: getattr(instance, name) for name in fields}
+
+    async def paginate(self, request, queryset):
+        return await self.pagination_class().apaginate(queryset, request)
+
+    @staticmethod
+    async def hash_password(password):
+        try:
+            with span("hash"):
+                return await password_hasher.ahash(password)
+        except HashingPoolFull:
+            raise HashingUnavailable()
+
+    @staticmethod
+    def scope_clients(request, queryset):
+        """Limits the clients to the requesting client's account; Admin and Staff users see every client."""
+        account_id = account_scope(request.user)
+        return queryset if account_id is None else queryset.for_account(account_id)
+
+    async def check_client_account(self, request, data):
+        """Client tokens may only write clients of their own account, under subaccounts of that account."""
+        scope = account_scope(request.user)
+        if scope is None:
+            return
+        subaccount_id = data.get("subaccount_id")
+        if data.get("account_id", scope) != scope or (
+            subaccount_id is not None and not await self.in_account_scope(request, subaccount_id)
+        ):
+            raise exceptions.PermissionDenied("Clients can only be added to or moved within your own account.")
+
+    @staticmethod
+    async def in_account_scope(request, *account_ids):
+        """Whether the accounts are the requesting client's account or its subaccounts; always for Admin and Staff."""
+        scope = account_scope(request.user)
+        return scope is None or await sync_to_async(in_subtree)(scope, account_ids)
+
+    @staticmethod
+    def filter_uuid(request, queryset, *names):
+        for name in names:
+            value = request.GET.get(name)
+            if value:
+                try:
+                    queryset = queryset.filter(**{name: value})
+                except DjangoValidationError:
+                    raise exceptions.ValidationError({name: ["Must be a valid UUID."]})
+        return queryset
+
+
+# ======= Users =======
+class UserListView(AsyncAPIView):
+    permission_classes = (IsAuthenticated, IsInternal, IsAdminOrReadOnly)
+    role_models = {BaseUser.Role.ADMIN: Admin, BaseUser.Role.STAFF: Staff}
+
+    def get_queryset(self, request):
+        model = self.role_models.get(request.GET.get("role"), BaseUser)
+        return model.objects.all()
+
+    async def get(self, request):
+        queryset = self.get_queryset(request).values(*USER_FIELDS)
+        return JsonResponse(await self.paginate(request, queryset))
+
+    async def post(self, request):
+        data = self.validate(UserCreateSerializer, request)
+        password = data.pop("password", None)
+        data["email"] = BaseUserManager.normalize_email(data["email"])
+        user = self.role_models[data["role"]](**data)
+        user.password = await self.hash_password(password)
+        try:
+            await user.asave(force_insert=True)
+        except IntegrityError:
+            raise exceptions.ValidationError({"email": ["A user with this email already exists."]})
+        return JsonResponse(self.serialize(user, USER_FIELDS), status=status.HTTP_201_CREATED)
+
+
+class UserDetailView(AsyncAPIView):
+    """Staff users may change their own name; role and is_active, and other users, are changed by Admins."""
+
+    permission_classes = (IsAuthenticated, IsInternal)
+
+    async def get(self, request, pk):
+        try:
+            user = await BaseUser.objects.values(*USER_FIELDS).aget(pk=pk)
+        except BaseUser.DoesNotExist:
+            raise exceptions.NotFound()
+        return JsonResponse(user)
+
+    async def patch(self, request, pk):
+        data = self.validate(UserUpdateSerializer, request, partial=True)
+        if not is_admin(request.user):
+            if data.keys() & {"role", "is_active"}:
+                raise exceptions.PermissionDenied("Only Admin users may change role or is_active.")
+            if str(pk) != str(request.user.pk):
+                raise exceptions.PermissionDenied("Staff users may only change their own profile.")
+        try:
+            user = await BaseUser.objects.aget(pk=pk)
+        except BaseUser.DoesNotExist:
+            raise exceptions.NotFound()
+        for name, value in data.items():
+            setattr(user, name, value)
+        if data:
+            await user.asave(update_fields=list(data))
+        return JsonResponse(self.serialize(user, USER_FIELDS))
+
+
+# ======= Clients =======
+class ClientListView(AsyncAPIView):
+    permission_classes = (IsAuthenticated, IsInternalOrAccountMember)
+    role_models = {BaseClient.Role.ACCOUNT_OWNER: AccountOwner, BaseClient.Role.ACCOUNT_USER: AccountUser}
+
+    def get_queryset(self, request):
+        model = self.role_models.get(request.GET.get("role"), BaseClient)
+        queryset = self.scope_clients(request, model.objects.all())
+        return self.filter_uuid(request, queryset, "account_id", "subaccount_id")
+
+    async def get(self, request):
+        queryset = self.get_queryset(request).values(*CLIENT_FIELDS)
+        return JsonResponse(await self.paginate(request, queryset))
+
+    async def post(self, request):
+        data = self.validate(ClientCreateSerializer, request)
+        await self.check_client_account(request, data)
+        password = data.pop("password", None)
+        data["email"] = BaseUserManager.normalize_email(data["email"])
+        client = self.role_models[data["role"]](**data)
+        client.password = await self.hash_password(password)
+        try:
+            await client.asave(force_insert=True)
+        except IntegrityError:
+            raise exceptions.ValidationError(
+                {"non_field_errors": ["A client with this email, phone number or domain already exists."]}
+            )
+        return JsonResponse(self.serialize(client, CLIENT_FIELDS), status=status.HTTP_201_CREATED)
+
+
+class ClientSearchView(AsyncAPIView):
+    """
+    Ranked full-text and fuzzy search of clients by name, email, company, domain and city (?q=),
+    optionally within ?account_id= / ?subaccount_id=. Pages continue with the returned cursor.
+    """
+
+    permission_classes = (IsAuthenticated, IsInternalOrAccountMember)
+    pagination_class = RankedKeysetPagination
+
+    async def get(self, request):
+        term = request.GET.get("q", "").strip()
+        if not term:
+            raise exceptions.ValidationError({"q": ["This query parameter is required."]})
+        if len(term) > MAX_QUERY_LENGTH:
+            raise exceptions.ValidationError({"q": [f"Ensure this value has at most {MAX_QUERY_LENGTH} characters."]})
+        queryset = self.scope_clients(request, BaseClient.objects.all())
+        queryset = self.filter_uuid(request, queryset, "account_id", "subaccount_id")
+        queryset = search_clients(term, queryset).values(*CLIENT_FIELDS, "rank")
+        return JsonResponse(await self.paginate(request, queryset))
+
+
+class ClientResolveView(AsyncAPIView):
+    """
+    Resolves up to MAX_RESOLVE_KEYS ids, emails, phone numbers or domains to client and account
+    ids in one query: POST {"type": "email", "keys": [...]}. Misses (and clients of other accounts,
+    for client tokens) are answered with null.
+    """
+
+    permission_classes = (IsAuthenticated, IsInternalOrAccountMember)
+    read_only = True
+
+    async def post(self, request):
+        data = self.validate(ClientResolveSerializer, request)
+        results = await sync_to_async(resolve_clients)(data["type"], data["keys"], account_scope(request.user))
+        return JsonResponse({"results": results, "missing": [key for key, value in results.items() if value is None]})
+
+
+class ClientExportView(AsyncAPIView):
+    """
+    Streams every client of ?account_id= as NDJSON (default) or CSV (?format=csv) in id order.
+    An interrupted export is resumed with ?after=<last exported id>.
+    """
+
+    permission_classes = (IsAuthenticated, IsInternalOrAccountMember)
+    chunk_size = 2000
+
+    @staticmethod
+    def parse_uuid(request, name):
+        value = request.GET.get(name)
+        try:
+            return uuid.UUID(value) if value else None
+        except ValueError:
+            raise exceptions.ValidationError({name: ["Must be a valid UUID."]})
+
+    async def get(self, request):
+        account_id, after = self.parse_uuid(request, "account_id"), self.parse_uuid(request, "after")
+        if account_id is None:
+            raise exceptions.ValidationError({"account_id": ["This query parameter is required."]})
+        if account_scope(request.user) not in (None, account_id):
+            raise exceptions.PermissionDenied("Only the clients of your own account can be exported.")
+        fmt = request.GET.get("format", "ndjson")
+        if fmt not in EXPORT_FORMATS:
+            raise exceptions.ValidationError({"format": [f"Must be one of: {', '.join(EXPORT_FORMATS)}."]})
+        queryset = client_export_queryset(account_id, after)
+
+        encoder = RowEncoder(fmt)
+        response = StreamingHttpResponse(
+            aexport_lines(queryset, encoder, header=after is None, chunk_size=self.chunk_size),
+            content_type=encoder.content_type,
+        )
+        response["Content-Disposition"] = f'attachment; filename="clients-{account_id}.{fmt}"'
+        return response
+
+
+class ClientDetailView(AsyncAPIView):
+    permission_classes = (IsAuthenticated, IsInternalOrAccountMember)
+
+    async def get(self, request, pk):
+        try:
+            client = await self.scope_clients(request, BaseClient.objects.values(*CLIENT_FIELDS)).aget(pk=pk)
+        except BaseClient.DoesNotExist:
+            raise exceptions.NotFound()
+        return JsonResponse(client)
+
+    async def patch(self, request, pk):
+        data = self.validate(ClientUpdateSerializer, request, partial=True)
+        await self.check_client_account(request, data)
+        try:
+            client = await self.scope_clients(request, BaseClient.objects.all()).aget(pk=pk)
+        except BaseClient.DoesNotExist:
+            raise exceptions.NotFound()
+        for name, value in data.items():
+            setattr(client, name, value)
+        if data:
+            try:
+                await client.asave(update_fields=list(data))
+            except IntegrityError:
+                raise exceptions.ValidationError({"phone_number": ["A client with this phone number already exists."]})
+        return JsonResponse(self.serialize(client, CLIENT_FIELDS))
+
+
+# ======= Accounts =======
+def serialize_account(account):
+    return {"id": account.id, "parent_id": account.parent_id, "ancestors": account.ancestor_ids, "depth": account.depth}
+
+
+class AccountListView(AsyncAPIView):
+    """Account owners may add subaccounts within their account tree; Admin and Staff users anywhere."""
+
+    permission_classes = (IsAuthenticated, IsInternalOrAccountMember)
+
+    async def post(self, request):
+        data = self.validate(AccountCreateSerializer, request)
+        if account_scope(request.user) is not None:
+            if data["parent_id"] is None or not await self.in_account_scope(request, data["parent_id"]):
+                raise exceptions.PermissionDenied("Accounts can only be added under your own account.")
+        try:
+            account = await sync_to_async(create_account)(data["parent_id"], data.get("id"))
+        except AccountTreeError as e:
+            raise exceptions.ValidationError({"parent_id": [str(e)]})
+        except IntegrityError:
+            raise exceptions.ValidationError({"id": ["An account with this id already exists."]})
+        return JsonResponse(serialize_account(account), status=status.HTTP_201_CREATED)
+
+
+class AccountDetailView(AsyncAPIView):
+    permission_classes = (IsAuthenticated, IsInternalOrAccountMember)
+
+    async def get(self, request, pk):
+        if not await self.in_account_scope(request, pk):
+            raise exceptions.NotFound()
+        try:
+            account = await Account.objects.aget(pk=pk)
+        except Account.DoesNotExist:
+            raise exceptions.NotFound()
+        data = serialize_account(account)
+        data["children"] = [child async for child in account.children.order_by("id").values_list("id", flat=True)]
+        return JsonResponse(data)
+
+    async def patch(self, request, pk):
+        data = self.validate(AccountMoveSerializer, request)
+        scope = account_scope(request.user)
+        if scope is not None:
+            if not await self.in_account_scope(request, pk):
+                raise exceptions.NotFound()
+            if pk == scope or data["parent_id"] is None or not await self.in_account_scope(request, data["parent_id"]):
+                raise exceptions.PermissionDenied("Accounts can only be moved within your own account.")
+        try:
+            account = await sync_to_async(move_account)(pk, data["parent_id"])
+        except Account.DoesNotExist:
+            raise exceptions.NotFound()
+        except AccountTreeError as e:
+            raise exceptions.ValidationError({"parent_id": [str(e)]})
+        return JsonResponse(serialize_account(account))
+
+
+class AccountMembersView(AsyncAPIView):
+    """
+    The clients of an account and all its subaccounts, a keyset-paginated page at a time.
+    With ?client_id= answers only whether that client is a member.
+    """
+
+    permission_classes = (IsAuthenticated, IsInternalOrAccountMember)
+
+    async def get(self, request, pk):
+        if not await self.in_account_scope(request, pk):
+            raise exceptions.NotFound()
+        client_id = request.GET.get("client_id")
+        if client_id:
+            try:
+                client_id = uuid.UUID(client_id)
+            except ValueError:
+                raise exceptions.ValidationError({"client_id": ["Must be a valid UUID."]})
+            is_member = await sync_to_async(account_membership.is_member)(pk, client_id)
+            return JsonResponse({"account_id": pk, "client_id": client_id, "is_member": is_member})
+        members = await sync_to_async(account_membership.members)(pk)
+        page = await self.paginate(request, members.values("id", "date_joined"))
+        page["account_id"] = pk
+        return JsonResponse(page)